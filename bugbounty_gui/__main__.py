@@ -0,0 +1,11 @@
+# __main__.py
+# python -m bugbounty_gui ...: the headless CLI (cli.py). The modules in this directory import each
+# other by plain name, as they do when main.py is started from here, so put it on sys.path first.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main  # noqa: E402
+
+sys.exit(main())
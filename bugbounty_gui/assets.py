@@ -0,0 +1,570 @@
+# assets.py
+# Indexed asset store (SQLite, WAL mode) fed incrementally from tool output. Subdomains, live hosts,
+# IPs, URLs and findings are upserted in batches with the tool that reported them and first/last
+# seen times, so the GUI and later stages can query e.g. "live hosts of X not yet scanned by nuclei"
+# without re-reading multi-GB text files.
+#
+#   python3 assets.py list --target example.com --kind subdomain
+#   python3 assets.py unscanned --target example.com --kind live --tool nuclei -o todo.txt --mark
+import os
+import re
+import sys
+import time
+import sqlite3
+import shlex
+import argparse
+import threading
+from collections import deque
+
+from runner import command_programs, _SHELL_SEPARATORS
+
+KINDS = ("subdomain", "live", "ip", "url", "finding")
+SHARD_TARGETS = "targets.txt"  # the target list runner.submit_batch writes into each shard directory
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    id INTEGER PRIMARY KEY,
+    target TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    UNIQUE (target, kind, value)
+);
+CREATE INDEX IF NOT EXISTS assets_kind_seen ON assets (target, kind, last_seen);
+CREATE TABLE IF NOT EXISTS sightings (
+    asset_id INTEGER NOT NULL REFERENCES assets(id),
+    source TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (asset_id, source)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS scans (
+    asset_id INTEGER NOT NULL REFERENCES assets(id),
+    tool TEXT NOT NULL,
+    scanned_at REAL NOT NULL,
+    PRIMARY KEY (asset_id, tool)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_ASSET = ("INSERT INTO assets (target, kind, value, first_seen, last_seen) VALUES (?, ?, ?, ?, ?) "
+                 "ON CONFLICT (target, kind, value) DO UPDATE SET last_seen = excluded.last_seen")
+_UPSERT_SIGHTING = ("INSERT INTO sightings (asset_id, source, first_seen, last_seen) "
+                    "SELECT id, ?, ?, ? FROM assets WHERE target = ? AND kind = ? AND value = ? "
+                    "ON CONFLICT (asset_id, source) DO UPDATE SET last_seen = excluded.last_seen")
+_MARK_SCANNED = ("INSERT INTO scans (asset_id, tool, scanned_at) "
+                 "SELECT id, ?, ? FROM assets WHERE target = ? AND kind = ? AND value = ? "
+                 "ON CONFLICT (asset_id, tool) DO UPDATE SET scanned_at = excluded.scanned_at")
+
+
+class AssetStore:
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        # one connection per thread; WAL lets readers run while a runner thread writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ingest(self, target, source, items, seen=None):
+        # items: iterable of (kind, value); returns how many rows were written
+        now = seen or time.time()
+        rows = [(target, kind, value, now, now) for kind, value in items]
+        if not rows:
+            return 0
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany(_UPSERT_ASSET, rows)
+                conn.executemany(_UPSERT_SIGHTING, [(source, now, now, target, kind, value) for target, kind, value, _, _ in rows])
+        return len(rows)
+
+    def mark_scanned(self, target, kind, values, tool, when=None):
+        self.mark_scanned_items(target, [(kind, v) for v in values], tool, when)
+
+    def mark_scanned_items(self, target, items, tool, when=None):
+        # items: (kind, value); values the store doesn't have are ignored
+        now = when or time.time()
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany(_MARK_SCANNED, [(tool, now, target, kind, v) for kind, v in items])
+
+    def query(self, target, kind, since=None, source=None, limit=None):
+        sql = "SELECT a.value FROM assets a"
+        args = []
+        if source:
+            sql += " JOIN sightings s ON s.asset_id = a.id AND s.source = ?"
+            args.append(source)
+        sql += " WHERE a.target = ? AND a.kind = ?"
+        args += [target, kind]
+        if since is not None:
+            sql += " AND a.first_seen >= ?"
+            args.append(since)
+        sql += " ORDER BY a.value"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [r[0] for r in self._conn().execute(sql, args)]
+
+    def unscanned(self, target, kind, tool, limit=None):
+        sql = ("SELECT a.value FROM assets a WHERE a.target = ? AND a.kind = ? AND NOT EXISTS "
+               "(SELECT 1 FROM scans s WHERE s.asset_id = a.id AND s.tool = ?) ORDER BY a.value")
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [r[0] for r in self._conn().execute(sql, (target, kind, tool))]
+
+    def counts(self, target=None):
+        sql = "SELECT target, kind, COUNT(*) FROM assets"
+        args = ()
+        if target:
+            sql += " WHERE target = ?"
+            args = (target,)
+        sql += " GROUP BY target, kind ORDER BY target, kind"
+        return self._conn().execute(sql, args).fetchall()
+
+    def targets(self):
+        return [r[0] for r in self._conn().execute("SELECT DISTINCT target FROM assets ORDER BY target")]
+
+    def export(self, path, values):
+        with open(path, "w", encoding="utf-8") as f:
+            for v in values:
+                f.write(v + "\n")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# --- classifying tool output ---
+
+_ANSI = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]|\x1b\][^\x07]*\x07")
+_IPV4 = re.compile(r"^(?:25[0-5]|2[0-4]\d|1?\d?\d)(?:\.(?:25[0-5]|2[0-4]\d|1?\d?\d)){3}$")
+_HOST = re.compile(r"^(?:\*\.)?[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?(?:\.[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?)+\.?$")
+_NUCLEI = re.compile(r"^\[[^\]]+\] \[[^\]]+\] \[(?:info|low|medium|high|critical|unknown)\]")
+
+# what a tool's stdout lines are, when it's the last program in the command
+TOOL_KINDS = {
+    "subfinder": "subdomain", "assetfinder": "subdomain", "findomain": "subdomain", "amass": "subdomain",
+    "alterx": "subdomain", "dnsx": "subdomain", "github-subdomains": "subdomain", "shuffledns": "subdomain",
+    "httpx": "live", "httpx-toolkit": "live",
+    "katana": "url", "gau": "url", "hakrawler": "url", "urlfinder": "url", "waybackurls": "url", "uro": "url",
+    "nuclei": "finding", "dalfox": "finding", "subzy": "finding",
+    "asnmap": "ip", "masscan": "ip",
+}
+
+# artifact file name hints
+FILE_KINDS = [
+    (re.compile(r"alive|live"), "live"),
+    (re.compile(r"^ips?[._-]|ip\.txt$|_ips?\."), "ip"),
+    (re.compile(r"url"), "url"),
+    (re.compile(r"nuclei|cors_results|redirect_params"), "finding"),
+    (re.compile(r"sub|domain|finder|amass|crtsh|wayback|virustotal|final"), "subdomain"),
+]
+
+
+def kind_for_file(name):
+    base = os.path.basename(name).lower()
+    if not base.endswith(".txt"):
+        return None
+    for rx, kind in FILE_KINDS:
+        if rx.search(base):
+            return kind
+    return None
+
+
+def in_scope(host, target):
+    if not target or _IPV4.match(target):
+        return True
+    target = target.lower().strip(".")
+    return host == target or host.endswith("." + target)
+
+
+def classify(line, target=None, hint=None):
+    # -> (kind, value) or None
+    line = _ANSI.sub("", line).strip()
+    if not line or line.startswith(("[INF]", "[WRN]", "[ERR]", "[FTL]", "[runner")):
+        return None
+    if hint == "finding" or _NUCLEI.match(line):
+        return "finding", line
+    token = line.split()[0]
+    if _IPV4.match(token):
+        return "ip", token
+    if "://" in token:
+        host = token.split("://", 1)[1].split("/", 1)[0].split("?", 1)[0].split(":", 1)[0].lower()
+        if not in_scope(host, target):
+            return None
+        if hint == "live":
+            return "live", token.rstrip("/")
+        return "url", token
+    host = token.lower().rstrip(".")
+    if host.startswith("*."):
+        host = host[2:]
+    if _HOST.match(host) and in_scope(host, target):
+        if hint == "live":
+            return "live", host
+        return "subdomain", host
+    return None
+
+
+def owner_target(value, targets):
+    # the target (longest match first) whose scope a classified value belongs to, or None
+    hosts = []
+    for token in value.split():
+        host = token.split("://", 1)[-1].split("/", 1)[0].split("?", 1)[0].split(":", 1)[0].lower().strip(".[]")
+        if host:
+            hosts.append(host)
+    for t in sorted(targets, key=len, reverse=True):
+        if _IPV4.match(t):
+            if t in hosts:
+                return t
+        elif any(in_scope(h, t) for h in hosts):
+            return t
+    return None
+
+
+class AssetIngestor:
+    # Splits streamed text into lines, classifies them and writes to the store in batches.
+    def __init__(self, store, target, source, hint=None, batch_size=500, flush_interval=2.0):
+        self.store = store
+        self.target = target
+        self.source = source
+        self.hint = hint
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._carry = ""
+        self._batch = {}
+        self._last_flush = time.monotonic()
+
+    def feed(self, text):
+        text = self._carry + text.replace("\r", "")
+        lines = text.split("\n")
+        self._carry = lines.pop()
+        if len(self._carry) > 65536:
+            self._carry = ""  # not line-oriented output
+        for line in lines:
+            self._add(line)
+        if len(self._batch) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def feed_file(self, path, hint=None):
+        hint, self.hint = self.hint, hint or self.hint
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    if self._add(line) and len(self._batch) >= self.batch_size:
+                        self.flush()
+        finally:
+            self.hint = hint
+        self.flush()
+
+    def _add(self, line):
+        item = classify(line, self.target, self.hint)
+        if item:
+            self._batch[item] = None
+        return item
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._batch:
+            return
+        items, self._batch = list(self._batch), {}
+        self.count += self.store.ingest(self.target, self.source, items)
+
+    def close(self):
+        if self._carry:
+            self._add(self._carry)
+            self._carry = ""
+        self.flush()
+
+
+class ShardIngestor(AssetIngestor):
+    # For batch jobs over a shard of targets: each item is stored under the target it belongs to.
+    def __init__(self, store, targets, source, hint=None, **kw):
+        super().__init__(store, None, source, hint, **kw)
+        self.targets = list(targets)
+
+    def _add(self, line):
+        item = classify(line, None, self.hint)
+        owner = owner_target(item[1], self.targets) if item else None
+        if owner:
+            self._batch[(owner, item)] = None
+        return owner
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._batch:
+            return
+        by_target = {}
+        for owner, item in self._batch:
+            by_target.setdefault(owner, []).append(item)
+        self._batch = {}
+        for owner, items in by_target.items():
+            self.count += self.store.ingest(owner, self.source, items)
+
+
+# scanners whose finished jobs record what they scanned: tool -> (list-file flags, single-target flags);
+# a list piped in ("cat live.txt | nuclei") counts too
+SCANNER_INPUTS = {
+    "nuclei": (("-l", "-list"), ("-u", "-target")),
+    "naabu": (("-list", "-l"), ("-host",)),
+    "subzy": (("--targets",), ("--target",)),
+    "dirsearch": (("-l", "--urls-file"), ("-u", "--url")),
+    "nmap": (("-iL",), ()),
+    "masscan": (("-iL",), ()),
+    "dalfox": ((), ("url",)),
+}
+
+
+def scanned_inputs(cmd, cwd=None):
+    # -> (scanner, [input values]) for a command whose last scanner is in SCANNER_INPUTS, else (None, [])
+    try:
+        lexer = shlex.shlex(cmd, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        tokens = list(lexer)
+    except ValueError:
+        return None, []
+    # split into simple commands; remember what each one's stdin comes from
+    stages, cur = [], []
+    for tok in tokens + [";"]:
+        if tok in _SHELL_SEPARATORS:
+            if cur:
+                stages.append((cur, tok))
+            cur = []
+        else:
+            cur.append(tok)
+    scanner, values = None, []
+    for i, (words, _) in enumerate(stages):
+        name = os.path.basename(words[0])
+        if name not in SCANNER_INPUTS:
+            continue
+        list_flags, single_flags = SCANNER_INPUTS[name]
+        files, found = [], []
+        for flag, arg in zip(words, words[1:]):
+            if flag in list_flags:
+                files.append(arg)
+            elif flag in single_flags:
+                found.append(arg)
+        if i and stages[i - 1][1] == "|" and os.path.basename(stages[i - 1][0][0]) == "cat":
+            files += stages[i - 1][0][1:]
+        if i and stages[i - 1][1] == "|" and os.path.basename(stages[i - 1][0][0]) == "echo":
+            found += stages[i - 1][0][1:]
+        for f in files:
+            path = f if os.path.isabs(f) or not cwd else os.path.join(cwd, f)
+            try:
+                with open(path, encoding="utf-8", errors="replace") as fh:
+                    found += [line.split()[0] for line in fh if line.strip()]
+            except OSError:
+                pass
+        scanner, values = name, found
+    return scanner, values
+
+
+def scan_items(values, target):
+    # the asset rows an input value can stand for: the URL as given, its live form and its host or IP
+    items = set()
+    for v in values:
+        v = _ANSI.sub("", v).strip()
+        if not v:
+            continue
+        host = v.split("://", 1)[-1].split("/", 1)[0].split("?", 1)[0].split(":", 1)[0].lower().rstrip(".")
+        if "://" in v:
+            items.update((("url", v), ("live", v.rstrip("/"))))
+        if _IPV4.match(host):
+            items.add(("ip", host))
+        elif in_scope(host, target):
+            items.update((("subdomain", host), ("live", host)))
+    return items
+
+
+class AssetRecorder:
+    # Runner observer: ingests job output as it streams, and the job's workspace artifacts when it ends.
+    # Runner threads only queue the text; a background thread classifies and writes it, so a chatty job
+    # isn't slowed down to the speed of SQLite. The queue holds at most max_queued characters, beyond
+    # that job_output waits for the writer.
+    def __init__(self, store, max_queued=64 * 1024 * 1024):
+        self.store = store
+        self.max_queued = max_queued
+        self._ingestors = {}
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._queued = 0
+        self._busy = False
+        self._cond = threading.Condition()
+        self._closed = False
+        threading.Thread(target=self._drain, name="asset-recorder", daemon=True).start()
+
+    def _put(self, item, size=0):
+        with self._cond:
+            while self._queued > self.max_queued and not self._closed:
+                self._cond.wait(0.5)
+            self._queue.append(item)
+            self._queued += size
+            self._cond.notify_all()
+
+    def _drain(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._busy = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                if not self._queue:
+                    self._busy = False
+                    self._cond.notify_all()
+                    return
+                event, job, text = self._queue.popleft()
+                self._busy = True
+                self._queued -= len(text) if text else 0
+                self._cond.notify_all()
+            try:
+                if event == "output":
+                    self._ingestor(job).feed(text)
+                else:
+                    self._finished(job)
+            except Exception as e:
+                print(f"[assets] could not record job {job.id}: {e}", file=sys.stderr)
+
+    def wait_idle(self, timeout=None):
+        # block until everything queued so far is in the store; False on timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def close(self, timeout=None):
+        self.wait_idle(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _ingestor(self, job):
+        ing = self._ingestors.get(job.id)
+        if ing is None:
+            programs = command_programs(job.cmd)
+            last = programs[-1] if programs else None
+            source = job.tool or last or "command"
+            if job.target:
+                ing = AssetIngestor(self.store, job.target, source, hint=TOOL_KINDS.get(last))
+            else:
+                ing = ShardIngestor(self.store, job.targets, source, hint=TOOL_KINDS.get(last))
+            with self._lock:
+                self._ingestors[job.id] = ing
+        return ing
+
+    def job_output(self, job, text):
+        if job.targets:
+            self._put(("output", job, text), len(text))
+
+    def job_finished(self, job):
+        self._put(("finished", job, None))
+
+    def _finished(self, job):
+        with self._lock:
+            ing = self._ingestors.pop(job.id, None)
+        if not job.targets:
+            return
+        if ing is None:
+            ing = self._ingestor(job)
+            with self._lock:
+                self._ingestors.pop(job.id, None)
+        ing.close()
+        ws = getattr(job, "workspace", None)
+        for rel in getattr(job, "artifacts", []) or []:
+            kind = kind_for_file(rel)
+            if kind and ws is not None:
+                ing.feed_file(ws.file(rel), hint=kind)
+        if ws is None and isinstance(ing, ShardIngestor) and job.cwd:
+            # a batch shard's files stay in its _batches directory
+            for name in sorted(os.listdir(job.cwd)):
+                kind = kind_for_file(name) if name != SHARD_TARGETS else None
+                if kind:
+                    ing.feed_file(os.path.join(job.cwd, name), hint=kind)
+        if job.returncode == 0 and not job._stop_requested:
+            self._record_scan(job)
+
+    def _record_scan(self, job):
+        # "live hosts of X not yet scanned by nuclei": remember what a successful scanner job was given
+        scanner, values = scanned_inputs(job.run_cmd or job.cmd, job.cwd)
+        if not scanner:
+            return
+        if job.target:
+            self.store.mark_scanned_items(job.target, scan_items(values, job.target), scanner)
+            return
+        by_target = {}
+        for v in values:
+            owner = owner_target(v, job.targets)
+            if owner:
+                by_target.setdefault(owner, []).append(v)
+        for owner, vs in by_target.items():
+            self.store.mark_scanned_items(owner, scan_items(vs, owner), scanner)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="query the recon asset store")
+    ap.add_argument("--db", default=os.environ.get("BBGUI_ASSETS_DB", os.path.join("workspaces", "assets.db")))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("list")
+    p.add_argument("--target", required=True)
+    p.add_argument("--kind", choices=KINDS, required=True)
+    p.add_argument("--since", type=float, help="only assets first seen after this unix time")
+    p.add_argument("--source")
+    p.add_argument("-o", "--output")
+    p = sub.add_parser("unscanned")
+    p.add_argument("--target", required=True)
+    p.add_argument("--kind", choices=KINDS, required=True)
+    p.add_argument("--tool", required=True)
+    p.add_argument("-o", "--output")
+    p.add_argument("--mark", action="store_true", help="record the exported assets as scanned by --tool")
+    p = sub.add_parser("ingest")
+    p.add_argument("--target", required=True)
+    p.add_argument("--source", required=True)
+    p.add_argument("--kind", choices=KINDS)
+    p.add_argument("files", nargs="+")
+    p = sub.add_parser("stats")
+    p.add_argument("--target")
+    args = ap.parse_args(argv)
+
+    store = AssetStore(args.db)
+    if args.cmd == "stats":
+        for target, kind, n in store.counts(args.target):
+            print(f"{target}\t{kind}\t{n}")
+        return
+    if args.cmd == "ingest":
+        ing = AssetIngestor(store, args.target, args.source, hint=args.kind)
+        for f in args.files:
+            ing.feed_file(f, hint=args.kind or kind_for_file(f))
+        print(f"[assets] {ing.count} rows from {len(args.files)} file(s)", file=sys.stderr)
+        return
+    if args.cmd == "list":
+        values = store.query(args.target, args.kind, since=args.since, source=args.source)
+    else:
+        values = store.unscanned(args.target, args.kind, args.tool)
+    if args.output:
+        store.export(args.output, values)
+        print(f"[assets] {len(values)} -> {args.output}", file=sys.stderr)
+    else:
+        for v in values:
+            print(v)
+    if args.cmd == "unscanned" and args.mark:
+        store.mark_scanned(args.target, args.kind, values, args.tool)
+
+
+if __name__ == "__main__":
+    main()
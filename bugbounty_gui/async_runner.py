@@ -0,0 +1,241 @@
+# async_runner.py
+# Alternative runner backend: every job lives on one asyncio event loop (in one background thread)
+# instead of a thread per job polling select(). PTY and pipe fds are watched with loop.add_reader and
+# exits through a pidfd per child, reaped with os.wait4 like the threaded runner does. Same
+# on_output/on_finished contract and job API as runner.CommandRunner, so main.py can switch engines
+# through config.
+import os
+import pty
+import time
+import asyncio
+import threading
+import subprocess
+
+from runner import CommandRunner, AdaptiveReader, new_decoder, is_builtin, reap, QUEUED, RUNNING, STOP_POLL
+
+PTY_READS_PER_WAKEUP = 8
+EXIT_POLL_INTERVAL = 0.05
+
+
+class AsyncCommandRunner(CommandRunner):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._running = 0
+        self._tasks = set()
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._loop_main, args=(ready,), name="runner-asyncio", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def _loop_main(self, ready):
+        asyncio.set_event_loop(self._loop)
+        ready.set()
+        self._loop.run_forever()
+
+    def close(self):
+        self.stop()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    # --- scheduler (all state below is only touched on the loop thread) ---
+
+    def submit(self, cmd, **options):
+        job = self._new_job(cmd, **options)
+        with self._cond:
+            self.jobs[job.id] = job
+        self._loop.call_soon_threadsafe(self._enqueue, job)
+        return job
+
+    def _enqueue(self, job):
+        if job._stop_requested:
+            self._finish(job)
+            return
+        self._queue.append(job)
+        self._pump()
+
+    def reschedule(self):
+        self._loop.call_soon_threadsafe(self._pump)
+
+    def _pump(self):
+        while self._running < self.max_workers:
+            job = self._next_job()
+            if job is None:
+                return
+            self._running += 1
+            for cat in job.categories:
+                self._active[cat] = self._active.get(cat, 0) + 1
+            job.state = RUNNING
+            job.started = time.time()
+            task = self._loop.create_task(self._execute_async(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute_async(self, job):
+        log = None
+        try:
+            log = self._open_log(job)
+            self._job_starting(job)
+            if not self._cache_replay(job, log):
+                log = self._cache_wrap(job, log)
+                if is_builtin(job.cmd):
+                    # builtins block on network I/O; keep them off the loop thread
+                    await self._loop.run_in_executor(None, self._run_builtin, job, log)
+                elif job.use_pty:
+                    await self._run_pty_async(job, log)
+                else:
+                    await self._run_pipe_async(job, log)
+        except Exception as e:
+            job.error = str(e)
+            self._emit(f"[async runner error] {e}\n", job)
+            job.returncode = -1
+        finally:
+            if log is not None:
+                log.close()
+            self._running -= 1
+            for cat in job.categories:
+                self._active[cat] -= 1
+        self._job_ended(job)
+        self._cache_store(job, log)
+        self._finish(job)
+        self._pump()
+
+    def _spawn(self, job, **kwargs):
+        # plain Popen rather than asyncio's subprocess transport: the exit is picked up by _exited()
+        # with os.wait4, which keeps the child's rusage for the job's metrics
+        proc = subprocess.Popen(job.run_cmd or job.cmd, cwd=job.cwd, shell=True, executable='/bin/bash', bufsize=0,
+                                start_new_session=True, **kwargs)
+        job.process = proc
+        self._spawned(job)
+        return proc
+
+    def _exited(self, job):
+        # future with the return code once the job's process has exited and been reaped. A pidfd
+        # becomes readable on exit; without pidfd support the exit is polled.
+        fut = self._loop.create_future()
+        try:
+            pidfd = os.pidfd_open(job.process.pid)
+        except (AttributeError, OSError):
+            pidfd = None
+
+        def check():
+            if fut.done():
+                return
+            if reap(job, os.WNOHANG):
+                if pidfd is not None:
+                    self._loop.remove_reader(pidfd)
+                    os.close(pidfd)
+                fut.set_result(job.process.returncode)
+            elif pidfd is None:
+                self._loop.call_later(EXIT_POLL_INTERVAL, check)
+
+        if pidfd is not None:
+            self._loop.add_reader(pidfd, check)
+        check()
+        return fut
+
+    def _watch_output(self, job, log, fd, decoder):
+        # deliver what fd produces from the loop; returns (future set at EOF, drain function)
+        os.set_blocking(fd, False)
+        reader = AdaptiveReader(fd)
+        eof = self._loop.create_future()
+
+        def drain(max_reads=None):
+            # read what is buffered (at most max_reads chunks, so one noisy job can't starve the loop);
+            # False once the fd reports EOF (or EIO, for a tty whose last writer closed it)
+            n = 0
+            while max_reads is None or n < max_reads:
+                n += 1
+                try:
+                    data = reader.read()
+                except BlockingIOError:
+                    return True
+                except OSError:
+                    return False
+                if not data:
+                    return False
+                self._deliver(job, log, decoder, data)
+            return True
+
+        def on_readable():
+            if not drain(PTY_READS_PER_WAKEUP):
+                self._loop.remove_reader(fd)
+                if not eof.done():
+                    eof.set_result(None)
+
+        self._loop.add_reader(fd, on_readable)
+        return eof, drain
+
+    async def _run_pipe_async(self, job, log):
+        job.process = self._spawn(job, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        fd = job.process.stdout.fileno()
+        decoder = None if job.raw else new_decoder()
+        try:
+            eof, drain = self._watch_output(job, log, fd, decoder)
+            exited = self._exited(job)
+            while not eof.done():
+                await asyncio.wait([eof], timeout=STOP_POLL)
+                if not eof.done() and exited.done() and self._stopped_for_good(job):
+                    # a descendant that left the job's session still holds the pipe
+                    if drain():
+                        self._emit("[runner] output pipe held open by a process outside the job, no longer reading it\n", job)
+                    break
+            self._deliver(job, log, decoder, b"", final=True)
+            job.returncode = await exited
+        finally:
+            self._loop.remove_reader(fd)
+            job.process.stdout.close()
+
+    async def _run_pty_async(self, job, log):
+        master_fd, slave_fd = pty.openpty()
+        try:
+            job.process = self._spawn(job, stdin=slave_fd, stdout=slave_fd, stderr=slave_fd)
+        except Exception:
+            os.close(master_fd)
+            raise
+        finally:
+            os.close(slave_fd)
+        decoder = None if job.raw else new_decoder()
+        try:
+            _, drain = self._watch_output(job, log, master_fd, decoder)
+            # a background grandchild may keep the tty open, so the job ends when the shell exits
+            job.returncode = await self._exited(job)
+            drain()
+            self._deliver(job, log, decoder, b"", final=True)
+        finally:
+            self._loop.remove_reader(master_fd)
+            os.close(master_fd)
+
+    # --- control ---
+
+    def stop_job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        job._stop_requested = True
+        self._loop.call_soon_threadsafe(self._cancel, job)
+        return True
+
+    def stop(self):
+        # one loop callback, so no queued job can start between cancelling the running ones; waits for
+        # it so that wait_stopped() afterwards sees every terminated job
+        done = threading.Event()
+        self._loop.call_soon_threadsafe(self._cancel_all, done)
+        if threading.current_thread() is not self._thread:
+            done.wait(5)
+
+    def _cancel_all(self, done):
+        try:
+            for job in [j for j in self.jobs.values() if not j.done]:
+                job._stop_requested = True
+                self._cancel(job)
+        finally:
+            done.set()
+
+    def _cancel(self, job):
+        if job.state == QUEUED:
+            if job in self._queue:
+                self._queue.remove(job)
+                self._finish(job)
+            return
+        self._terminate(job)
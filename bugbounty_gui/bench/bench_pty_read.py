@@ -0,0 +1,107 @@
+# bench_pty_read.py
+# Throughput benchmark for the runner read path. A local script writes --mb megabytes of text
+# (with multibyte characters) and we time how fast CommandRunner gets it into the log, for
+# PTY and pipe mode, decoded and raw. The old 1024-byte read + per-chunk decode loop is
+# included as a baseline.
+#
+#   python3 bench/bench_pty_read.py --mb 300
+import os
+import sys
+import pty
+import time
+import select
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from runner import CommandRunner  # noqa: E402
+from bench.verify import check_log  # noqa: E402
+
+EMITTER = r'''
+import sys
+line = ("recon-%08d.example.com ✓ héllo wörld " + "x" * 60 + "\n")
+chunk = "".join(line % i for i in range(700)).encode()
+total = int(sys.argv[1]) * 1024 * 1024
+out = sys.stdout.buffer
+sent = 0
+while sent < total:
+    out.write(chunk)
+    sent += len(chunk)
+out.flush()
+'''
+
+
+def legacy_pty(cmd):
+    # the pre-rework loop: 1024-byte reads, decode each chunk on its own
+    master_fd, slave_fd = pty.openpty()
+    p = subprocess.Popen(cmd, shell=True, stdin=slave_fd, stdout=slave_fd, stderr=slave_fd, executable='/bin/bash')
+    os.close(slave_fd)
+    total = 0
+    while True:
+        r, _, _ = select.select([master_fd], [], [], 0.1)
+        if master_fd in r:
+            try:
+                data = os.read(master_fd, 1024)
+            except OSError:
+                break
+            if not data:
+                break
+            total += len(data.decode(errors='ignore'))
+        if p.poll() is not None and not r:
+            break
+    os.close(master_fd)
+    p.wait()
+    return total
+
+
+def run_runner(cmd, logs_dir, use_pty, raw):
+    received = [0]
+
+    def on_output(data, job):
+        received[0] += len(data)
+
+    runner = CommandRunner(on_output=on_output, logs_dir=logs_dir, max_workers=1, log_max_bytes=0)
+    job = runner.run(cmd, use_pty=use_pty, raw=raw, tool="bench")
+    job.wait()
+    size = os.path.getsize(job.log_path)
+    problem = check_log(job.log_path, cmd, use_pty)
+    os.remove(job.log_path)
+    if problem:
+        raise SystemExit(f"{'pty' if use_pty else 'pipe'}{' raw' if raw else ''}: {problem}")
+    return size, received[0]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="runner read path throughput")
+    ap.add_argument("--mb", type=int, default=200, help="megabytes emitted per run")
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "emit.py")
+        with open(script, "w") as f:
+            f.write(EMITTER)
+        cmd = f"{sys.executable} {script} {args.mb}"
+        logs_dir = os.path.join(tmp, "logs")
+
+        cases = []
+        if not args.skip_legacy:
+            cases.append(("legacy pty 1KiB reads", lambda: (legacy_pty(cmd), 0)))
+        cases += [
+            ("pty decoded", lambda: run_runner(cmd, logs_dir, True, False)),
+            ("pty raw", lambda: run_runner(cmd, logs_dir, True, True)),
+            ("pipe decoded", lambda: run_runner(cmd, logs_dir, False, False)),
+            ("pipe raw", lambda: run_runner(cmd, logs_dir, False, True)),
+        ]
+        print(f"{'case':<24}{'MB':>8}{'seconds':>10}{'MB/s':>10}")
+        for name, fn in cases:
+            t0 = time.perf_counter()
+            size, _ = fn()
+            dt = time.perf_counter() - t0
+            mb = size / (1024 * 1024)
+            print(f"{name:<24}{mb:>8.1f}{dt:>10.2f}{mb / dt:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
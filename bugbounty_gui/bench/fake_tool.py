@@ -0,0 +1,131 @@
+# fake_tool.py
+# Stand-in for a recon tool: writes a configurable amount of output with a configurable shape and
+# pace, so runner/GUI/merge changes can be measured without network or real scanners.
+#
+#   python3 bench/fake_tool.py --mb 200 --shape unicode            # flat out
+#   python3 bench/fake_tool.py --lines 100000 --shape hosts --dup 0.3 --domain example.com
+#   python3 bench/fake_tool.py --lines 5000 --burst 500 --pause 0.2  # bursty
+#   python3 bench/fake_tool.py --lines 50 --rate 10                  # slow drip, 10 lines/s
+#   python3 bench/fake_tool.py --mb 50 --shape binary                # binary-ish bytes, invalid UTF-8
+#   python3 bench/fake_tool.py --lines 1000000 --shape crawl         # gau/wayback-like URL mix (classify)
+import os
+import sys
+import time
+import random
+import argparse
+
+SHAPES = ("text", "unicode", "long", "hosts", "urls", "crawl", "binary", "ansi")
+# crawl: a mix like a gau/wayback dump, mostly static files and parameters no pattern family lists
+CRAWL_EXTS = ("", "", "", "", ".html", ".js", ".css", ".png", ".jpg", ".svg", ".woff2", ".php", ".aspx", ".json",
+              ".pdf", ".xml", ".txt", ".bak", ".sql", ".zip")
+CRAWL_PARAMS = ("utm_source", "utm_medium", "utm_campaign", "ref", "sid", "v", "ver", "lang", "page", "fbclid",
+                "gclid", "ts", "cb", "format", "size", "w", "h", "locale", "session", "client", "id", "q", "url",
+                "redirect", "file", "next", "search", "category", "token", "callback")
+
+
+def make_line(shape, i, rng, domain, dup):
+    if dup and i and rng.random() < dup:
+        i = rng.randrange(i)  # repeat an earlier host/url
+    if shape == "text":
+        return f"[INF] scanned recon-{i:08d}.{domain} status=200 len={i % 9973} title=Example\n"
+    if shape == "unicode":
+        return f"recon-{i:08d}.{domain} ✓ héllo wörld — 漢字 {'x' * 40}\n"
+    if shape == "long":
+        return f"{i:08d} " + "A" * 8000 + "\n"
+    if shape == "hosts":
+        sub = ("www", "api", "dev", "stage", "cdn", "mail")[i % 6]
+        host = f"{sub}-{i}.{domain}"
+        return (host.upper() if i % 7 == 0 else host) + ("." if i % 11 == 0 else "") + "\n"
+    if shape == "urls":
+        return f"https://{'www' if i % 3 else 'API'}.{domain}:443/path/{i % 5000}/item?id={i}&q=x\n"
+    if shape == "crawl":
+        path = "/".join(f"seg{rng.randrange(200)}" for _ in range(rng.randrange(1, 5)))
+        url = f"https://{('www', 'api', 'static', 'shop')[i % 4]}.{domain}/{path}/item{i}{rng.choice(CRAWL_EXTS)}"
+        if rng.random() < 0.45:
+            url += "?" + "&".join(f"{rng.choice(CRAWL_PARAMS)}={rng.randrange(100000)}" for _ in range(rng.randrange(1, 4)))
+        return url + "\n"
+    if shape == "ansi":
+        return f"\x1b[32m[+]\x1b[0m \x1b[1mrecon-{i:08d}.{domain}\x1b[0m [\x1b[36m200\x1b[0m]\n"
+    raise ValueError(shape)
+
+
+def binary_block(rng, size):
+    # mostly printable with newlines, plus bytes that are not valid UTF-8 and split multibyte chars
+    data = bytearray(rng.getrandbits(8) for _ in range(size))
+    for k in range(0, size, 97):
+        data[k] = 10
+    return bytes(data)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="fake tool output for benchmarks")
+    ap.add_argument("--mb", type=float, help="stop after this many megabytes")
+    ap.add_argument("--lines", type=int, help="stop after this many lines")
+    ap.add_argument("--shape", choices=SHAPES, default="text")
+    ap.add_argument("--rate", type=float, help="lines per second (slow drip); default: as fast as possible")
+    ap.add_argument("--burst", type=int, help="write this many lines, then sleep --pause")
+    ap.add_argument("--pause", type=float, default=0.1)
+    ap.add_argument("--dup", type=float, default=0.0, help="share of lines repeating an earlier one")
+    ap.add_argument("--domain", default="example.com")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--hold", type=float, default=0.0, help="sleep this long before exiting")
+    ap.add_argument("--exit", type=int, default=0, help="exit code")
+    ap.add_argument("-o", "--output", help="write to this file instead of stdout")
+    args = ap.parse_args(argv)
+    if args.mb is None and args.lines is None:
+        args.lines = 1000
+
+    rng = random.Random(args.seed)
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    limit = int(args.mb * 1024 * 1024) if args.mb is not None else None
+    sent = 0
+    i = 0
+    block = []
+    block_bytes = 0
+    start = time.monotonic()
+    # flat-out runs of the log-like shapes repeat one pre-rendered 64KB block, so the generator is not
+    # what gets measured; hosts/urls (and --dup) stay line by line for the merge benchmarks
+    cached = None
+    if args.shape == "binary":
+        cached = binary_block(rng, 64 * 1024)
+    elif args.shape in ("text", "unicode", "long", "ansi") and not (args.rate or args.burst or args.dup):
+        lines = []
+        while sum(map(len, lines)) < 64 * 1024:
+            lines.append(make_line(args.shape, len(lines), rng, args.domain, 0).encode("utf-8"))
+        cached = b"".join(lines)
+    try:
+        while (limit is None or sent < limit) and (args.lines is None or i < args.lines):
+            if cached is not None:
+                data = cached
+                i += data.count(b"\n")
+            else:
+                data = make_line(args.shape, i, rng, args.domain, args.dup).encode("utf-8")
+                i += 1
+            block.append(data)
+            block_bytes += len(data)
+            sent += len(data)
+            at_burst = args.burst and i % args.burst == 0
+            if args.rate or at_burst or block_bytes >= 64 * 1024:
+                out.write(b"".join(block))
+                block, block_bytes = [], 0
+                if args.rate or at_burst:
+                    out.flush()
+            if args.rate:
+                delay = start + i / args.rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            elif at_burst:
+                time.sleep(args.pause)
+        out.write(b"".join(block))
+        out.flush()
+    except BrokenPipeError:
+        os._exit(141)
+    if args.output:
+        out.close()
+    if args.hold:
+        time.sleep(args.hold)
+    return args.exit
+
+
+if __name__ == "__main__":
+    sys.exit(main())
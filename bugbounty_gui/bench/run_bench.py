@@ -0,0 +1,445 @@
+# run_bench.py
+# Benchmark suite for the runner, the GUI output path and merge, driven by bench/fake_tool.py.
+# Every run writes a result file (bench/results/<time>.json); results are compared with a stored
+# baseline (bench/baselines/<name>.json) and regressions beyond --threshold are flagged (exit 1).
+#
+#   python3 bench/run_bench.py --quick                       # all suites, small sizes
+#   python3 bench/run_bench.py --save-baseline default       # record the baseline on this machine
+#   python3 bench/run_bench.py --suite runner,merge          # later: compare against it
+#
+# Suites:
+#   runner   MB/s into the log for both engines, pty/pipe, decoded/raw, unicode/binary/bursty/long lines
+#   gui      MainWindow on the offscreen Qt platform: latency from runner output to the output pane
+#   memory   RSS growth of this process while one job streams for a long time into an OutputHub
+#   scaling  wall time and threads for many concurrent slow-drip jobs, both engines
+#   merge    host/url list merge speed (merge.merge_files, merge.merge_into)
+#   classify classify.py over a crawl-like URL list against one grep per pattern family (outputs compared)
+import os
+import re
+import sys
+import json
+import time
+import socket
+import shlex
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+from runner import CommandRunner  # noqa: E402
+from async_runner import AsyncCommandRunner  # noqa: E402
+from outputbuffer import OutputHub  # noqa: E402
+import merge  # noqa: E402
+import classify  # noqa: E402
+from bench.verify import check_log  # noqa: E402
+
+FAKE_TOOL = os.path.join(HERE, "fake_tool.py")
+# slow drip without a Python interpreter per job, so scaling measures the runner and not interpreter startup
+DRIP = "for i in $(seq 20); do echo drip $i; sleep 0.05; done"
+RESULTS_DIR = os.path.join(HERE, "results")
+BASELINES_DIR = os.path.join(HERE, "baselines")
+DEFAULT_THRESHOLD = 0.10
+ENGINES = {"thread": CommandRunner, "asyncio": AsyncCommandRunner}
+
+
+def fake(*args):
+    return f"{sys.executable} {FAKE_TOOL} " + " ".join(str(a) for a in args)
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def result(value, unit, better, **extra):
+    return dict(value=round(value, 3), unit=unit, better=better, **extra)
+
+
+class Bench:
+    def __init__(self, tmp, quick=False, repeat=3, log=print):
+        self.tmp = tmp
+        self.quick = quick
+        self.repeat = repeat
+        self.log = log
+        self.results = {}
+        self.errors = []  # content checks that failed; the run exits with status 1
+
+    def scale(self, full, quick):
+        return quick if self.quick else full
+
+    def record(self, name, runs):
+        # runs: result dicts from repeated measurements; the best one is kept (least noisy)
+        runs = [r for r in runs if r is not None]
+        if not runs:
+            return
+        pick = max if runs[0]["better"] == "higher" else min
+        best = pick(runs, key=lambda r: r["value"])
+        best["runs"] = [r["value"] for r in runs]
+        self.results[name] = best
+        self.log(f"  {name:<44}{best['value']:>12.3f} {best['unit']}")
+
+    def measure(self, name, fn):
+        self.record(name, [fn() for _ in range(self.repeat)])
+
+    # --- runner throughput ---
+
+    def _run_job(self, engine, cmd, use_pty, raw):
+        received = [0]
+        runner = ENGINES[engine](on_output=lambda data, job: received.__setitem__(0, received[0] + len(data)),
+                                 logs_dir=os.path.join(self.tmp, "logs"), max_workers=1, log_max_bytes=0)
+        t0 = time.perf_counter()
+        job = runner.run(cmd, use_pty=use_pty, raw=raw, tool="bench")
+        job.wait()
+        dt = time.perf_counter() - t0
+        size = os.path.getsize(job.log_path)
+        problem = check_log(job.log_path, cmd, use_pty)
+        if problem:
+            self.errors.append(f"{engine} {'pty' if use_pty else 'pipe'}{' raw' if raw else ''} `{cmd}`: {problem}")
+        os.remove(job.log_path)
+        if hasattr(runner, "close"):
+            runner.close()
+        return size, dt
+
+    def suite_runner(self):
+        mb = self.scale(200, 40)
+        cases = [
+            ("pty-unicode", fake("--mb", mb, "--shape", "unicode"), True, False),
+            ("pipe-unicode", fake("--mb", mb, "--shape", "unicode"), False, False),
+            ("pipe-raw-binary", fake("--mb", mb, "--shape", "binary"), False, True),
+            ("pipe-binary-decoded", fake("--mb", mb, "--shape", "binary"), False, False),
+            ("pipe-long-lines", fake("--mb", mb, "--shape", "long"), False, False),
+            ("pty-bursty", fake("--lines", self.scale(400000, 80000), "--burst", 20000, "--pause", 0.02), True, False),
+        ]
+        for engine in ENGINES:
+            for label, cmd, use_pty, raw in cases:
+                def one():
+                    size, dt = self._run_job(engine, cmd, use_pty, raw)
+                    return result(size / 2**20 / dt, "MB/s", "higher")
+                self.measure(f"runner/{engine}/{label}", one)
+
+    # --- GUI append latency ---
+
+    def suite_gui(self):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        try:
+            from PySide6 import QtWidgets
+        except ImportError as e:
+            self.log(f"  gui: skipped ({e})")
+            return
+        import main as gui
+        app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        cwd = os.getcwd()
+        os.chdir(self.tmp)  # the window's session writes logs/workspaces under the cwd
+        try:
+            window = gui.MainWindow()
+            window.show()
+            for label, lines, rate in (("steady", self.scale(200000, 40000), None), ("drip", self.scale(400, 100), 200)):
+                self.measure(f"gui/append-latency-p95/{label}", lambda: self._gui_latency(app, window, lines, rate, 95))
+            window.session.close()
+            window.close()
+        finally:
+            os.chdir(cwd)
+
+    def _gui_latency(self, app, window, lines, rate, pct):
+        # a producer thread feeds window.append_output like a runner thread does; each chunk carries
+        # a sequence number, and the time until _append puts it into the document is the latency
+        sent = {}
+        seen = {}
+        marker = re.compile(r"@@(\d+)@@")
+        original = window._append
+
+        def timed_append(data):
+            original(data)
+            now = time.perf_counter()
+            for m in marker.finditer(data):
+                seen.setdefault(int(m.group(1)), now)
+
+        window._append = timed_append
+        job = type("BenchJob", (), {"id": 1})()
+        per_chunk = 50 if rate is None else 1
+        chunks = lines // per_chunk
+
+        def produce():
+            for seq in range(chunks):
+                text = "".join(f"recon-{seq:08d}-{k}.example.com [200] [title]\n" for k in range(per_chunk - 1))
+                sent[seq] = time.perf_counter()
+                window.append_output(f"@@{seq}@@ {text}\n", job)
+                if rate:
+                    time.sleep(1 / rate)
+
+        t = threading.Thread(target=produce)
+        t0 = time.perf_counter()
+        t.start()
+        while t.is_alive() or (len(seen) < chunks and time.perf_counter() - t0 < 120 and window.output_hub.pending()):
+            app.processEvents()
+            time.sleep(0.001)
+        for _ in range(50):
+            app.processEvents()
+        window._append = original
+        lat = sorted((seen[s] - sent[s]) * 1000 for s in seen if s in sent)
+        if not lat:
+            return None
+        p = lat[min(len(lat) - 1, int(len(lat) * pct / 100))]
+        return result(p, "ms", "lower", delivered=len(lat), chunks=chunks)
+
+    # --- memory growth ---
+
+    def suite_memory(self):
+        mb = self.scale(1000, 150)
+        for engine in ENGINES:
+            self.measure(f"memory/{engine}/rss-growth-{mb}MB", lambda: self._memory(engine, mb))
+
+    def _memory(self, engine, mb):
+        hub = OutputHub()
+        stop = threading.Event()
+
+        def consumer():
+            # drains like the GUI timer does, 30 times a second
+            while not stop.is_set():
+                hub.drain(64 * 1024)
+                time.sleep(1 / 30)
+
+        threading.Thread(target=consumer, daemon=True).start()
+        runner = ENGINES[engine](on_output=lambda data, job: hub.push(job.id, data), logs_dir=os.path.join(self.tmp, "logs"),
+                                 max_workers=1, log_max_bytes=64 * 1024 * 1024, log_backups=1)
+        base = rss_bytes()
+        peak = base
+        job = runner.run(fake("--mb", mb, "--shape", "text"), use_pty=False, tool="bench-mem")
+        while not job.wait(0.1):
+            peak = max(peak, rss_bytes())
+        stop.set()
+        if hasattr(runner, "close"):
+            runner.close()
+        for name in os.listdir(os.path.join(self.tmp, "logs")):
+            os.remove(os.path.join(self.tmp, "logs", name))
+        return result((peak - base) / 2**20, "MB", "lower")
+
+    # --- many concurrent jobs ---
+
+    def suite_scaling(self):
+        for n in self.scale((32, 128, 512), (32, 128)):
+            for engine in ENGINES:
+                self.measure(f"scaling/{engine}/{n}-jobs-overhead", lambda: self._scaling(engine, n))
+
+    def _scaling(self, engine, n):
+        # n jobs that each drip 20 lines over ~1s; overhead is the wall time beyond that second
+        runner = ENGINES[engine](logs_dir=os.path.join(self.tmp, "logs"), max_workers=n)
+        threads = threading.active_count()
+        t0 = time.perf_counter()
+        jobs = [runner.submit(DRIP, use_pty=False, tool="bench-scale") for _ in range(n)]
+        peak_threads = threads
+        while not all(j.done for j in jobs):
+            peak_threads = max(peak_threads, threading.active_count())
+            time.sleep(0.05)
+        dt = time.perf_counter() - t0
+        failed = sum(1 for j in jobs if j.returncode)
+        if hasattr(runner, "close"):
+            runner.close()
+        for j in jobs:
+            if j.log_path and os.path.exists(j.log_path):
+                os.remove(j.log_path)
+        return result(dt - 1.0, "s", "lower", threads=peak_threads - threads, failed=failed)
+
+    # --- merge ---
+
+    def suite_merge(self):
+        lines = self.scale(500000, 100000)
+        d = os.path.join(self.tmp, "merge")
+        os.makedirs(d, exist_ok=True)
+        hosts = []
+        for k in range(3):
+            path = os.path.join(d, f"hosts{k}.txt")
+            subprocess.run([sys.executable, FAKE_TOOL, "--lines", str(lines), "--shape", "hosts", "--dup", "0.3",
+                            "--seed", str(k % 2), "-o", path], check=True)
+            hosts.append(path)
+        urls = os.path.join(d, "urls.txt")
+        subprocess.run([sys.executable, FAKE_TOOL, "--lines", str(lines), "--shape", "urls", "--dup", "0.2", "-o", urls], check=True)
+        total = lines * 3
+
+        def merge_hosts():
+            t0 = time.perf_counter()
+            merge.merge_files(hosts, os.path.join(d, "out.txt"), kind="host")
+            return result(total / (time.perf_counter() - t0) / 1e6, "Mlines/s", "higher")
+
+        def merge_hosts_spill():
+            t0 = time.perf_counter()
+            merge.merge_files(hosts, os.path.join(d, "out.txt"), kind="host", memory_limit=20000, tmpdir=d)
+            return result(total / (time.perf_counter() - t0) / 1e6, "Mlines/s", "higher")
+
+        def merge_urls():
+            t0 = time.perf_counter()
+            merge.merge_files([urls], os.path.join(d, "urls_out.txt"), kind="url")
+            return result(lines / (time.perf_counter() - t0) / 1e6, "Mlines/s", "higher")
+
+        def merge_into():
+            existing = os.path.join(d, "existing.txt")
+            merge.merge_files(hosts[:1], existing, kind="host")
+            t0 = time.perf_counter()
+            merge.merge_into(existing, hosts[1:], kind="host", new_out=os.path.join(d, "new.txt"))
+            return result(lines * 2 / (time.perf_counter() - t0) / 1e6, "Mlines/s", "higher")
+
+        self.measure("merge/hosts", merge_hosts)
+        self.measure("merge/hosts-spill-to-disk", merge_hosts_spill)
+        self.measure("merge/urls", merge_urls)
+        self.measure("merge/into-existing", merge_into)
+
+
+    # --- classify ---
+
+    def suite_classify(self):
+        lines = self.scale(1000000, 200000)
+        d = os.path.join(self.tmp, "classify")
+        os.makedirs(d, exist_ok=True)
+        urls = os.path.join(d, "allurls.txt")
+        subprocess.run([sys.executable, FAKE_TOOL, "--lines", str(lines), "--shape", "crawl", "-o", urls], check=True)
+        mb = os.path.getsize(urls) / 2**20
+        greps = grep_commands(classify.FAMILIES)
+        if shutil.which("grep") is None:
+            self.log("  grep not found, skipping classify-vs-grep")
+            return
+        times = {}
+
+        def run_classify():
+            t0 = time.perf_counter()
+            classify.classify_file(urls, os.path.join(d, "classified"))
+            times["classify"] = time.perf_counter() - t0
+            return result(mb / times["classify"], "MB/s", "higher")
+
+        def run_greps():
+            t0 = time.perf_counter()
+            for family, cmd in greps.items():
+                out = os.path.join(d, "grep", classify.output_name(family))
+                os.makedirs(os.path.dirname(out), exist_ok=True)
+                subprocess.run(f"{cmd} {shlex.quote(urls)} > {shlex.quote(out)}", shell=True, executable="/bin/bash")
+            times["grep"] = time.perf_counter() - t0
+            return result(mb / times["grep"], "MB/s", "higher")
+
+        def speedup():
+            run_classify()
+            run_greps()
+            return result(times["grep"] / times["classify"], "x", "higher", cpus=os.cpu_count())
+
+        self.measure("classify/all-families", run_classify)
+        self.measure("classify/grep-per-family", run_greps)
+        self.measure("classify/speedup-over-grep", speedup)
+        for family in greps:
+            name = classify.output_name(family)
+            with open(os.path.join(d, "classified", name), "rb") as a, open(os.path.join(d, "grep", name), "rb") as b:
+                if a.read() != b.read():
+                    self.errors.append(f"classify {family}: output differs from `{greps[family]}`")
+
+
+def grep_commands(families):
+    # family -> grep command selecting the same lines as classify.py (the catalog's greps, made exact)
+    cmds = {}
+    for family in families:
+        if family in classify.PARAMS:
+            cmd = "grep -Ei " + shlex.quote(r"[?&](" + "|".join(map(re.escape, classify.PARAMS[family])) + ")=")
+        elif family in classify.EXTENSIONS:
+            cmd = "grep -Ei " + shlex.quote(r"\.(" + "|".join(classify.EXTENSIONS[family]) + r")([?#]|$)")
+        elif family in classify.QUERY_EXTENSIONS:
+            cmd = "grep -Ei " + shlex.quote(r"\.(" + "|".join(classify.QUERY_EXTENSIONS[family]) + r")\?[^#[:space:]]*=")
+        else:
+            cmd = "grep -iF " + " ".join("-e " + shlex.quote(w) for w in classify.KEYWORDS[family])
+        cmds[family] = cmd
+    return cmds
+
+
+SUITES = ("runner", "gui", "memory", "scaling", "merge", "classify")
+
+
+def meta():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ""
+    return {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "host": socket.gethostname(), "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count(), "git": rev}
+
+
+def compare(results, baseline, threshold):
+    # rows of (name, old, new, change, flag); flag is "REGRESSION", "improved" or ""
+    rows = []
+    for name, new in sorted(results.items()):
+        old = baseline.get(name)
+        if not old or not old["value"]:
+            continue
+        change = (new["value"] - old["value"]) / abs(old["value"])
+        worse = -change if new["better"] == "higher" else change
+        flag = "REGRESSION" if worse > threshold else ("improved" if worse < -threshold else "")
+        rows.append((name, old["value"], new["value"], change, flag))
+    return rows
+
+
+def baseline_path(name):
+    return name if os.sep in name or name.endswith(".json") else os.path.join(BASELINES_DIR, f"{name}.json")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="benchmarks for runner, GUI output, memory, scaling and merge")
+    ap.add_argument("--suite", default=",".join(SUITES), help=f"comma-separated, from {', '.join(SUITES)}")
+    ap.add_argument("--quick", action="store_true", help="smaller sizes (a couple of minutes)")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per case; the best is kept")
+    ap.add_argument("--out", help="result file (default bench/results/<time>.json)")
+    ap.add_argument("--baseline", default="default", help="baseline name in bench/baselines/ or a path")
+    ap.add_argument("--save-baseline", metavar="NAME", help="store this run as a baseline")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="relative change flagged as regression")
+    args = ap.parse_args(argv)
+
+    suites = [s.strip() for s in args.suite.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        ap.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+    with tempfile.TemporaryDirectory(prefix="bbg-bench-") as tmp:
+        bench = Bench(tmp, quick=args.quick, repeat=max(1, args.repeat))
+        for name in suites:
+            print(f"[{name}]")
+            getattr(bench, f"suite_{name}")()
+    doc = {"meta": dict(meta(), quick=args.quick, repeat=args.repeat), "results": bench.results}
+
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(doc, f, indent=2)
+    print(f"results: {out}")
+    if bench.errors:
+        print(f"\n{len(bench.errors)} wrong output(s):")
+        for e in bench.errors:
+            print(f"  {e}")
+        return 1
+    if args.save_baseline:
+        path = baseline_path(args.save_baseline)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(doc, f, indent=2)
+        print(f"baseline saved: {path}")
+        return 0
+
+    path = baseline_path(args.baseline)
+    if not os.path.exists(path):
+        print(f"no baseline at {path}; store one with --save-baseline {args.baseline}")
+        return 0
+    with open(path) as f:
+        base = json.load(f)
+    if base["meta"].get("quick") != args.quick:
+        print("note: baseline and this run differ in --quick, sizes are not comparable")
+    rows = compare(bench.results, base["results"], args.threshold)
+    print(f"\ncompared with {path} ({base['meta'].get('time')}, git {base['meta'].get('git') or '?'}):")
+    for name, old, new, change, flag in rows:
+        print(f"  {name:<44}{old:>12.3f}{new:>12.3f}{change:>+9.1%}  {flag}")
+    regressions = [r for r in rows if r[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
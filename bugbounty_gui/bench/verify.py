@@ -0,0 +1,56 @@
+# verify.py
+# Content checks for the runner benchmarks: a fast log is worthless if its bytes are wrong, so each
+# job's log is compared with what the command writes when run directly. Pipe-mode logs must match
+# byte for byte; PTY logs (the terminal turns \n into \r\n) must have the same lines and NUL bytes.
+import hashlib
+import subprocess
+
+BLOCK = 1024 * 1024
+
+
+class Stats:
+    def __init__(self):
+        self.sha = hashlib.sha256()
+        self.size = 0
+        self.lines = 0
+        self.nuls = 0
+
+    def update(self, data):
+        self.sha.update(data)
+        self.size += len(data)
+        self.lines += data.count(b"\n")
+        self.nuls += data.count(b"\0")
+
+    @classmethod
+    def of_stream(cls, f):
+        st = cls()
+        for block in iter(lambda: f.read(BLOCK), b""):
+            st.update(block)
+        return st
+
+
+_expected = {}
+
+
+def expected(cmd):
+    # Stats of the command's own stdout; cached, the fake tools are deterministic
+    if cmd not in _expected:
+        p = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, executable="/bin/bash")
+        _expected[cmd] = Stats.of_stream(p.stdout)
+        p.stdout.close()
+        p.wait()
+    return _expected[cmd]
+
+
+def check_log(path, cmd, use_pty):
+    # None if the log holds what cmd writes, else a description of the difference
+    with open(path, "rb") as f:
+        got = Stats.of_stream(f)
+    want = expected(cmd)
+    if use_pty:
+        if (got.lines, got.nuls) != (want.lines, want.nuls):
+            return f"{got.lines} lines / {got.nuls} NULs in the log, command wrote {want.lines} / {want.nuls}"
+    elif got.sha.digest() != want.sha.digest():
+        return (f"log differs from command output ({got.size} bytes, {got.lines} lines, {got.nuls} NULs; "
+                f"expected {want.size}, {want.lines}, {want.nuls})")
+    return None
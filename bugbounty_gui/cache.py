@@ -0,0 +1,211 @@
+# cache.py
+# TTL result cache for passive recon commands (crt.sh, wayback, VirusTotal, OTX, urlscan ...).
+# Entries are keyed on the rendered command and the target and hold the job's output plus the files
+# it produced, so a repeat run replays instantly instead of hitting rate-limited APIs again.
+# TTLs are per catalog category; total size is bounded with least-recently-used eviction.
+import os
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTLS = {
+    "Recon - Public Sources": 24 * 3600,
+    "IP Harvesting": 24 * 3600,
+    "ASN & IP Discovery": 7 * 24 * 3600,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    category TEXT,
+    command TEXT NOT NULL,
+    target TEXT,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL,
+    returncode INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+def cache_key(command, target):
+    return hashlib.sha256(f"{command}\0{target or ''}".encode("utf-8")).hexdigest()
+
+
+class CacheEntry:
+    def __init__(self, cache, key, path, returncode=0):
+        self.cache = cache
+        self.key = key
+        self.path = path
+        self.returncode = returncode
+
+    @property
+    def output_path(self):
+        return os.path.join(self.path, "output")
+
+    @property
+    def files_dir(self):
+        return os.path.join(self.path, "files")
+
+    def iter_output(self, chunk=256 * 1024):
+        with open(self.output_path, "rb") as f:
+            for block in iter(lambda: f.read(chunk), b""):
+                yield block
+
+    def restore_files(self, dest):
+        # copy cached artifacts into dest; returns their relative paths
+        restored = []
+        for dirpath, _, files in os.walk(self.files_dir):
+            for name in files:
+                src = os.path.join(dirpath, name)
+                rel = os.path.relpath(src, self.files_dir)
+                dst = os.path.join(dest, rel)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                shutil.copyfile(src, dst)
+                restored.append(rel)
+        return restored
+
+
+class CacheWriter:
+    # Wraps a job's log: everything written to the log is also captured for the cache entry.
+    def __init__(self, log, cache, key, path):
+        self.log = log
+        self.cache = cache
+        self.key = key
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._fh = open(os.path.join(path, "output"), "wb", buffering=64 * 1024)
+        self.size = 0
+
+    def write(self, data):
+        self.log.write(data)
+        if isinstance(data, str):
+            data = data.encode("utf-8", errors="replace")
+        self._fh.write(data)
+        self.size += len(data)
+
+    def __getattr__(self, name):
+        return getattr(self.log, name)
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.close()
+        self.log.close()
+
+    def commit(self, category, command, target, returncode, files_root=None, files=()):
+        if not self._fh.closed:
+            self._fh.close()
+        size = self.size
+        for rel in files:
+            src = os.path.join(files_root, rel)
+            if not os.path.isfile(src):
+                continue
+            dst = os.path.join(self.path, "files", rel)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copyfile(src, dst)
+            size += os.path.getsize(dst)
+        self.cache._commit(self.key, self.path, category, command, target, returncode, size)
+
+    def discard(self):
+        if not self._fh.closed:
+            self._fh.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class ResultCache:
+    def __init__(self, root, ttls=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def enabled_for(self, category):
+        return bool(self.ttls.get(category))
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, "objects", key[:2], key)
+
+    def get(self, command, target, category):
+        # fresh entry or None; expired entries are dropped
+        ttl = self.ttls.get(category)
+        if not ttl:
+            return None
+        key = cache_key(command, target)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT created, returncode FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            created, rc = row
+            path = self._entry_dir(key)
+            if now - created > ttl or not os.path.exists(os.path.join(path, "output")):
+                self._drop(key)
+                return None
+            with self._db:
+                self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return CacheEntry(self, key, path, rc)
+
+    def writer(self, log, command, target):
+        key = cache_key(command, target)
+        # write next to the final location and swap in on commit
+        tmp = self._entry_dir(key) + f".tmp{threading.get_ident()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        return CacheWriter(log, self, key, tmp)
+
+    def _commit(self, key, tmp_path, category, command, target, returncode, size):
+        final = self._entry_dir(key)
+        now = time.time()
+        with self._lock:
+            shutil.rmtree(final, ignore_errors=True)
+            os.replace(tmp_path, final)
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 (key, category, command, target, now, now, size, returncode))
+            self._evict()
+
+    def _drop(self, key):
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+        with self._db:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            self._drop(key)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def invalidate(self, command, target):
+        with self._lock:
+            self._drop(cache_key(command, target))
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for key, category, created in self._db.execute("SELECT key, category, created FROM entries").fetchall():
+                ttl = self.ttls.get(category)
+                if not ttl or now - created > ttl:
+                    self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            n, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": n, "bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        with self._lock:
+            for (key,) in self._db.execute("SELECT key FROM entries").fetchall():
+                self._drop(key)
@@ -0,0 +1,362 @@
+# classify.py
+# Sorts a URL list into pattern families (gf sqli, the ssrf and open-redirect parameter greps, sensitive
+# extensions, secret keywords ...) in one run that reads the list once and writes one file per family.
+# The regexes are built from the listed parameter names, extensions and keywords, so only wanted hits
+# reach Python: a "?name=" and a "&name=" regex, one for the path extension, and one per first character
+# of the secret keywords (they may sit inside a parameter name). Big files are split at line boundaries
+# and scanned by one worker process per core, each over its own range of the memory-mapped file.
+# Python's re is slower per byte than grep: on one core a run takes about twice as long as one grep per
+# family (classify suite of bench/run_bench.py), so it only pays off with several cores, never for one family.
+#
+#   python3 classify.py allurls.txt -o classified            # classified/sqli.txt, ssrf.txt, ...
+#   builtin:classify final.txt --only redirect --print       # as a catalog command
+import os
+import re
+import sys
+import json
+import mmap
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from runner import register_builtin
+
+# family -> query parameter names (matched case-insensitively, as ?name= or &name=)
+PARAMS = {
+    "sqli": ("id", "select", "report", "role", "update", "query", "user", "name", "sort", "where", "search", "params",
+             "process", "row", "view", "table", "from", "sel", "results", "sleep", "fetch", "order", "keyword",
+             "column", "field", "delete", "string", "number", "filter"),
+    "ssrf": ("url", "uri", "redirect", "next", "data", "path", "dest", "proxy", "file", "img", "out", "continue",
+             "reference", "site", "html", "val", "validate", "domain", "callback", "return", "page", "feed", "host",
+             "port", "to", "window", "dir", "show", "navigation", "open"),
+    "redirect": ("returnurl", "continue", "dest", "destination", "forward", "go", "goto", "to", "login_url", "logout",
+                 "next", "next_page", "out", "g", "redir", "redirect", "redirect_to", "redirect_uri", "redirect_url",
+                 "return", "returnto", "return_path", "return_to", "return_url", "rurl", "site", "target", "uri",
+                 "url", "qurl", "rit_url", "jump", "jump_url", "originurl", "origin", "desturl", "u", "location",
+                 "forward_to", "forward_url", "destination_url", "jump_to", "go_to", "goto_url", "target_url",
+                 "redirect_link"),
+    "lfi": ("file", "document", "folder", "root", "path", "pg", "style", "pdf", "template", "php_path", "doc", "page",
+            "name", "cat", "dir", "action", "board", "date", "detail", "download", "prefix", "include", "inc",
+            "locate", "show", "site", "type", "view", "content", "layout", "mod", "conf", "url"),
+    "xss": ("q", "s", "search", "id", "lang", "keyword", "query", "page", "keywords", "year", "view", "email", "type",
+            "name", "p", "month", "image", "list_type", "url", "terms", "categoryid", "key", "l", "begindate",
+            "enddate"),
+}
+# family -> path extensions (the last one before ?/#)
+EXTENSIONS = {
+    "sensitive": ("xls", "xml", "xlsx", "json", "pdf", "sql", "doc", "docx", "pptx", "txt", "zip", "tgz", "bak", "7z",
+                  "rar", "log", "cache", "secret", "db", "backup", "yml", "gz", "config", "csv", "yaml", "md", "md5"),
+    "js": ("js",),
+}
+# family -> path extensions that count only when the URL also has a query parameter
+QUERY_EXTENSIONS = {
+    "endpoints": ("php", "asp", "aspx", "jsp", "jspx"),
+}
+# family -> substrings anywhere in the URL (case-insensitive)
+KEYWORDS = {
+    "secrets": ("aws_access_key", "aws_secret_key", "api key", "api_key", "apikey", "passwd", "pwd", "heroku", "slack",
+                "firebase", "swagger", "aws key", "password", "jdbc", "secret", "gcp", "htaccess", ".env", "ssh key",
+                ".git", "access key", "access_key", "secret token", "oauth_token", "token="),
+}
+FAMILIES = sorted(set(PARAMS) | set(EXTENSIONS) | set(QUERY_EXTENSIONS) | set(KEYWORDS))
+# output file per family; the catalog's "qsreplace evil" step reads redirect_params.txt
+OUTPUT_NAMES = {"redirect": "redirect_params.txt"}
+
+MIN_PARALLEL_BYTES = 1 * 1024 * 1024  # smaller files are not worth starting workers for
+BLOCK_SIZE = 8 * 1024 * 1024  # bytes lowercased and scanned at a time
+
+
+def output_name(family):
+    return OUTPUT_NAMES.get(family, f"{family}.txt")
+
+
+def alternation(words):
+    # regex (bytes) matching any of words, as a trie: at each position the engine follows one branch per
+    # character instead of trying every word, which is what makes a long parameter list cheap
+    trie = {}
+    for w in words:
+        node = trie
+        w = w.decode("latin-1")
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = None
+
+    def build(node):
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:
+            body = body + "?" if len(alts) == 1 and len(alts[0]) == 1 else "(?:" + body + ")?"
+        return body
+
+    return build(trie).encode("latin-1")
+
+
+class Classifier:
+    # Scans a lowercased copy of the input block by block with regexes built from the listed names, so
+    # only wanted parameters, extensions and keywords ever reach Python. Every regex starts with a literal
+    # ("?", "&", "." or a keyword's first character): re finds those with a plain byte search, where a
+    # leading character class ([?&]) would be tried at every position.
+    def __init__(self, families=None):
+        self.families = list(families or FAMILIES)
+        unknown = set(self.families) - set(FAMILIES)
+        if unknown:
+            raise ValueError(f"unknown famil{'ies' if len(unknown) > 1 else 'y'}: {', '.join(sorted(unknown))}")
+        bit = {f: 1 << i for i, f in enumerate(self.families)}
+        params = self._table(PARAMS, bit)
+        exts = self._table(EXTENSIONS, bit)
+        query_exts = self._table(QUERY_EXTENSIONS, bit)
+        keywords = self._table(KEYWORDS, bit)
+        # keywords match anywhere, also inside a parameter name ("&token=", "?password="), so they get
+        # regexes of their own: one per first character, so that each still starts with a literal
+        by_first = {}
+        for word, mask in keywords.items():
+            by_first.setdefault(word[:1], {})[word[1:]] = mask
+        # (regex, [None, table of group 1, table of group 2 ...]): a hit's mask is the matched group's
+        # table entry for the text it captured
+        self.passes = []
+        if params:
+            names = alternation(params)
+            for lead in (rb"\?", rb"&"):
+                self.passes.append((re.compile(lead + rb"(" + names + rb")="), [None, params]))
+        dotted = by_first.pop(b".", None)
+        parts, tables = [], [None]
+        if exts:
+            # the last extension of the path, before ?/# or the line end
+            parts.append(rb"(" + alternation(exts) + rb")(?=[?#\r\n]|$)")
+            tables.append(exts)
+        if query_exts:
+            # only with a query parameter after it
+            parts.append(rb"(" + alternation(query_exts) + rb")(?=\?[^#\s]*=)")
+            tables.append(query_exts)
+        if dotted:
+            # ".env", ".git": anywhere, like the other keywords, but they share the "." scan
+            parts.append(rb"(" + alternation(dotted) + rb")")
+            tables.append(dotted)
+        if parts:
+            self.passes.append((re.compile(rb"\.(?:" + b"|".join(parts) + rb")", re.MULTILINE), tables))
+        for first, table in sorted(by_first.items()):
+            self.passes.append((re.compile(re.escape(first) + rb"(" + alternation(table) + rb")"), [None, table]))
+
+    def _table(self, spec, bit):
+        # lowercased name (bytes) -> bitmask of the selected families that list it
+        table = {}
+        for family, names in spec.items():
+            if family in bit:
+                for name in names:
+                    key = name.lower().encode()
+                    table[key] = table.get(key, 0) | bit[family]
+        return table
+
+    def scan(self, data, start, end, emit):
+        # classify the lines in data[start:end] (start at a line start, end after a newline or at EOF);
+        # emit(mask, line) for every line in at least one family, in input order. Returns the number of lines.
+        lines = 0
+        pos = start
+        while pos < end:
+            stop = min(pos + BLOCK_SIZE, end)
+            if stop < end:
+                nl = data.rfind(b"\n", pos, stop)
+                stop = nl + 1 if nl >= 0 else (data.find(b"\n", stop, end) + 1 or end)
+            block = data[pos:stop]
+            lines += block.count(b"\n")
+            if self.passes:
+                self._scan_block(block, emit)
+            pos = stop
+        if end > start and data[end - 1:end] != b"\n":
+            lines += 1
+        return lines
+
+    def _scan_block(self, block, emit):
+        low = block.lower()
+        hits = {}  # line start -> mask
+        get = hits.get
+        rfind = low.rfind
+        for rx, tables in self.passes:
+            for m in rx.finditer(low):
+                k = m.lastindex
+                mask = tables[k][m.group(k)]
+                ls = rfind(b"\n", 0, m.start()) + 1
+                hits[ls] = get(ls, 0) | mask
+        find = low.find
+        for ls in sorted(hits):
+            le = find(b"\n", ls) + 1
+            emit(hits[ls], block[ls:le] if le else block[ls:] + b"\n")
+
+
+def _scan_to_files(path, start, end, families, outdir, suffix=""):
+    # one range of the file -> outdir/<family output><suffix>; returns (lines, {family: matches})
+    clf = Classifier(families)
+    outs = {}
+    by_mask = {}  # mask -> [write of each family file]
+    mask_counts = {}
+
+    def writer(family):
+        fh = outs.get(family)
+        if fh is None:
+            fh = outs[family] = open(os.path.join(outdir, output_name(family) + suffix), "wb", buffering=1024 * 1024)
+        return fh.write
+
+    def emit(mask, line):
+        writes = by_mask.get(mask)
+        if writes is None:
+            writes = by_mask[mask] = [writer(f) for i, f in enumerate(clf.families) if mask & (1 << i)]
+            mask_counts[mask] = 0
+        mask_counts[mask] += 1
+        for write in writes:
+            write(line)
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        lines = 0
+        if size:
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                lines = clf.scan(mm, start, min(end, size), emit)
+    for fh in outs.values():
+        fh.close()
+    counts = {f: sum(n for mask, n in mask_counts.items() if mask & (1 << i)) for i, f in enumerate(clf.families)}
+    return lines, counts
+
+
+def split_ranges(path, parts):
+    # byte ranges of about equal size, each starting at a line start
+    size = os.path.getsize(path)
+    if parts <= 1 or size < MIN_PARALLEL_BYTES:
+        return [(0, size)]
+    bounds = [0]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+        for k in range(1, parts):
+            nl = mm.find(b"\n", max(bounds[-1], size * k // parts))
+            if nl < 0:
+                break
+            if nl + 1 > bounds[-1]:
+                bounds.append(nl + 1)
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def classify_file(path, outdir, families=None, workers=None, should_stop=None):
+    # -> (lines, {family: matching lines}); one output file per family in outdir, in input order
+    families = Classifier(families).families
+    os.makedirs(outdir, exist_ok=True)
+    ranges = split_ranges(path, workers or os.cpu_count() or 1)
+    if len(ranges) == 1:
+        lines, counts = _scan_to_files(path, 0, ranges[0][1], families, outdir)
+        for family in families:
+            if not counts[family]:
+                # an empty family still gets its (empty) file, replacing any stale one
+                open(os.path.join(outdir, output_name(family)), "wb").close()
+        return lines, counts
+    tmp = tempfile.mkdtemp(prefix=".classify-", dir=outdir)
+    try:
+        procs = []
+        for k, (a, b) in enumerate(ranges):
+            procs.append(subprocess.Popen([sys.executable, os.path.abspath(__file__), "--worker", f"{a}:{b}:{k}",
+                                           "--only", ",".join(families), "-o", tmp, path], stdout=subprocess.PIPE))
+        results = []
+        for p in procs:
+            while p.poll() is None:
+                if should_stop and should_stop():
+                    for q in procs:
+                        q.kill()
+                    raise InterruptedError("stopped")
+                time.sleep(0.05)
+            out = p.stdout.read()
+            p.stdout.close()
+            if p.returncode:
+                raise RuntimeError(f"classify worker exited with code {p.returncode}")
+            results.append(json.loads(out))
+        lines = sum(r["lines"] for r in results)
+        counts = {f: sum(r["counts"][f] for r in results) for f in families}
+        for family in families:
+            # parts in range order keep the input order
+            with open(os.path.join(outdir, output_name(family)), "wb") as out:
+                if not counts[family]:
+                    continue
+                for k in range(len(ranges)):
+                    part = os.path.join(tmp, f"{output_name(family)}.{k}")
+                    if os.path.exists(part):
+                        with open(part, "rb") as f:
+                            shutil.copyfileobj(f, out, 1024 * 1024)
+        return lines, counts
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _parser(prog=None):
+    ap = argparse.ArgumentParser(prog=prog, description="classify a URL list into pattern families in one pass")
+    ap.add_argument("input")
+    ap.add_argument("-o", "--outdir", default="classified", help="directory for <family>.txt files")
+    ap.add_argument("--only", help=f"comma-separated families (default all: {', '.join(FAMILIES)})")
+    ap.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    ap.add_argument("--print", action="store_true", help="also print the matching lines, prefixed by family")
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    return ap
+
+
+def _families(args):
+    return [f.strip() for f in args.only.split(",") if f.strip()] if args.only else None
+
+
+def _report(write, lines, counts, outdir, elapsed):
+    for family, n in counts.items():
+        write(f"[classify] {family:<10} {n:>10}  {os.path.join(outdir, output_name(family))}\n")
+    write(f"[classify] {lines} lines in {elapsed:.1f}s\n")
+
+
+def _print_matches(write, outdir, counts):
+    for family, n in counts.items():
+        if n:
+            with open(os.path.join(outdir, output_name(family)), encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    write(f"{family}\t{line}")
+
+
+def builtin_classify(argv, write, should_stop, cwd=None):
+    ap = _parser("builtin:classify")
+    try:
+        args = ap.parse_args(argv)
+    except SystemExit:
+        write(f"[classify] usage: {ap.format_usage()}")
+        return 2
+    path = args.input if os.path.isabs(args.input) or not cwd else os.path.join(cwd, args.input)
+    outdir = args.outdir if os.path.isabs(args.outdir) or not cwd else os.path.join(cwd, args.outdir)
+    t0 = time.monotonic()
+    try:
+        lines, counts = classify_file(path, outdir, _families(args), args.workers, should_stop)
+    except (OSError, ValueError, RuntimeError) as e:
+        write(f"[classify] error: {e}\n")
+        return 1
+    if args.print:
+        _print_matches(write, outdir, counts)
+    _report(write, lines, counts, args.outdir, time.monotonic() - t0)
+    return 0
+
+
+register_builtin("classify", builtin_classify)
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    if args.worker:
+        start, end, k = (int(x) for x in args.worker.split(":"))
+        lines, counts = _scan_to_files(args.input, start, end, _families(args), args.outdir, f".{k}")
+        print(json.dumps({"lines": lines, "counts": counts}))
+        return 0
+    t0 = time.monotonic()
+    try:
+        lines, counts = classify_file(args.input, args.outdir, _families(args), args.workers)
+    except ValueError as e:
+        print(f"[classify] {e}", file=sys.stderr)
+        return 2
+    if args.print:
+        _print_matches(sys.stdout.write, args.outdir, counts)
+    _report(sys.stdout.write, lines, counts, args.outdir, time.monotonic() - t0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,558 @@
+# cli.py
+# Headless command line for cron jobs and VPS boxes: list/render catalog commands, run commands and
+# pipelines (locally or through the daemon), stream their output and report status. Never imports Qt;
+# heavier modules are only imported by the subcommands that need them.
+#
+#   python -m bugbounty_gui list --search subfinder
+#   python -m bugbounty_gui run "Recon - Subdomain Enumeration" "subfinder (all recursive)" -t example.com
+#   python -m bugbounty_gui run -c "nuclei -u https://{target}" -t @scope.txt --daemon
+#   python -m bugbounty_gui pipeline recon -t example.com,example.org
+#   python -m bugbounty_gui daemon &   then   status / stop 12 / new-run
+#   python -m bugbounty_gui coordinator &   workers: worker --coordinator http://HOST:8650   then   dist-run ... / dist-status
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+
+from commands import COMMANDS, render_command, list_command, parse_targets
+
+
+class _Printer:
+    # writes job output to stdout; with several jobs each line is prefixed with its job id
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.prefix = False
+        self._partial = {}
+        self._lock = threading.Lock()
+
+    def output(self, job_id, text):
+        with self._lock:
+            if not self.prefix or not job_id:
+                self.out.write(text)
+            else:
+                text = self._partial.pop(job_id, "") + text
+                lines = text.split("\n")
+                if lines[-1]:
+                    self._partial[job_id] = lines[-1]
+                for line in lines[:-1]:
+                    self.out.write(f"[{job_id}] {line}\n")
+            self.out.flush()
+
+    def finished(self, job_id, returncode):
+        with self._lock:
+            rest = self._partial.pop(job_id, "")
+            if rest:
+                self.out.write(f"[{job_id}] {rest}\n")
+        self.note(f"[job {job_id} exited with code {returncode}]")
+
+    def note(self, text):
+        with self._lock:
+            sys.stderr.write(text.rstrip("\n") + "\n")
+            sys.stderr.flush()
+
+
+def _extras(args):
+    if not args.extras:
+        return {}
+    try:
+        return json.loads(args.extras)
+    except ValueError as e:
+        raise SystemExit(f"--extras must be JSON: {e}")
+
+
+def _targets(args):
+    try:
+        return parse_targets(args.targets or "")
+    except OSError as e:
+        raise SystemExit(f"could not read targets: {e}")
+
+
+def _template(args):
+    if args.cmd:
+        return args.cmd, None, None
+    if not args.category or not args.tool:
+        raise SystemExit("give CATEGORY TOOL or -c/--cmd")
+    try:
+        return COMMANDS[args.category][args.tool], args.category, args.tool
+    except KeyError:
+        raise SystemExit(f"no command {args.tool!r} in category {args.category!r} (see `list`)")
+
+
+def _client(args):
+    from daemon import DaemonClient
+    return DaemonClient(args.socket)
+
+
+def _follow(events, printer):
+    rc = 0
+    for ev in events:
+        kind = ev.get("ev")
+        if kind == "output":
+            printer.output(ev["job"], ev["data"])
+        elif kind == "finished":
+            printer.finished(ev["job"], ev["returncode"])
+        elif kind == "pipeline":
+            printer.note(f"[pipeline {ev['label']}] {ev['stage']}: {ev['state']} {ev['message']}")
+        elif kind == "dropped":
+            printer.note(f"[daemon] {ev['chars']} chars of output dropped")
+        elif kind == "end":
+            rc = ev.get("returncode") or 0
+    return rc
+
+
+def _local_session(args, printer):
+    from session import Session, load_config
+    config = load_config(args.config)
+    return Session(config, on_output=lambda data, job: printer.output(job.id if job else 0, data),
+                   on_finished=lambda rc, job: printer.finished(job.id if job else 0, rc))
+
+
+def _wait(session, is_done, cancel):
+    # wait for the work to finish; the first Ctrl-C/SIGTERM stops it, the second exits immediately
+    stop = threading.Event()
+
+    def interrupt(*a):
+        if stop.is_set():
+            os._exit(130)
+        stop.set()
+        cancel()
+
+    signal.signal(signal.SIGINT, interrupt)
+    signal.signal(signal.SIGTERM, interrupt)
+    while not is_done():
+        stop.wait(0.2)
+    return 130 if stop.is_set() else None
+
+
+# --- subcommands ---
+
+def cmd_list(args):
+    for cat in sorted(COMMANDS):
+        if args.category and args.category != cat:
+            continue
+        for tool, template in sorted(COMMANDS[cat].items()):
+            if args.search and args.search.lower() not in f"{cat} {tool} {template}".lower():
+                continue
+            if args.json:
+                print(json.dumps({"category": cat, "tool": tool, "command": template, "list_input": bool(list_command(template))}))
+            else:
+                print(f"{cat}\t{tool}\t{template}")
+    return 0
+
+
+def cmd_render(args):
+    template, _, _ = _template(args)
+    targets = _targets(args)
+    extras = _extras(args)
+    lst = list_command(template) if len(targets) > 1 and not args.no_batch else None
+    if lst:
+        print(render_command(lst, None, extras))
+    elif "{target}" in template and targets:
+        for t in targets:
+            print(render_command(template, t, extras))
+    else:
+        print(render_command(template, None, extras))
+    return 0
+
+
+def cmd_run(args):
+    template, category, tool = _template(args)
+    targets = _targets(args)
+    if "{target}" in template and not targets:
+        raise SystemExit("this command needs -t/--targets")
+    extras = _extras(args)
+    printer = _Printer()
+    if args.daemon:
+        client = _client(args)
+        reply, events = client.stream("run", template=template, targets=targets, extras=extras, use_pty=args.pty,
+                                      category=category, tool=tool or "command", refresh=args.refresh,
+                                      batch=not args.no_batch, delta=args.delta, follow=not args.detach)
+        printer.prefix = len(reply["jobs"]) > 1
+        printer.note(f"[daemon] queued job(s) {', '.join(map(str, reply['jobs']))}")
+        return _follow(events, printer) if not args.detach else 0
+    session = _local_session(args, printer)
+    try:
+        printer.prefix = session.plan(template, targets, not args.no_batch)[0] != "single"
+        jobs = session.submit(template, targets, extras=extras, use_pty=args.pty, tool=tool or "command",
+                              category=category, refresh=args.refresh, batch=not args.no_batch, delta=args.delta,
+                              note=printer.note)
+        interrupted = _wait(session, lambda: all(j.done for j in jobs), session.stop)
+    finally:
+        session.close()
+    if interrupted:
+        return interrupted
+    failed = [j for j in jobs if j.returncode]
+    if len(jobs) == 1:
+        return jobs[0].returncode or 0
+    return 1 if failed else 0
+
+
+def cmd_pipeline(args):
+    from pipeline import PIPELINES
+    if args.name not in PIPELINES:
+        raise SystemExit(f"unknown pipeline {args.name!r}; available: {', '.join(sorted(PIPELINES))}")
+    targets = _targets(args)
+    if not targets:
+        raise SystemExit("pipelines need -t/--targets")
+    extras = _extras(args)
+    printer = _Printer()
+    printer.prefix = True
+    if args.daemon:
+        reply, events = _client(args).stream("pipeline", name=args.name, targets=targets, extras=extras,
+                                             force=args.force, follow=not args.detach)
+        for err in reply.get("errors", []):
+            printer.note(err)
+        return _follow(events, printer) if not args.detach else 0
+    session = _local_session(args, printer)
+    try:
+        runs = session.start_pipeline(args.name, targets, extras=extras, force=args.force, note=printer.note,
+                                      on_event=lambda label, stage, state, msg: printer.note(f"[pipeline {label}] {stage}: {state} {msg}"))
+
+        def cancel():
+            for r in runs:
+                r.cancel()
+
+        interrupted = _wait(session, lambda: all(r.wait(0) for r in runs), cancel)
+    finally:
+        session.close()
+    if interrupted:
+        return interrupted
+    return 0 if runs and len(runs) == len(targets) and all(r.ok for r in runs) else 1
+
+
+def cmd_resume(args):
+    printer = _Printer()
+    printer.prefix = True
+    session = _local_session(args, printer)
+    try:
+        jobs = session.resume()
+        session.journal.compact()
+        printer.note(f"[journal] resumed {len(jobs)} interrupted job(s)")
+        interrupted = _wait(session, lambda: all(j.done for j in jobs), session.stop)
+    finally:
+        session.close()
+    return interrupted or (1 if any(j.returncode for j in jobs) else 0)
+
+
+def cmd_daemon(args):
+    from session import load_config
+    from daemon import Daemon, DaemonError
+    d = Daemon(load_config(args.config), args.socket)
+    sys.stderr.write(f"[daemon] listening on {d.path} (pid {os.getpid()})\n")
+    try:
+        d.serve(resume=args.resume)
+    except DaemonError as e:
+        raise SystemExit(str(e))
+    return 0
+
+
+def cmd_status(args):
+    reply = _client(args).call("status", all=args.all)
+    if args.json:
+        print(json.dumps(reply, indent=2))
+        return 0
+    print(f"run {reply['run_id']}: {reply['active']} job(s) queued/running")
+    res = reply.get("resources")
+    if res and res["enabled"]:
+        u, b = res["usage"], res["budget"]
+        print(f"resources: cpu {u['cpu']:.1f}/{b['cpu']:.0f} cores, rss {u['rss'] / 2**20:.0f}/{b['rss'] / 2**20:.0f} MB, "
+              f"fds {u['fds']}/{b['fds']:.0f}" + (f", paused {', '.join(map(str, res['paused']))}" if res["paused"] else ""))
+    for j in reply["jobs"]:
+        rc = "" if j["returncode"] is None else f" rc={j['returncode']}"
+        state = "paused" if j.get("paused") else j["state"]
+        usage = j.get("usage") if not j["returncode"] and not j["finished"] else None
+        use = f"  cpu {usage['cpu']:.1f} rss {usage['rss'] / 2**20:.0f}M fds {usage['fds']}" if usage else ""
+        print(f"{j['id']:>5}  {state:<9}{rc:<7} {j['target'] or '-':<30} {j['tool'] or '-'}{use}")
+    return 0
+
+
+def cmd_metrics(args):
+    import metrics
+    from session import load_config
+    config = load_config(args.config)
+    path = args.file or config.get("metrics_path") or os.path.join(
+        config.get("workspaces_dir") or os.path.join(os.getcwd(), "workspaces"), "metrics.jsonl")
+    records = metrics.load(path)
+    if args.jobs:
+        rows = sorted(records, key=lambda m: m.get(args.sort) or 0, reverse=True)[:args.jobs]
+        if args.json:
+            print(json.dumps(rows, indent=2))
+            return 0
+        print(f"{'job':>6} {'wall s':>9} {'cpu s':>8} {'rss MB':>7} {'lines':>9} {'lines/s':>9} {'ttfo s':>7}  tool / target")
+        for m in rows:
+            ttfo = "-" if m.get("ttfo_s") is None else f"{m['ttfo_s']:.2f}"
+            print(f"{m['id']:>6} {m['wall_s']:>9.1f} {m.get('cpu_s') or 0:>8.1f} {(m.get('max_rss_kb') or 0) / 1024:>7.0f} "
+                  f"{m['lines_out']:>9} {m['lines_per_s']:>9.0f} {ttfo:>7}  {m['tool']} / {m.get('target') or '-'}")
+        return 0
+    groups = metrics.summarize(records, args.by)
+    if args.json:
+        print(json.dumps(groups, indent=2))
+        return 0
+    total = sum(g["wall_s"] for g in groups) or 1
+    print(f"{len(records)} job(s) in {path}")
+    print(f"{'jobs':>6} {'failed':>6} {'wall s':>10} {'share':>6} {'cpu s':>9} {'rss MB':>7} {'lines':>10}  {args.by}")
+    for g in groups:
+        print(f"{g['jobs']:>6} {g['failed']:>6} {g['wall_s']:>10.1f} {g['wall_s'] / total:>6.0%} {g['cpu_s']:>9.1f} "
+              f"{g['max_rss_kb'] / 1024:>7.0f} {g['lines_out']:>10}  {g[args.by]}")
+    return 0
+
+
+def cmd_stop(args):
+    reply = _client(args).call("stop", jobs=args.job, wait=args.wait)
+    if args.wait and not reply.get("clean"):
+        print("some processes of the stopped jobs are still running (see the job output)", file=sys.stderr)
+        return 1
+    return 0 if reply["ok"] else 1
+
+
+def cmd_new_run(args):
+    print(_client(args).call("new_run")["run_id"])
+    return 0
+
+
+def cmd_shutdown(args):
+    _client(args).call("shutdown")
+    return 0
+
+
+def _coordinator(args):
+    from distributed import Api
+    return Api(args.coordinator, args.token)
+
+
+def _dist_follow(api, ids, detach):
+    from distributed import follow, FINISHED
+    printer = _Printer()
+    printer.prefix = len(ids) > 1
+    printer.note(f"[coordinator] queued job(s) {', '.join(map(str, ids))}")
+    if detach:
+        return 0
+    states = follow(api, ids, printer.output, printer.note)
+    for jid, state in states.items():
+        printer.note(f"[job {jid} {state}]")
+    return 0 if all(s == FINISHED for s in states.values()) else 1
+
+
+def cmd_coordinator(args):
+    from distributed import Coordinator, DistError, serve_coordinator, DEFAULT_PORT
+    from session import load_config
+    config = load_config(args.config)
+    host, _, port = args.listen.rpartition(":")
+    root = args.root or os.path.join(config.get("workspaces_dir") or os.path.join(os.getcwd(), "workspaces"), "_distributed")
+    coord = Coordinator(root, lease_ttl=args.lease_ttl, max_attempts=args.max_attempts,
+                        batch_size=config.get("batch_size"), token=args.token)
+    try:
+        server = serve_coordinator(coord, host or "127.0.0.1", int(port or DEFAULT_PORT))
+    except (OSError, DistError):
+        coord.close()
+        raise
+    signal.signal(signal.SIGTERM, lambda *a: threading.Thread(target=server.shutdown, daemon=True).start())
+    sys.stderr.write(f"[coordinator] listening on http://{server.server_address[0]}:{server.server_address[1]}, jobs in {root}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        coord.close()
+    return 0
+
+
+def cmd_worker(args):
+    from distributed import Worker
+    worker = Worker(args.coordinator, name=args.name, capacity=args.capacity, root=args.root, token=args.token,
+                    use_pty=args.pty)
+    signal.signal(signal.SIGTERM, lambda *a: worker.stop())
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+    worker.wait_stopped()
+    return 0
+
+
+def cmd_dist_run(args):
+    template, category, tool = _template(args)
+    targets = _targets(args)
+    if "{target}" in template and not targets:
+        raise SystemExit("this command needs -t/--targets")
+    api = _coordinator(args)
+    ids = api.json("POST", "/submit", {"template": template, "targets": targets, "extras": _extras(args),
+                                       "batch": not args.no_batch, "tool": tool or "command"})["jobs"]
+    return _dist_follow(api, ids, args.detach)
+
+
+def cmd_dist_pipeline(args):
+    targets = _targets(args)
+    if not targets:
+        raise SystemExit("pipelines need -t/--targets")
+    api = _coordinator(args)
+    ids = api.json("POST", "/submit", {"pipeline": args.name, "targets": targets, "extras": _extras(args),
+                                       "force": args.force})["jobs"]
+    return _dist_follow(api, ids, args.detach)
+
+
+def cmd_dist_status(args):
+    reply = _coordinator(args).json("GET", "/jobs")
+    if args.json:
+        print(json.dumps(reply, indent=2))
+        return 0
+    for name, age in sorted(reply["workers"].items()):
+        print(f"worker {name}: seen {age}s ago")
+    for j in reply["jobs"]:
+        rc = "" if j["returncode"] is None else f" rc={j['returncode']}"
+        what = j["target"] or (f"{j['shard']} targets" if j["shard"] else "-")
+        print(f"{j['id']:>5}  {j['state']:<9}{rc:<7} {what:<30} {j['tool'] or '-':<20} {j['worker'] or ''}"
+              + (f"  (attempt {j['attempts']})" if j["attempts"] > 1 else ""))
+    return 0
+
+
+def cmd_dist_stop(args):
+    api = _coordinator(args)
+    ids = [args.job] if args.job else [j["id"] for j in api.json("GET", "/jobs")["jobs"]]
+    ok = [api.json("POST", f"/jobs/{jid}/cancel")["ok"] for jid in ids]
+    return 0 if any(ok) or not ids else 1
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="python -m bugbounty_gui", description="headless recon runner (no GUI)")
+    ap.add_argument("--config", default="config.json", help="config file (same keys as the GUI)")
+    ap.add_argument("--socket", help="daemon socket (default $XDG_RUNTIME_DIR/bugbounty_gui/daemon.sock)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    def with_command(p):
+        p.add_argument("category", nargs="?")
+        p.add_argument("tool", nargs="?")
+        p.add_argument("-c", "--cmd", help="command template instead of a catalog entry")
+        p.add_argument("-t", "--targets", help="target, comma-separated targets or @file")
+        p.add_argument("-e", "--extras", help='extra placeholders as JSON, e.g. {"cidr": "1.2.3.0/24"}')
+        p.add_argument("--no-batch", action="store_true", help="one process per target even for list-capable tools")
+
+    p = sub.add_parser("list", help="list catalog commands")
+    p.add_argument("--category")
+    p.add_argument("--search")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("render", help="print the rendered command")
+    with_command(p)
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("run", help="run a command for targets and stream its output")
+    with_command(p)
+    p.add_argument("--pty", action="store_true", help="run under a pseudo-terminal")
+    p.add_argument("--refresh", action="store_true", help="ignore cached passive-source results")
+    p.add_argument("--delta", action="store_true", default=None,
+                   help="feed heavy scanners only assets earlier runs did not give them (default: delta_mode in config)")
+    p.add_argument("--daemon", action="store_true", help="submit to the running daemon")
+    p.add_argument("--detach", action="store_true", help="with --daemon: return once queued")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("pipeline", help="run a pipeline for targets")
+    p.add_argument("name")
+    p.add_argument("-t", "--targets")
+    p.add_argument("-e", "--extras")
+    p.add_argument("--force", action="store_true", help="re-run stages even if up to date")
+    p.add_argument("--daemon", action="store_true")
+    p.add_argument("--detach", action="store_true")
+    p.set_defaults(func=cmd_pipeline)
+
+    p = sub.add_parser("resume", help="re-run jobs interrupted in an earlier session")
+    p.set_defaults(func=cmd_resume)
+
+    p = sub.add_parser("daemon", help="serve a session on a Unix socket")
+    p.add_argument("--resume", action="store_true", help="queue interrupted jobs from the journal on start")
+    p.set_defaults(func=cmd_daemon)
+
+    p = sub.add_parser("status", help="jobs known to the daemon")
+    p.add_argument("--all", action="store_true", help="include jobs that finished more than an hour ago")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser("metrics", help="where the time went: job telemetry per tool, target or job")
+    p.add_argument("--file", help="metrics file (default workspaces/metrics.jsonl or metrics_path)")
+    p.add_argument("--by", choices=("tool", "target"), default="tool")
+    p.add_argument("--jobs", type=int, metavar="N", help="list the top N jobs instead of totals")
+    p.add_argument("--sort", default="wall_s", choices=("wall_s", "cpu_s", "max_rss_kb", "bytes_out", "lines_out",
+                                                         "lines_per_s", "ttfo_s", "queued_s"), help="with --jobs")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_metrics)
+
+    p = sub.add_parser("stop", help="stop daemon jobs (or all jobs) with every process they started")
+    p.add_argument("job", nargs="*", type=int)
+    p.add_argument("--wait", action="store_true", help="wait until all their processes are gone")
+    p.set_defaults(func=cmd_stop)
+
+    p = sub.add_parser("new-run", help="start a new run id on the daemon")
+    p.set_defaults(func=cmd_new_run)
+
+    p = sub.add_parser("shutdown", help="stop the daemon")
+    p.set_defaults(func=cmd_shutdown)
+
+    def with_coordinator(p):
+        p.add_argument("--coordinator", default=os.environ.get("BBG_COORDINATOR", "http://127.0.0.1:8650"),
+                       help="coordinator URL (default $BBG_COORDINATOR or http://127.0.0.1:8650)")
+        p.add_argument("--token", default=os.environ.get("BBG_TOKEN"), help="shared secret (default $BBG_TOKEN)")
+
+    p = sub.add_parser("coordinator", help="hand out sharded jobs to remote workers over HTTP")
+    with_coordinator(p)
+    p.add_argument("--listen", default="127.0.0.1:8650", help="HOST:PORT to listen on")
+    p.add_argument("--root", help="where job output and artifacts are collected (default workspaces/_distributed)")
+    p.add_argument("--lease-ttl", type=float, default=30, help="seconds without a heartbeat before a job is rescheduled")
+    p.add_argument("--max-attempts", type=int, default=3)
+    p.set_defaults(func=cmd_coordinator)
+
+    p = sub.add_parser("worker", help="pull and run jobs from a coordinator")
+    with_coordinator(p)
+    p.add_argument("--name", help="worker name (default host-pid)")
+    p.add_argument("--capacity", type=int, default=2, help="jobs to run at once")
+    p.add_argument("--root", help="scratch directory for running jobs")
+    p.add_argument("--pty", action="store_true", help="run jobs under a pseudo-terminal")
+    p.set_defaults(func=cmd_worker)
+
+    p = sub.add_parser("dist-run", help="run a command for targets on the coordinator's workers")
+    with_command(p)
+    with_coordinator(p)
+    p.add_argument("--detach", action="store_true", help="return once queued")
+    p.set_defaults(func=cmd_dist_run)
+
+    p = sub.add_parser("dist-pipeline", help="run a pipeline per target on the coordinator's workers")
+    with_coordinator(p)
+    p.add_argument("name")
+    p.add_argument("-t", "--targets")
+    p.add_argument("-e", "--extras")
+    p.add_argument("--force", action="store_true")
+    p.add_argument("--detach", action="store_true")
+    p.set_defaults(func=cmd_dist_pipeline)
+
+    p = sub.add_parser("dist-status", help="jobs and workers known to the coordinator")
+    with_coordinator(p)
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_dist_status)
+
+    p = sub.add_parser("dist-stop", help="cancel a coordinator job (or all unfinished jobs)")
+    with_coordinator(p)
+    p.add_argument("job", nargs="?", type=int)
+    p.set_defaults(func=cmd_dist_stop)
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        return 0
+    except Exception as e:
+        from daemon import DaemonError
+        from distributed import DistError
+        if isinstance(e, (DaemonError, DistError, ConnectionError)):
+            sys.stderr.write(f"error: {e}\n")
+            return 2
+        raise
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,16 @@
 # commands.py
 # Centralized commands mapping for Recon to Master GUI (upgraded)
 # Keep commands exactly as provided in the checklist. Use placeholders like {target}, {cidr}, {asn}, etc.
+import os
+import re
+import sys
+import shlex
+
+# helper scripts shipped next to this file, runnable from any workspace cwd
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_PY = shlex.quote(sys.executable or "python3")
+MERGE = f"{_PY} {shlex.quote(os.path.join(_APP_DIR, 'merge.py'))}"
+DELTA = f"{_PY} {shlex.quote(os.path.join(_APP_DIR, 'delta.py'))}"
 
 COMMANDS = {
     "Recon - Subdomain Enumeration": {
@@ -15,11 +25,18 @@ COMMANDS = {
         "crt.sh (curl + jq)": "curl -s https://crt.sh\\?q\\={target}\\&output\\=json | jq -r '.[].name_value' | grep -Po '(\\\\w+\\\\.\\\\w+\\\\.\\\\w+)$' >crtsh.txt",
         "wayback (archive)": "curl -s \\\"http://web.archive.org/cdx/search/cdx?url=*.{target}/*&output=text&fl=original&collapse=urlkey\\\" |sort| sed -e 's_https*://__' -e \\\"s/\\\\/.*//\\\" -e 's/:.*//' -e 's/^www\\.//' | sort -u > wayback.txt",
         "virustotal domain siblings": "curl -s \\\"https://www.virustotal.com/vtapi/v2/domain/report?apikey=[api-key]&domain={target}\\\" | jq -r '.domain_siblings[]' >virustotal.txt",
+        "crt.sh (native)": "builtin:crtsh {target} -o crtsh.txt",
+        "wayback (native)": "builtin:wayback {target} -o wayback.txt",
+        "otx hostnames (native)": "builtin:otx {target} -o otx.txt",
+        "urlscan hostnames (native)": "builtin:urlscan {target} -o urlscan.txt",
+        "virustotal subdomains (native)": "builtin:virustotal {target} --api-key [api-key] -o virustotal.txt",
     },
 
     "Recon - GitHub & Merging": {
         "github-subdomains": "github-subdomains -d {target} -t [github_token]",
         "merge all txts": "cat *.txt | sort -u > final.txt",
+        "merge subdomain lists (native)": MERGE + " --kind host -o final.txt subfinder.txt assetfinder.txt findomain.txt amass.txt crtsh.txt wayback.txt",
+        "merge url lists (native)": MERGE + " --kind url -o allurls.txt urls.txt urls2.txt urls3.txt",
     },
 
     "Recon - Permutation & DNS": {
@@ -47,6 +64,9 @@ COMMANDS = {
         "otx ip addresses": "curl -s \\\"https://otx.alienvault.com/api/v1/indicators/hostname/{target}/url_list?limit=500&page=1\\\" | jq -r '.url_list[]?.result?.urlworker?.ip // empty' | grep -Eo '([0-9]{1,3}\\\\.){3}[0-9]{1,3}'",
         "urlscan ips": "curl -s \\\"https://urlscan.io/api/v1/search/?q=domain:{target}&size=10000\\\" | jq -r '.results[]?.page?.ip // empty' | grep -Eo '([0-9]{1,3}\\\\.){3}[0-9]{1,3}'",
         "shodan ssl search": "shodan search Ssl.cert.subject.CN:\\\"{target}\\\" 200 --fields ip_str | httpx-toolkit -sc -title -server -td",
+        "vt ip addresses (native)": "builtin:virustotal {target} --ips --api-key [api-key] -o vt_ips.txt",
+        "otx ip addresses (native)": "builtin:otx {target} --ips -o otx_ips.txt",
+        "urlscan ips (native)": "builtin:urlscan {target} --ips -o urlscan_ips.txt",
     },
 
     "Live Hosts": {
@@ -67,6 +87,7 @@ COMMANDS = {
 
     "GF & Patterns": {
         "gf sqli": "cat allurls.txt | gf sqli",
+        "classify all urls (native)": "builtin:classify allurls.txt -o classified",
     },
 
     "Nuclei Scanning": {
@@ -151,3 +172,99 @@ COMMANDS = {
         "about": "echo \\\"This GUI was generated from the provided reconnaissance checklist. Always ensure you have authorization before testing targets.\\\"",
     }
 }
+
+
+def render_command(template, target=None, extras=None, **values):
+    # Fill {target} and any other {name} placeholders by plain replacement (commands also contain
+    # awk/shell braces, so str.format can't be used). Unknown placeholders are left as they are.
+    cmd = template
+    if target is not None:
+        cmd = cmd.replace("{target}", str(target))
+    for k, v in list((extras or {}).items()) + list(values.items()):
+        cmd = cmd.replace("{" + k + "}", str(v))
+    return cmd
+
+
+# Tools that can take many targets in one process (shared template loading, resolver pools and
+# connection reuse): single-target form -> list form, where {targets_file} has one target per line.
+LIST_INPUT = {
+    "subfinder": [("-d {target}", "-dL {targets_file}")],
+    "amass": [("-d {target}", "-df {targets_file}")],
+    "findomain": [("-t {target}", "-f {targets_file}")],
+    "asnmap": [("-d {target}", "-f {targets_file}")],
+    "urlfinder": [("-d {target}", "-list {targets_file}")],
+    "nuclei": [("-u https://{target}", "-l {targets_file}"), ("-u {target}", "-l {targets_file}")],
+    "httpx": [("-u {target}", "-l {targets_file}")],
+    "httpx-toolkit": [("-u {target}", "-l {targets_file}")],
+    "naabu": [("-host {target}", "-list {targets_file}")],
+    "katana": [("-u {target}", "-list {targets_file}")],
+    "nmap": [(" {target}", " -iL {targets_file}")],
+    "masscan": [(" {target}", " -iL {targets_file}")],
+}
+# Tools that read one target per line on stdin, so "echo {target} | tool" becomes "cat {targets_file} | tool"
+STDIN_LIST_TOOLS = {"gau", "katana", "alterx", "httpx", "httpx-toolkit", "dnsx", "nuclei", "subfinder", "naabu",
+                    "waybackurls", "hakrawler", "uro"}
+
+_ECHO_TARGET = re.compile(r'echo\s+(\\?"?)\{target\}\1\s*\|\s*')
+
+
+def list_command(template):
+    # list-input form of a catalog command, or None if its tool takes one target at a time
+    m = _ECHO_TARGET.match(template)
+    if m:
+        rest = template[m.end():]
+        words = rest.split()
+        if words and os.path.basename(words[0]) in STDIN_LIST_TOOLS and "{target}" not in rest:
+            return "cat {targets_file} | " + rest
+        return None
+    words = template.split()
+    for single, multi in LIST_INPUT.get(os.path.basename(words[0]) if words else "", ()):
+        if single in template:
+            cmd = template.replace(single, multi, 1)
+            return cmd if "{target}" not in cmd else None
+    return None
+
+
+# Heavy scanners that delta mode feeds only what earlier runs did not already give them (see delta.py):
+# tool -> (input list, kind). None: the tool takes {target} itself and runs only for targets it hasn't seen.
+# "raw" lists may carry probe state after the asset (httpx "[200] [Title]"), so they are diffed with --changes:
+# an asset whose state changed is fed again, and the tool gets the bare asset either way.
+DELTA_TOOLS = {
+    "nuclei batch": ("live_domains.txt", "raw"),
+    "naabu": ("ip.txt", "raw"),
+    "subzy": ("subdomains.txt", "host"),
+    "dirsearch deep": None,
+}
+
+
+def delta_command(cmd, tool, snapshot):
+    # delta-mode form of a rendered DELTA_TOOLS command: diff its input list against `snapshot`, run the
+    # tool on the new entries only and update the snapshot when it succeeded. None if it doesn't apply.
+    spec = DELTA_TOOLS.get(tool)
+    if spec is None:
+        return None
+    name, kind = spec
+    pattern = re.compile(r"(?<![\w./-])" + re.escape(name) + r"(?![\w./-])")
+    if not pattern.search(cmd):
+        return None  # edited so it no longer reads the list
+    base, ext = os.path.splitext(name)
+    delta_name = f"{base}.delta{ext}"
+    snap = shlex.quote(snapshot)
+    changes = " --changes" if kind == "raw" else ""
+    return (f"{DELTA} diff --kind {kind}{changes} --snapshot {snap} -o {delta_name} {name} && "
+            f"if [ -s {delta_name} ]; then {{ {pattern.sub(delta_name, cmd)}; }} && {DELTA} commit --snapshot {snap}; "
+            f"else echo '[delta] nothing new for {tool}'; fi")
+
+
+def parse_targets(text):
+    # "a.com, b.com" or "@/path/to/list.txt" (one target per line, # comments) -> unique targets in order
+    text = (text or "").strip()
+    if text.startswith("@"):
+        seen = {}
+        with open(os.path.expanduser(text[1:].strip()), encoding="utf-8", errors="replace") as f:
+            for line in f:
+                t = line.strip()
+                if t and not t.startswith("#"):
+                    seen.setdefault(t, None)
+        return list(seen)
+    return list(dict.fromkeys(x.strip() for x in text.split(",") if x.strip()))
@@ -0,0 +1,458 @@
+# daemon.py
+# Long-running local daemon: one Session (runner, cache, assets, journal) behind a Unix socket, so
+# cron jobs, the CLI and the GUI can share a scheduler and its per-tool caps. No Qt anywhere.
+#
+# Protocol: one JSON object per line in each direction. A request is {"op": ..., ...}; the reply is
+# {"ok": true, ...} or {"ok": false, "error": "..."}. "run"/"pipeline" with "follow": true and
+# "subscribe" keep the connection open and stream events after the reply:
+#   {"ev": "output", "job": 3, "data": "..."}
+#   {"ev": "finished", "job": 3, "returncode": 0, "state": "finished"}
+#   {"ev": "pipeline", "label": "recon/example.com", "stage": "httpx", "state": "done", "message": "..."}
+#   {"ev": "dropped", "chars": 12345}   (output a slow client could not keep up with)
+#   {"ev": "end", "returncode": 0}      (end of a followed run/pipeline)
+import os
+import json
+import time
+import queue
+import signal
+import socket
+import threading
+import socketserver
+from types import SimpleNamespace
+
+from commands import COMMANDS, render_command, list_command
+from session import Session, plan, find_command
+from pipeline import PIPELINES
+from assets import AssetStore
+from procgroup import VERIFY_TIMEOUT
+
+CLIENT_BUFFER_CHARS = 4 * 1024 * 1024  # output queued per client before it is dropped
+
+
+def default_socket():
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "bugbounty_gui", "daemon.sock")
+
+
+class DaemonError(Exception):
+    pass
+
+
+class _Subscriber:
+    # event queue of one connection; output is dropped (and counted) instead of blocking runner threads
+    def __init__(self, limit=CLIENT_BUFFER_CHARS):
+        self.q = queue.Queue()
+        self.limit = limit
+        self.buffered = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def offer(self, ev):
+        if ev["ev"] == "output":
+            n = len(ev["data"])
+            with self._lock:
+                if self.buffered + n > self.limit:
+                    self.dropped += n
+                    return
+                self.buffered += n
+        self.q.put(ev)
+
+    def get(self, timeout=None):
+        ev = self.q.get(timeout=timeout)
+        with self._lock:
+            if ev["ev"] == "output":
+                self.buffered -= len(ev["data"])
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            return [{"ev": "dropped", "chars": dropped}, ev]
+        return [ev]
+
+
+def _job_info(job):
+    return {"id": job.id, "state": job.state, "returncode": job.returncode, "cmd": job.cmd, "target": job.target,
+            "tool": job.tool, "created": job.created, "started": job.started, "finished": job.finished,
+            "log": job.log_path, "cached": job.cached, "paused": job.paused, "usage": job.usage}
+
+
+class Daemon:
+    def __init__(self, config=None, path=None):
+        self.path = path or default_socket()
+        self._subs = set()
+        self._subs_lock = threading.Lock()
+        self.session = Session(config, on_output=self._on_output, on_finished=self._on_finished)
+        self.server = None
+
+    # --- events ---
+
+    def publish(self, ev):
+        with self._subs_lock:
+            subs = list(self._subs)
+        for s in subs:
+            s.offer(ev)
+
+    def _on_output(self, data, job):
+        self.publish({"ev": "output", "job": job.id if job else 0, "data": data})
+
+    def _on_finished(self, returncode, job):
+        self.publish({"ev": "finished", "job": job.id if job else 0, "returncode": returncode,
+                      "state": job.state if job else None})
+
+    def _on_pipeline(self, label, stage, state, message):
+        self.publish({"ev": "pipeline", "label": label, "stage": stage, "state": state, "message": message})
+
+    def subscribe(self):
+        sub = _Subscriber()
+        with self._subs_lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._subs_lock:
+            self._subs.discard(sub)
+
+    # --- requests ---
+
+    def handle(self, req, send):
+        op = req.get("op")
+        fn = getattr(self, "op_" + str(op).replace("-", "_"), None)
+        if fn is None:
+            raise DaemonError(f"unknown op {op!r}")
+        return fn(req, send)
+
+    def op_ping(self, req, send):
+        s = self.session
+        send({"ok": True, "pid": os.getpid(), "run_id": s.run_id, "active": s.active_count(),
+              "workspaces_dir": s.workspaces_dir, "assets_db": s.assets.path})
+
+    def op_commands(self, req, send):
+        send({"ok": True, "commands": COMMANDS})
+
+    def op_pipelines(self, req, send):
+        send({"ok": True, "pipelines": {name: [st.name for st in p.stages] for name, p in PIPELINES.items()}})
+
+    def _template(self, req):
+        if req.get("template"):
+            return req["template"]
+        return find_command(req.get("category"), req.get("tool"))
+
+    def op_render(self, req, send):
+        template = self._template(req)
+        targets = req.get("targets") or []
+        lst = list_command(template)
+        send({"ok": True, "command": render_command(template, targets[0] if targets else None, req.get("extras")),
+              "list_command": render_command(lst, None, req.get("extras")) if lst else None})
+
+    def op_run(self, req, send):
+        template = self._template(req)
+        targets = req.get("targets") or []
+        if "{target}" in template and not targets:
+            raise DaemonError("command requires {target}")
+        sub = self.subscribe() if req.get("follow") else None
+        try:
+            jobs = self.session.submit(template, targets, extras=req.get("extras"), use_pty=req.get("use_pty", False),
+                                       tool=req.get("tool"), category=req.get("category"), refresh=req.get("refresh", False),
+                                       batch=req.get("batch", True), delta=req.get("delta"))
+            ids = [j.id for j in jobs]
+            send({"ok": True, "jobs": ids})
+            if sub is not None:
+                self._follow(sub, send, lambda ev: ev.get("job") in ids, lambda: all(j.done for j in jobs),
+                             lambda: next((j.returncode for j in jobs if j.returncode), 0))
+        finally:
+            if sub is not None:
+                self.unsubscribe(sub)
+
+    def op_pipeline(self, req, send):
+        name = req.get("name")
+        if name not in PIPELINES:
+            raise DaemonError(f"unknown pipeline {name!r}")
+        targets = req.get("targets") or []
+        if not targets:
+            raise DaemonError("pipelines need at least one target")
+        sub = self.subscribe() if req.get("follow") else None
+        notes = []
+        try:
+            runs = self.session.start_pipeline(name, targets, extras=req.get("extras"), force=req.get("force", False),
+                                               on_event=self._on_pipeline, note=notes.append)
+            send({"ok": True, "runs": [f"{name}/{r.target}" for r in runs], "errors": notes})
+            if sub is not None:
+                labels = {f"{name}/{r.target}" for r in runs}
+
+                def mine(ev):
+                    if ev["ev"] == "pipeline":
+                        return ev["label"] in labels
+                    return any(ev.get("job") == j.id for r in runs for j in list(r.jobs.values()))
+
+                self._follow(sub, send, mine, lambda: all(r._done.is_set() for r in runs),
+                             lambda: 0 if all(r.ok for r in runs) and not notes else 1)
+        finally:
+            if sub is not None:
+                self.unsubscribe(sub)
+
+    def _follow(self, sub, send, mine, done, returncode):
+        while True:
+            try:
+                events = sub.get(timeout=0.2)
+            except queue.Empty:
+                if done() and sub.q.empty():
+                    break
+                continue
+            for ev in events:
+                if ev["ev"] == "dropped" or mine(ev):
+                    send(ev)
+        send({"ev": "end", "returncode": returncode()})
+
+    def op_subscribe(self, req, send):
+        sub = self.subscribe()
+        try:
+            send({"ok": True})
+            while True:
+                try:
+                    events = sub.get(timeout=30)
+                except queue.Empty:
+                    send({"ev": "keepalive"})
+                    continue
+                for ev in events:
+                    send(ev)
+        finally:
+            self.unsubscribe(sub)
+
+    def op_status(self, req, send):
+        jobs = list(self.session.runner.jobs.values())
+        if not req.get("all"):
+            jobs = [j for j in jobs if not j.done or (j.finished or 0) > time.time() - 3600]
+        gov = self.session.governor
+        send({"ok": True, "run_id": self.session.run_id, "active": self.session.active_count(),
+              "resources": gov.status() if gov is not None else None, "jobs": [_job_info(j) for j in jobs]})
+
+    def op_metrics(self, req, send):
+        send({"ok": True, "jobs": self.session.job_metrics(int(req.get("limit", 500)))})
+
+    def op_stop(self, req, send):
+        jobs = req.get("jobs") or [req.get("job")]
+        ok = all([self.session.stop(job_id) for job_id in jobs])
+        reply = {"ok": ok}
+        if req.get("wait"):
+            # block until the stopped jobs' process groups are gone, see procgroup.GroupKiller
+            runner = self.session.runner
+            reply["clean"] = runner.wait_stopped(runner.killer.grace + VERIFY_TIMEOUT)
+        send(reply)
+
+    def op_new_run(self, req, send):
+        send({"ok": True, "run_id": self.session.new_run()})
+
+    def op_resume(self, req, send):
+        jobs = self.session.resume()
+        self.session.journal.compact()
+        send({"ok": True, "jobs": [j.id for j in jobs]})
+
+    def op_shutdown(self, req, send):
+        send({"ok": True})
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    # --- server ---
+
+    def serve(self, resume=False):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            if DaemonClient(self.path).available():
+                raise DaemonError(f"a daemon is already listening on {self.path}")
+            os.unlink(self.path)
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                lock = threading.Lock()
+
+                def send(obj):
+                    with lock:
+                        self.wfile.write(json.dumps(obj).encode("utf-8") + b"\n")
+                        self.wfile.flush()
+
+                for line in self.rfile:
+                    try:
+                        req = json.loads(line)
+                        daemon.handle(req, send)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+                    except Exception as e:
+                        try:
+                            send({"ok": False, "error": f"{type(e).__name__}: {e}"})
+                        except OSError:
+                            return
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        old_umask = os.umask(0o177)  # socket is only for this user
+        try:
+            self.server = Server(self.path, Handler)
+        finally:
+            os.umask(old_umask)
+        if resume:
+            self.session.resume()
+        self.session.journal.compact()
+        signal.signal(signal.SIGTERM, lambda *a: threading.Thread(target=self.server.shutdown, daemon=True).start())
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.session.close()
+
+
+class DaemonClient:
+    def __init__(self, path=None, timeout=10):
+        self.path = path or default_socket()
+        self.timeout = timeout
+
+    def _open(self):
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(self.timeout)
+        try:
+            s.connect(self.path)
+        except OSError as e:
+            s.close()
+            raise DaemonError(f"no daemon on {self.path}: {e}") from None
+        return s
+
+    def available(self):
+        try:
+            self.call("ping")
+            return True
+        except (DaemonError, OSError):
+            return False
+
+    def call(self, op, **params):
+        reply, _ = self.stream(op, **params)
+        return reply
+
+    def stream(self, op, **params):
+        # -> (reply, iterator of events that follow it); the iterator closes the connection when exhausted
+        s = self._open()
+        f = s.makefile("rwb")
+        f.write(json.dumps(dict(params, op=op)).encode("utf-8") + b"\n")
+        f.flush()
+        if params.get("follow") or params.get("wait") or op == "subscribe":
+            s.settimeout(None)
+        line = f.readline()
+        if not line:
+            s.close()
+            raise DaemonError("daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok", False) and "error" in reply:
+            s.close()
+            raise DaemonError(reply["error"])
+
+        def events():
+            try:
+                for raw in f:
+                    ev = json.loads(raw)
+                    if ev.get("ev") == "keepalive":
+                        continue
+                    yield ev
+                    if ev.get("ev") == "end":
+                        return
+            finally:
+                s.close()
+
+        if not (params.get("follow") or op == "subscribe"):
+            s.close()
+            return reply, iter(())
+        return reply, events()
+
+
+class RemoteSession:
+    # What the GUI needs from session.Session, served by a daemon: jobs run (and keep running) there,
+    # output and finish events arrive through a subscription thread.
+    plan = staticmethod(plan)
+
+    def __init__(self, client, config=None, on_output=None, on_finished=None):
+        self.client = client
+        self.config = config or {}
+        info = client.call("ping")
+        self.run_id = info["run_id"]
+        self.workspaces_dir = info["workspaces_dir"]
+        self.assets = AssetStore(info["assets_db"])
+        self.on_output = on_output
+        self.on_finished = on_finished
+        self._active = info["active"]
+        _, self._events = client.stream("subscribe")
+        threading.Thread(target=self._listen, name="daemon-events", daemon=True).start()
+
+    @property
+    def batch_size(self):
+        from runner import DEFAULT_SHARD_SIZE
+        return int(self.config.get("batch_size", DEFAULT_SHARD_SIZE))
+
+    def _listen(self):
+        try:
+            for ev in self._events:
+                kind = ev.get("ev")
+                if kind == "output" and self.on_output:
+                    self.on_output(ev["data"], SimpleNamespace(id=ev["job"]) if ev["job"] else None)
+                elif kind == "finished" and self.on_finished:
+                    self.on_finished(ev["returncode"], SimpleNamespace(id=ev["job"], state=ev.get("state")) if ev["job"] else None)
+                elif kind == "pipeline" and self.on_output:
+                    self.on_output(f"[pipeline {ev['label']}] {ev['stage']}: {ev['state']} {ev['message']}\n", None)
+                elif kind == "dropped" and self.on_output:
+                    self.on_output(f"[daemon] {ev['chars']} chars of output dropped for this client\n", None)
+        except (OSError, ValueError):
+            pass
+        if self.on_output:
+            self.on_output("[daemon] connection to the daemon closed\n", None)
+
+    def submit(self, template, targets, extras=None, use_pty=True, run_in_terminal=False, tool=None, category=None,
+               refresh=False, batch=True, note=None, delta=None):
+        reply = self.client.call("run", template=template, targets=targets, extras=extras, use_pty=use_pty, tool=tool,
+                                 category=category, refresh=refresh, batch=batch, delta=delta)
+        if note:
+            note(f"[daemon] queued job(s) {', '.join(map(str, reply['jobs']))}")
+        return reply["jobs"]
+
+    def start_pipeline(self, name, targets, extras=None, force=False, on_event=None, note=None):
+        reply = self.client.call("pipeline", name=name, targets=targets, extras=extras, force=force)
+        if note:
+            for err in reply.get("errors", []):
+                note(err)
+        return reply["runs"]
+
+    def active_count(self):
+        try:
+            return self.client.call("ping")["active"]
+        except DaemonError:
+            return 0
+
+    def job_metrics(self, limit=500):
+        try:
+            return self.client.call("metrics", limit=limit)["jobs"]
+        except DaemonError:
+            return []
+
+    def log_path(self, job_id):
+        # the daemon's logs are on this machine too (same user, Unix socket)
+        for job in self.client.call("status", all=True)["jobs"]:
+            if job["id"] == job_id:
+                return job["log"]
+        return None
+
+    def stop(self, job_id=None):
+        return self.client.call("stop", job=job_id)["ok"]
+
+    def new_run(self):
+        self.run_id = self.client.call("new_run")["run_id"]
+        return self.run_id
+
+    def interrupted(self):
+        return []  # the daemon owns the journal, see `daemon --resume`
+
+    def resume(self):
+        return []
+
+    def abandon(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,168 @@
+# delta.py
+# "New assets only" recon. For every target, each heavy tool keeps a sorted snapshot of the assets it
+# was already fed (workspaces/<target>/.delta/<tool>.txt). diff() streams a fresh list against it and
+# writes only what is new, or changed when lines carry more than the asset (httpx status/title, ports
+# ...), plus the would-be snapshot next to it; commit() swaps that in once the tool has run, so assets
+# of a failed or stopped scan are offered again next time. Both sides are sorted, so a diff is one merge
+# pass over the snapshot and the fresh list, which is deduped in bounded memory like merge.py does.
+#
+#   python3 delta.py diff --kind host --snapshot .delta/subzy.txt -o subdomains.delta.txt subdomains.txt
+#   python3 delta.py commit --snapshot .delta/subzy.txt
+import os
+import sys
+import heapq
+import argparse
+
+from logwriter import safe_name
+from merge import NORMALIZERS, DEFAULT_MEMORY, ExternalDedupe, _existing, _iter_file, _iter_lines, _write_atomic
+
+DELTA_DIR = ".delta"
+PENDING_SUFFIX = ".pending"
+
+
+def snapshot_path(workspaces_dir, target, tool):
+    # lives beside the target's run directories; Workspace.runs() only lists directories with a manifest
+    return os.path.join(os.path.abspath(workspaces_dir), safe_name(target, 80) or "_", DELTA_DIR,
+                        safe_name(tool.replace(" ", "_"), 60) + ".txt")
+
+
+def record(line, normalize, changes=False):
+    # "key\tfingerprint" for an input line, or None. With changes, the first field is the asset and the
+    # rest of the line ("[200] [Title]") its fingerprint; otherwise the whole line is the asset.
+    if changes:
+        fields = line.split()
+        if not fields:
+            return None
+        key = normalize(fields[0])
+        fp = " ".join(fields[1:])
+    else:
+        key = normalize(line)
+        fp = ""
+    if key is None or "\t" in key:
+        return None
+    return f"{key}\t{fp}"
+
+
+def diff_records(fresh, snapshot, out=None):
+    # fresh: sorted, unique records. Writes new/changed keys to `out`, the union of the snapshot and
+    # fresh to snapshot + ".pending". Returns (assets, new, changed).
+    counts = {"assets": 0, "new": 0, "changed": 0}
+    out_fh = open(out, "w", encoding="utf-8", buffering=1024 * 1024) if out else None
+
+    def merged():
+        # (record, in snapshot, in fresh) in sorted order
+        old = ((r, 0) for r in _iter_file(snapshot)) if os.path.exists(snapshot) else iter(())
+        cur, flags = None, 0
+        for rec, src in heapq.merge(old, ((r, 1) for r in fresh)):
+            if rec != cur:
+                if cur is not None:
+                    yield cur, bool(flags & 1), bool(flags & 2)
+                cur, flags = rec, 0
+            flags |= 1 << src
+        if cur is not None:
+            yield cur, bool(flags & 1), bool(flags & 2)
+
+    def judge(key, group):
+        # group: [(record, in snapshot, in fresh)] for one key -> the records the new snapshot keeps
+        if not any(f for _, _, f in group):
+            return [rec for rec, _, _ in group]
+        counts["assets"] += 1
+        if any(f and not o for _, o, f in group):
+            counts["changed" if any(o for _, o, _ in group) else "new"] += 1
+            if out_fh:
+                out_fh.write(key + "\n")
+        # the asset's current state replaces what the snapshot had
+        return [rec for rec, _, f in group if f]
+
+    def union():
+        key, group = None, []
+        for rec, in_old, in_fresh in merged():
+            k = rec.split("\t", 1)[0]
+            if k != key:
+                if group:
+                    yield from judge(key, group)
+                key, group = k, []
+            group.append((rec, in_old, in_fresh))
+        if group:
+            yield from judge(key, group)
+
+    os.makedirs(os.path.dirname(os.path.abspath(snapshot)), exist_ok=True)
+    try:
+        _write_atomic(snapshot + PENDING_SUFFIX, union())
+    finally:
+        if out_fh:
+            out_fh.close()
+    return counts["assets"], counts["new"], counts["changed"]
+
+
+def diff_files(inputs, snapshot, out=None, kind="host", changes=False, memory_limit=DEFAULT_MEMORY, tmpdir=None, warn=None):
+    normalize = NORMALIZERS[kind]
+    with ExternalDedupe(memory_limit, tmpdir) as d:
+        for line in _iter_lines(_existing(inputs, warn)):
+            rec = record(line, normalize, changes)
+            if rec is not None:
+                d.add(rec)
+        return diff_records(iter(d), snapshot, out)
+
+
+def diff_lines(lines, snapshot, out=None, kind="host", changes=False):
+    # small in-memory variant, e.g. the targets of a per-target tool
+    normalize = NORMALIZERS[kind]
+    fresh = sorted({r for r in (record(line, normalize, changes) for line in lines) if r is not None})
+    return diff_records(iter(fresh), snapshot, out)
+
+
+def commit(snapshot):
+    # make the last diff's pending snapshot current; False if there is none
+    try:
+        os.replace(snapshot + PENDING_SUFFIX, snapshot)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def known(snapshot, asset, kind="host"):
+    # True if the snapshot already has the asset (with any fingerprint)
+    key = NORMALIZERS[kind](asset)
+    if key is None or not os.path.exists(snapshot):
+        return False
+    prefix = key + "\t"
+    for rec in _iter_file(snapshot):
+        if rec.startswith(prefix):
+            return True
+        if rec > prefix:
+            return False
+    return False
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="emit only assets not in (or changed since) a per-tool snapshot")
+    sub = ap.add_subparsers(dest="op", required=True)
+    p = sub.add_parser("diff", help="write new/changed assets and a pending snapshot")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("--snapshot", required=True)
+    p.add_argument("-o", "--output", help="new and changed assets, one per line")
+    p.add_argument("--kind", choices=sorted(NORMALIZERS), default="host")
+    p.add_argument("--changes", action="store_true",
+                   help="first field is the asset, the rest of the line its state; report assets whose state changed")
+    p.add_argument("--commit", action="store_true", help="update the snapshot right away")
+    p.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY // (1024 * 1024))
+    p = sub.add_parser("commit", help="make the pending snapshot of the last diff current")
+    p.add_argument("--snapshot", required=True)
+    args = ap.parse_args(argv)
+    if args.op == "commit":
+        if not commit(args.snapshot):
+            print(f"[delta] no pending snapshot for {args.snapshot}", file=sys.stderr)
+            return 1
+        print(f"[delta] snapshot updated: {args.snapshot}")
+        return 0
+    assets, new, changed = diff_files(args.inputs, args.snapshot, args.output, args.kind, args.changes,
+                                      args.memory_mb * 1024 * 1024, warn=sys.stderr.write)
+    if args.commit:
+        commit(args.snapshot)
+    print(f"[delta] {new} new, {changed} changed of {assets} asset(s)" + (f" -> {args.output}" if args.output else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,660 @@
+# distributed.py
+# Coordinator/worker mode for scaling one scan across machines. The coordinator turns a command and a
+# target list into jobs (list-capable tools are sharded like runner.submit_batch, others get one job
+# per target; pipelines get one job per target) and hands them out over HTTP. Workers lease jobs, run
+# them with a local CommandRunner, stream output back, upload the files they produced and heartbeat;
+# a job whose lease runs out (dead or partitioned worker) is queued again, up to max_attempts.
+#
+#   python -m bugbounty_gui coordinator --listen 0.0.0.0:8650 --token SECRET
+#   python -m bugbounty_gui worker --coordinator http://10.0.0.5:8650 --capacity 4 --token SECRET
+#   python -m bugbounty_gui dist-run "Nuclei Scanning" "nuclei single" -t @scope.txt --coordinator http://10.0.0.5:8650
+#
+# A coordinator listening on anything but loopback needs a token.
+# HTTP API (JSON unless noted; X-Token header when the coordinator has a token):
+#   POST /submit {"template"|"pipeline", "targets", "extras", "batch", "tool", "force"} -> {"jobs": [ids]}
+#   POST /lease {"worker", "max"}            -> {"jobs": [spec...], "lease_ttl": s}
+#   POST /heartbeat {"worker", "jobs": [ids]} -> {"cancel": [ids]}   (ids whose lease is gone or cancelled)
+#   POST /jobs/<id>/output?worker=W&offset=N  raw bytes, appended if N is the current size
+#   POST /jobs/<id>/artifact?worker=W&name=rel raw bytes
+#   POST /jobs/<id>/done {"worker", "returncode"}
+#   POST /jobs/<id>/cancel
+#   GET  /jobs                                 -> {"jobs": [...], "workers": {...}}
+#   GET  /jobs/<id>/output?offset=N            raw bytes, X-Job-State and X-Job-Attempt headers
+import os
+import re
+import hmac
+import json
+import time
+import shlex
+import shutil
+import socket
+import ipaddress
+import itertools
+import threading
+import http.client
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, quote
+
+from commands import render_command, list_command
+from runner import CommandRunner, DEFAULT_SHARD_SIZE
+from procgroup import VERIFY_TIMEOUT
+
+DEFAULT_PORT = 8650
+DEFAULT_LEASE_TTL = 30
+DEFAULT_MAX_ATTEMPTS = 3
+SEND_INTERVAL = 0.5
+
+# job states on the coordinator
+QUEUED = "queued"
+LEASED = "leased"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+_FINAL = (FINISHED, FAILED, CANCELLED)
+
+
+class DistError(Exception):
+    pass
+
+
+class Conflict(DistError):
+    # request from a worker that no longer holds the job's lease
+    pass
+
+
+class DistJob:
+    def __init__(self, job_id, kind, root, cmd=None, target=None, targets=None, tool=None, pipeline=None,
+                 extras=None, force=False):
+        self.id = job_id
+        self.kind = kind  # "command" or "pipeline"
+        self.cmd = cmd
+        self.target = target
+        self.targets = targets  # shard written to {targets_file} on the worker
+        self.tool = tool
+        self.pipeline = pipeline
+        self.extras = extras or {}
+        self.force = force
+        self.dir = os.path.join(root, f"{job_id:06d}")
+        self.state = QUEUED
+        self.worker = None
+        self.lease_expires = 0.0
+        self.attempts = 0
+        self.returncode = None
+        self.output_size = 0
+        self.artifacts = []
+        self.submitted = time.time()
+        self.finished = None
+        os.makedirs(self.dir, exist_ok=True)
+
+    @property
+    def output_path(self):
+        return os.path.join(self.dir, "output.log")
+
+    def spec(self):
+        return {"id": self.id, "kind": self.kind, "cmd": self.cmd, "target": self.target, "targets": self.targets,
+                "tool": self.tool, "pipeline": self.pipeline, "extras": self.extras, "force": self.force,
+                "attempt": self.attempts}
+
+    def info(self):
+        return {"id": self.id, "kind": self.kind, "state": self.state, "worker": self.worker, "attempts": self.attempts,
+                "returncode": self.returncode, "target": self.target, "shard": len(self.targets or ()),
+                "tool": self.tool or self.pipeline, "output_bytes": self.output_size, "artifacts": self.artifacts,
+                "dir": self.dir}
+
+
+class Coordinator:
+    def __init__(self, root, lease_ttl=DEFAULT_LEASE_TTL, max_attempts=DEFAULT_MAX_ATTEMPTS, batch_size=None, token=None):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self.lease_ttl = lease_ttl
+        self.max_attempts = max_attempts
+        self.batch_size = max(1, int(batch_size or DEFAULT_SHARD_SIZE))
+        self.token = token
+        self.jobs = {}
+        self.workers = {}  # name -> last seen
+        self._queue = deque()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        threading.Thread(target=self._reaper, name="dist-reaper", daemon=True).start()
+
+    # --- submitting ---
+
+    def _add(self, kind, **kw):
+        job = DistJob(next(self._ids), kind, self.root, **kw)
+        self.jobs[job.id] = job
+        self._queue.append(job)
+        return job.id
+
+    def submit_command(self, template, targets, extras=None, batch=True, tool=None):
+        list_cmd = list_command(template) if batch and len(targets) > 1 else None
+        with self._lock:
+            if list_cmd:
+                cmd = render_command(list_cmd, None, extras)
+                return [self._add("command", cmd=cmd, targets=targets[i:i + self.batch_size], tool=tool)
+                        for i in range(0, len(targets), self.batch_size)]
+            if "{target}" in template and targets:
+                return [self._add("command", cmd=render_command(template, t, extras), target=t, tool=tool) for t in targets]
+            return [self._add("command", cmd=render_command(template, None, extras), tool=tool)]
+
+    def submit_pipeline(self, name, targets, extras=None, force=False):
+        with self._lock:
+            return [self._add("pipeline", pipeline=name, target=t, extras=extras, force=force) for t in targets]
+
+    # --- worker side ---
+
+    def lease(self, worker, n=1):
+        now = time.time()
+        out = []
+        with self._lock:
+            self.workers[worker] = now
+            while self._queue and len(out) < n:
+                job = self._queue.popleft()
+                if job.state != QUEUED:
+                    continue
+                job.state = LEASED
+                job.worker = worker
+                job.attempts += 1
+                job.lease_expires = now + self.lease_ttl
+                out.append(job.spec())
+        return out
+
+    def _held(self, job_id, worker):
+        job = self.jobs.get(job_id)
+        if job is None or job.state != LEASED or job.worker != worker:
+            raise Conflict(f"job {job_id} is not leased to {worker}")
+        return job
+
+    def heartbeat(self, worker, job_ids):
+        now = time.time()
+        lost = []
+        with self._lock:
+            self.workers[worker] = now
+            for jid in job_ids:
+                try:
+                    self._held(jid, worker).lease_expires = now + self.lease_ttl
+                except Conflict:
+                    lost.append(jid)
+        return lost
+
+    def output(self, job_id, worker, offset, data):
+        # idempotent append: a retried chunk (offset already past) is ignored
+        with self._lock:
+            job = self._held(job_id, worker)
+            if offset != job.output_size:
+                return job.output_size
+            with open(job.output_path, "ab") as f:
+                f.write(data)
+            job.output_size += len(data)
+            return job.output_size
+
+    def artifact(self, job_id, worker, name, data):
+        rel = os.path.normpath(name)
+        if os.path.isabs(rel) or rel.startswith(".."):
+            raise ValueError(f"bad artifact name {name!r}")
+        with self._lock:
+            job = self._held(job_id, worker)
+            path = os.path.join(job.dir, "files", rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+            if rel not in job.artifacts:
+                job.artifacts.append(rel)
+
+    def done(self, job_id, worker, returncode):
+        with self._lock:
+            job = self._held(job_id, worker)
+            job.returncode = returncode
+            job.state = FINISHED if returncode == 0 else FAILED
+            job.finished = time.time()
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.state in _FINAL:
+                return False
+            job.state = CANCELLED  # a worker holding it is told on its next heartbeat
+            job.finished = time.time()
+            return True
+
+    def _requeue(self, job):
+        # expired lease: keep the partial output of the lost attempt, start the next one clean
+        if os.path.exists(job.output_path):
+            os.replace(job.output_path, os.path.join(job.dir, f"output.attempt{job.attempts}.log"))
+        shutil.rmtree(os.path.join(job.dir, "files"), ignore_errors=True)
+        job.output_size = 0
+        job.artifacts = []
+        job.worker = None
+        if job.attempts >= self.max_attempts:
+            job.state = FAILED
+            job.returncode = -1
+            job.finished = time.time()
+        else:
+            job.state = QUEUED
+            self._queue.appendleft(job)
+
+    def _reaper(self):
+        while not self._stop.wait(1.0):
+            now = time.time()
+            with self._lock:
+                for job in list(self.jobs.values()):
+                    if job.state == LEASED and job.lease_expires < now:
+                        self._requeue(job)
+
+    def status(self):
+        now = time.time()
+        with self._lock:
+            return {"jobs": [j.info() for j in self.jobs.values()],
+                    "workers": {w: round(now - t, 1) for w, t in self.workers.items()}}
+
+    def read_output(self, job_id, offset=0, limit=1024 * 1024):
+        # (state, attempt, bytes from offset); a new attempt starts a new log, so followers restart at 0
+        job = self.jobs[job_id]
+        with self._lock:
+            state, attempt = job.state, job.attempts
+        try:
+            with open(job.output_path, "rb") as f:
+                f.seek(offset)
+                data = f.read(limit)
+        except FileNotFoundError:
+            data = b""
+        return state, attempt, data
+
+    def close(self):
+        self._stop.set()
+
+
+_ROUTE = re.compile(r"^/jobs/(\d+)/(output|artifact|done|cancel)$")
+
+
+def make_handler(coord):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, body=b"", ctype="application/json", headers=None):
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(n) if n else b""
+
+        def _authorized(self):
+            if coord.token and not hmac.compare_digest(self.headers.get("X-Token", "").encode(), coord.token.encode()):
+                self._body()
+                self._reply(403, {"error": "bad token"})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            url = urlsplit(self.path)
+            q = parse_qs(url.query)
+            if url.path == "/jobs":
+                return self._reply(200, coord.status())
+            m = _ROUTE.match(url.path)
+            if m and m.group(2) == "output" and int(m.group(1)) in coord.jobs:
+                state, attempt, data = coord.read_output(int(m.group(1)), int(q.get("offset", ["0"])[0]))
+                return self._reply(200, data, "application/octet-stream", {"X-Job-State": state, "X-Job-Attempt": str(attempt)})
+            self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            url = urlsplit(self.path)
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            raw = self._body()
+            try:
+                m = _ROUTE.match(url.path)
+                if m:
+                    jid, action = int(m.group(1)), m.group(2)
+                    if action == "output":
+                        return self._reply(200, {"size": coord.output(jid, q["worker"], int(q["offset"]), raw)})
+                    if action == "artifact":
+                        coord.artifact(jid, q["worker"], q["name"], raw)
+                        return self._reply(200, {"ok": True})
+                    if action == "cancel":
+                        return self._reply(200, {"ok": coord.cancel(jid)})
+                    req = json.loads(raw or b"{}")
+                    coord.done(jid, req["worker"], int(req["returncode"]))
+                    return self._reply(200, {"ok": True})
+                req = json.loads(raw or b"{}")
+                if url.path == "/lease":
+                    return self._reply(200, {"jobs": coord.lease(req["worker"], int(req.get("max", 1))),
+                                             "lease_ttl": coord.lease_ttl})
+                if url.path == "/heartbeat":
+                    return self._reply(200, {"cancel": coord.heartbeat(req["worker"], req.get("jobs", []))})
+                if url.path == "/submit":
+                    if req.get("pipeline"):
+                        ids = coord.submit_pipeline(req["pipeline"], req.get("targets") or [], req.get("extras"), req.get("force", False))
+                    else:
+                        ids = coord.submit_command(req["template"], req.get("targets") or [], req.get("extras"),
+                                                   req.get("batch", True), req.get("tool"))
+                    return self._reply(200, {"jobs": ids})
+                self._reply(404, {"error": "not found"})
+            except Conflict as e:
+                self._reply(409, {"error": str(e)})
+            except (KeyError, ValueError) as e:
+                self._reply(400, {"error": f"{type(e).__name__}: {e}"})
+
+    return Handler
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve_coordinator(coord, host="127.0.0.1", port=DEFAULT_PORT):
+    # workers run whatever commands the coordinator hands out, so other machines only get in with a token
+    if not coord.token and not is_loopback(host):
+        raise DistError(f"refusing to listen on {host} without a token (--token), only loopback addresses may go without")
+    server = ThreadingHTTPServer((host, port), make_handler(coord))
+    server.daemon_threads = True
+    return server
+
+
+class Api:
+    # small JSON/bytes client with one keep-alive connection per thread
+    def __init__(self, url, token=None, timeout=30):
+        parts = urlsplit(url if "://" in url else "http://" + url)
+        self.host = parts.hostname
+        self.port = parts.port or DEFAULT_PORT
+        self.token = token
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self, fresh=False):
+        c = getattr(self._local, "conn", None)
+        if c is None or fresh:
+            if c is not None:
+                c.close()
+            c = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return c
+
+    def request(self, method, path, body=None, headers=None):
+        hdrs = {"X-Token": self.token} if self.token else {}
+        hdrs.update(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+            hdrs["Content-Type"] = "application/json"
+        for attempt in range(2):
+            conn = self._conn(fresh=attempt > 0)
+            try:
+                if hasattr(body, "seek"):
+                    body.seek(0)
+                conn.request(method, path, body=body, headers=hdrs)
+                resp = conn.getresponse()
+                data = resp.read()
+                return resp.status, data, resp
+            except (http.client.HTTPException, OSError):
+                if attempt:
+                    raise
+
+    def json(self, method, path, body=None):
+        status, data, _ = self.request(method, path, body)
+        if status == 409:
+            raise Conflict(json.loads(data).get("error"))
+        if status != 200:
+            raise DistError(f"{method} {path} -> HTTP {status}: {data[:200].decode('utf-8', 'replace')}")
+        return json.loads(data)
+
+
+class _Active:
+    def __init__(self, spec, jobdir):
+        self.spec = spec
+        self.id = spec["id"]
+        self.dir = jobdir
+        self.runner = None
+        self.buffer = []
+        self.sent = 0
+        self.lost = False
+        self.returncode = None
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        with self.lock:
+            self.buffer.append(text.encode("utf-8", errors="replace") if isinstance(text, str) else text)
+
+    def take(self):
+        with self.lock:
+            data, self.buffer = b"".join(self.buffer), []
+        return data
+
+
+class Worker:
+    def __init__(self, url, name=None, capacity=2, root=None, token=None, poll=1.0, use_pty=False):
+        self.api = Api(url, token)
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.capacity = max(1, int(capacity))
+        self.root = os.path.abspath(root or os.path.join(os.getcwd(), "workspaces", "_worker", self.name))
+        self.poll = poll
+        self.use_pty = use_pty
+        self.lease_ttl = DEFAULT_LEASE_TTL
+        self.active = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stopping = []  # runners stopped by stop(), see wait_stopped()
+
+    def log(self, text):
+        print(f"[worker {self.name}] {text}", flush=True)
+
+    # --- main loop ---
+
+    def run(self):
+        threading.Thread(target=self._heartbeat_loop, name="dist-heartbeat", daemon=True).start()
+        threading.Thread(target=self._send_loop, name="dist-sender", daemon=True).start()
+        self.log(f"pulling jobs (capacity {self.capacity}) into {self.root}")
+        while not self._stop.is_set():
+            free = self.capacity - len(self.active)
+            specs = []
+            if free > 0:
+                try:
+                    reply = self.api.json("POST", "/lease", {"worker": self.name, "max": free})
+                    self.lease_ttl = reply.get("lease_ttl", self.lease_ttl)
+                    specs = reply["jobs"]
+                except OSError as e:
+                    self.log(f"coordinator unreachable: {e}")
+                except DistError as e:
+                    self.log(f"lease failed: {e}")
+            for spec in specs:
+                self._start(spec)
+            if not specs:
+                self._stop.wait(self.poll)
+
+    def stop(self):
+        self._stop.set()
+        self._stopping = [a.runner for a in list(self.active.values()) if a.runner]
+        for runner in self._stopping:
+            runner.stop()
+
+    def wait_stopped(self):
+        # after stop(): give the stopped jobs' processes time to go (SIGKILL escalation, see procgroup.py)
+        for runner in self._stopping:
+            runner.wait_stopped(runner.killer.grace + VERIFY_TIMEOUT)
+
+    # --- executing ---
+
+    def _start(self, spec):
+        jobdir = os.path.join(self.root, f"{spec['id']:06d}-{spec['attempt']}")
+        os.makedirs(jobdir, exist_ok=True)
+        a = _Active(spec, jobdir)
+        a.runner = CommandRunner(on_output=lambda data, job, a=a: a.write(data), logs_dir=os.path.join(self.root, "logs"),
+                                 max_workers=4)
+        with self._lock:
+            self.active[a.id] = a
+        self.log(f"job {a.id} attempt {spec['attempt']}: {spec.get('cmd') or spec.get('pipeline')} {spec.get('target') or ''}")
+        try:
+            if spec["kind"] == "pipeline":
+                self._start_pipeline(a)
+            else:
+                self._start_command(a)
+        except Exception as e:
+            a.write(f"[worker] could not start job: {e}\n")
+            self._job_done(a, -1)
+
+    def _start_command(self, a):
+        cmd = a.spec["cmd"]
+        if a.spec.get("targets"):
+            path = os.path.join(a.dir, "targets.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(t + "\n" for t in a.spec["targets"])
+            cmd = cmd.replace("{targets_file}", shlex.quote(path))
+        job = a.runner.submit(cmd, use_pty=self.use_pty, cwd=a.dir, tool=a.spec.get("tool"), target=a.spec.get("target"),
+                              resumable=False)
+        job.add_done_callback(lambda j: self._job_done(a, j.returncode))
+
+    def _start_pipeline(self, a):
+        from pipeline import PIPELINES, PipelineRun
+        run = PipelineRun(PIPELINES[a.spec["pipeline"]], a.runner, a.spec["target"], cwd=a.dir, extras=a.spec.get("extras"),
+                          force=a.spec.get("force", False),
+                          on_event=lambda stage, state, msg: a.write(f"[pipeline] {stage}: {state} {msg}\n"))
+        run.start()
+
+        def wait():
+            run.wait()
+            self._job_done(a, 0 if run.ok else 1)
+
+        threading.Thread(target=wait, name=f"dist-pipeline-{a.id}", daemon=True).start()
+
+    def _job_done(self, a, returncode):
+        a.returncode = returncode if returncode is not None else -1
+        a.done.set()
+
+    # --- talking to the coordinator ---
+
+    def _flush(self, a):
+        data = a.take()
+        if not data:
+            return
+        try:
+            status, body, _ = self.api.request("POST", f"/jobs/{a.id}/output?worker={quote(self.name)}&offset={a.sent}", data,
+                                               {"Content-Type": "application/octet-stream"})
+        except OSError:
+            with a.lock:
+                a.buffer.insert(0, data)  # retried on the next round
+            return
+        if status == 409:
+            self._lose(a)
+        elif status == 200:
+            a.sent = json.loads(body)["size"]
+
+    def _upload(self, a):
+        for dirpath, _, files in os.walk(a.dir):
+            for name in files:
+                full = os.path.join(dirpath, name)
+                rel = os.path.relpath(full, a.dir)
+                if rel == "targets.txt":
+                    continue
+                with open(full, "rb") as f:
+                    status, _, _ = self.api.request(
+                        "POST", f"/jobs/{a.id}/artifact?worker={quote(self.name)}&name={quote(rel)}", f,
+                        {"Content-Type": "application/octet-stream", "Content-Length": str(os.path.getsize(full))})
+                if status == 409:
+                    raise Conflict(rel)
+                if status != 200:
+                    raise DistError(f"upload of {rel} -> HTTP {status}")
+
+    def _complete(self, a):
+        try:
+            self._flush(a)
+            if a.lost:
+                return
+            self._upload(a)
+            self.api.json("POST", f"/jobs/{a.id}/done", {"worker": self.name, "returncode": a.returncode})
+            self.log(f"job {a.id} done rc={a.returncode}")
+        except Conflict:
+            self._lose(a)
+        except (OSError, DistError) as e:
+            self.log(f"job {a.id}: could not report completion ({e}); retrying")
+            return
+        with self._lock:
+            self.active.pop(a.id, None)
+        shutil.rmtree(a.dir, ignore_errors=True)
+
+    def _lose(self, a):
+        # lease expired or job cancelled on the coordinator: stop working on it
+        if not a.lost:
+            self.log(f"job {a.id}: lease lost, stopping it")
+        a.lost = True
+        a.runner.stop()
+        with self._lock:
+            self.active.pop(a.id, None)
+
+    def _send_loop(self):
+        while not self._stop.is_set():
+            for a in list(self.active.values()):
+                if a.done.is_set():
+                    self._complete(a)
+                else:
+                    self._flush(a)
+            self._stop.wait(SEND_INTERVAL)
+
+    def _heartbeat_loop(self):
+        # the ttl comes with the first lease, so tick often and beat every third of it
+        last = 0.0
+        while not self._stop.wait(0.5):
+            ids = list(self.active)
+            if not ids or time.time() - last < self.lease_ttl / 3:
+                continue
+            last = time.time()
+            try:
+                lost = self.api.json("POST", "/heartbeat", {"worker": self.name, "jobs": ids})["cancel"]
+            except (OSError, DistError) as e:
+                self.log(f"heartbeat failed: {e}")
+                continue
+            for jid in lost:
+                a = self.active.get(jid)
+                if a is not None:
+                    self._lose(a)
+
+
+def follow(api, job_ids, out, note=None, poll=0.5):
+    # stream the output of coordinator jobs until all are final; returns {id: state}
+    note = note or (lambda text: None)
+    offsets = dict.fromkeys(job_ids, 0)
+    attempts = dict.fromkeys(job_ids, 0)
+    states = {}
+    while len(states) < len(job_ids):
+        progressed = False
+        for jid in job_ids:
+            if jid in states:
+                continue
+            status, data, resp = api.request("GET", f"/jobs/{jid}/output?offset={offsets[jid]}")
+            if status != 200:
+                raise DistError(f"job {jid}: HTTP {status}")
+            state = resp.getheader("X-Job-State")
+            attempt = int(resp.getheader("X-Job-Attempt") or 0)
+            if attempt != attempts[jid]:
+                if attempts[jid]:
+                    note(f"[job {jid} rescheduled, attempt {attempt}]")
+                attempts[jid] = attempt
+                offsets[jid] = 0
+                progressed = True
+                continue
+            if data:
+                offsets[jid] += len(data)
+                out(jid, data.decode("utf-8", errors="replace"))
+                progressed = True
+            elif state in _FINAL:
+                states[jid] = state
+        if not progressed:
+            time.sleep(poll)
+    return states
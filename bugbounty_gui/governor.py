@@ -0,0 +1,319 @@
+# governor.py
+# Keeps the runner inside a machine-wide budget. A sampler thread reads CPU time, RSS and open fds of
+# every running job's process tree from /proc. While the budget is (nearly) used up queued jobs are
+# held; when memory or fds run over, the youngest running job is paused with SIGSTOP and continued
+# with SIGCONT once there is room again. With scale_flags the thread/rate flags of known tools are
+# lowered to the share of the budget that is left when a job starts.
+# Only Linux has /proc; elsewhere the governor admits everything and does nothing.
+import os
+import re
+import signal
+import threading
+import time
+
+from procgroup import signal_group
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+DEFAULT_INTERVAL = 1.0
+DEFAULT_FDS = 65536
+DEFAULT_MIN_FREE_MB = 256
+# hold queued jobs once usage reaches this share of any budget; continue paused ones below RESUME_AT
+ADMIT_AT = 0.85
+RESUME_AT = 0.7
+# below this load admissions aren't limited to one sample's worth of jobs (see admit())
+SLOW_START_AT = 0.5
+# scaled flags never go below this share of what the command asked for
+MIN_SCALE = 0.1
+
+# numeric concurrency/rate flags per tool that scale_command() may lower
+SCALABLE_FLAGS = {
+    "httpx": ("-threads", "-t", "-rl", "-rate-limit"),
+    "httpx-toolkit": ("-threads", "-t", "-rl", "-rate-limit"),
+    "masscan": ("--rate", "--max-rate"),
+    "nmap": ("--min-rate", "--max-rate"),
+    "ffuf": ("-t", "-rate"),
+    "subzy": ("--concurrency",),
+    "nuclei": ("-c", "-bs", "-rl", "-rate-limit"),
+    "naabu": ("-c", "-rate"),
+    "dnsx": ("-t", "-rl"),
+    "katana": ("-c", "-p", "-rl"),
+    "arjun": ("-t", "--rate-limit"),
+    "dirsearch": ("-t", "--threads"),
+    "gobuster": ("-t", "--threads"),
+    "feroxbuster": ("-t", "--threads"),
+    "puredns": ("-l", "--rate-limit"),
+    "shuffledns": ("-t",),
+}
+
+
+def proc_available():
+    return os.path.isdir("/proc/self/fd")
+
+
+def process_table():
+    # pid -> (ppid, cpu ticks, rss bytes) for every process we can read
+    table = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        # comm (field 2) may contain spaces and parentheses; the fields after the last ")" are fixed
+        rest = data[data.rindex(b")") + 2:].split()
+        try:
+            table[int(name)] = (int(rest[1]), int(rest[11]) + int(rest[12]), int(rest[21]) * PAGE_SIZE)
+        except (IndexError, ValueError):
+            continue
+    return table
+
+
+def process_tree(pid, children):
+    # pid and all its descendants, parents before children
+    out = [pid]
+    for p in out:
+        out.extend(children.get(p, ()))
+    return out
+
+
+def open_fds(pid):
+    try:
+        return len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        return 0
+
+
+def meminfo():
+    # {"MemTotal": bytes, "MemAvailable": bytes, ...}
+    info = {}
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                parts = value.split()
+                if parts and parts[0].isdigit():
+                    info[key] = int(parts[0]) * (1024 if parts[1:] == ["kB"] else 1)
+    except OSError:
+        pass
+    return info
+
+
+def _fd_budget():
+    try:
+        with open("/proc/sys/fs/file-max") as f:
+            return min(int(f.read()) // 2, DEFAULT_FDS)
+    except (OSError, ValueError):
+        return DEFAULT_FDS
+
+
+def scale_command(cmd, factor, programs):
+    # lower numeric thread/rate flags of the tools in `programs` to factor * value; returns the new command
+    if factor >= 1:
+        return cmd
+    flags = set()
+    for prog in programs:
+        flags.update(SCALABLE_FLAGS.get(prog, ()))
+    if not flags:
+        return cmd
+    pattern = re.compile(r"(?<!\S)(%s)([ =])(\d+)(?!\S)" % "|".join(re.escape(f) for f in sorted(flags, key=len, reverse=True)))
+    factor = max(MIN_SCALE, factor)
+    return pattern.sub(lambda m: f"{m.group(1)}{m.group(2)}{max(1, int(int(m.group(3)) * factor))}", cmd)
+
+
+def _fmt_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+class ResourceGovernor:
+    def __init__(self, runner, cpu=None, rss_mb=None, fds=None, min_free_mb=None, interval=None, scale_flags=False):
+        # cpu: cores the jobs may keep busy (default: all); rss_mb: memory of all job process trees
+        # (default: 80% of RAM); fds: open fds across them; min_free_mb: pause when MemAvailable drops below
+        self.runner = runner
+        mem = meminfo()
+        total = mem.get("MemTotal", 0)
+        self.budget = {
+            "cpu": float(cpu or os.cpu_count() or 1),
+            "rss": float(rss_mb) * 1024 * 1024 if rss_mb else (total * 0.8 or float("inf")),
+            "fds": float(fds or _fd_budget()),
+        }
+        self.min_free = (DEFAULT_MIN_FREE_MB if min_free_mb is None else float(min_free_mb)) * 1024 * 1024
+        self.interval = float(interval or DEFAULT_INTERVAL)
+        self.scale_flags = bool(scale_flags)
+        self.enabled = proc_available()
+        self.usage = {"cpu": 0.0, "rss": 0, "fds": 0}
+        self.mem_available = mem.get("MemAvailable")
+        self.paused = []  # jobs we stopped, oldest pause first
+        self._ticks = {}  # pid -> cpu ticks at the previous sample
+        self._last = None
+        self._pending = 0  # jobs admitted since the last sample (not in usage yet)
+        self._sampled = 0  # jobs the last sample measured
+        self._pressure_at_pause = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        runner.governor = self
+        if self.enabled:
+            threading.Thread(target=self._loop, name="resource-governor", daemon=True).start()
+
+    # --- runner hooks ---
+
+    def _load(self, usage):
+        return max(usage[k] / self.budget[k] for k in self.budget if self.budget[k])
+
+    def admit(self, running):
+        # called by the scheduler before it picks a queued job; running: jobs it is already running
+        if not self.enabled or running == 0:
+            return True  # always let one job run, or nothing would ever free the budget
+        with self._lock:
+            if self.paused:
+                return False
+            # jobs admitted since the sample that already finished don't count (short jobs)
+            pending = min(self._pending, running)
+            # slow start once the budget is filling up: between samples admit at most as many jobs as
+            # were measured, since new jobs only show up in the usage once they have been sampled.
+            # An unloaded box admits freely and relies on the projection below.
+            if self._load(self.usage) >= SLOW_START_AT and pending >= max(1, self._sampled):
+                return False
+            avg = {k: v / max(1, self._sampled) for k, v in self.usage.items()}
+            projected = {k: self.usage[k] + avg[k] * (pending + 1) for k in self.usage}
+            if self._load(projected) >= ADMIT_AT:
+                return False
+            self._pending += 1
+            return True
+
+    def job_starting(self, job):
+        # scale the job's thread/rate flags to what is left of the budget
+        if not self.enabled or not self.scale_flags:
+            return
+        with self._lock:
+            factor = 1.0 - self._load(self.usage)
+        scaled = scale_command(job.cmd, factor, job.categories)
+        if scaled != job.cmd:
+            job.run_cmd = scaled
+            self.runner._emit(f"[throttle] {factor:.0%} of the budget is free, running: {scaled}\n", job)
+
+    def release(self, job):
+        # continue a paused job (before it is terminated, or when it is done)
+        with self._lock:
+            if job not in self.paused:
+                return
+            self.paused.remove(job)
+        self._signal(job, signal.SIGCONT)
+        job.paused = False
+
+    # --- sampling ---
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                self.runner._emit(f"[throttle] sampling failed: {e}\n", None)
+
+    def _running_jobs(self):
+        return [j for j in list(self.runner.jobs.values()) if j.started and not j.done and j.process is not None]
+
+    def _signal(self, job, sig):
+        # the job's process group, plus sampled descendants that moved to a group of their own
+        if job.pgid is not None:
+            signal_group(job.pgid, sig)
+        pids = getattr(job, "_tree", None) or [job.process.pid]
+        if sig == signal.SIGCONT:
+            pids = list(reversed(pids))
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except OSError:
+                pass
+
+    def sample(self):
+        now = time.monotonic()
+        elapsed = (now - self._last) if self._last else self.interval
+        self._last = now
+        jobs = self._running_jobs()
+        table = process_table() if jobs else {}
+        children = {}
+        for pid, (ppid, _, _) in table.items():
+            children.setdefault(ppid, []).append(pid)
+        ticks = {}
+        total = {"cpu": 0.0, "rss": 0, "fds": 0}
+        for job in jobs:
+            root = job.process.pid
+            pids = [p for p in process_tree(root, children) if p in table]
+            used = 0
+            cpu_ticks = 0
+            rss = 0
+            fds = 0
+            for pid in pids:
+                _, t, r = table[pid]
+                ticks[pid] = t
+                used += t - self._ticks.get(pid, 0)  # a new pid counts everything it used so far
+                cpu_ticks += t
+                rss += r
+                fds += open_fds(pid)
+            job._tree = pids or [root]
+            peak = max(rss, (job.usage or {}).get("peak_rss", 0))
+            job.usage = {"cpu": round(used / CLK_TCK / elapsed, 2), "rss": rss, "fds": fds, "procs": len(pids),
+                         "cpu_s": round(cpu_ticks / CLK_TCK, 2), "peak_rss": peak}
+            total["cpu"] += job.usage["cpu"]
+            total["rss"] += rss
+            total["fds"] += fds
+        self._ticks = ticks
+        mem = meminfo()
+        with self._lock:
+            self.usage = total
+            self.mem_available = mem.get("MemAvailable")
+            self._pending = 0
+            self._sampled = len(jobs)
+            self.paused = [j for j in self.paused if not j.done]
+        self._enforce(jobs)
+        if self.runner._queue:
+            self.runner.reschedule()
+
+    def _pressure(self):
+        # share of the memory/fd budget in use; cpu only holds admission, it never pauses anything
+        return max(self.usage["rss"] / self.budget["rss"], self.usage["fds"] / self.budget["fds"])
+
+    def _enforce(self, jobs):
+        low_mem = self.mem_available is not None and self.mem_available < self.min_free
+        pressure = self._pressure()
+        active = [j for j in jobs if j not in self.paused]
+        if (pressure > 1 or low_mem) and len(active) > 1:
+            # pause again only if the jobs still running keep growing after the previous pause
+            if self._pressure_at_pause is None or pressure > self._pressure_at_pause or low_mem:
+                victim = max(active, key=lambda j: j.started)
+                self._pause(victim, "free memory is low" if low_mem else self._describe())
+                self._pressure_at_pause = pressure
+            return
+        if self.paused and ((pressure < RESUME_AT and not low_mem) or not active):
+            job = self.paused[0]
+            self.release(job)
+            self.runner._emit("[throttle] resumed\n", job)
+            self._pressure_at_pause = None if not self.paused else self._pressure_at_pause
+
+    def _describe(self):
+        return (f"jobs use {_fmt_bytes(self.usage['rss'])} of {_fmt_bytes(self.budget['rss'])} RSS, "
+                f"{self.usage['fds']} of {int(self.budget['fds'])} fds")
+
+    def _pause(self, job, reason):
+        with self._lock:
+            self.paused.append(job)
+        job.paused = True
+        self._signal(job, signal.SIGSTOP)
+        self.runner._emit(f"[throttle] paused: {reason}\n", job)
+
+    def status(self):
+        with self._lock:
+            return {"budget": dict(self.budget), "usage": dict(self.usage), "mem_available": self.mem_available,
+                    "paused": [j.id for j in self.paused], "enabled": self.enabled}
+
+    def close(self):
+        self._stop.set()
+        for job in list(self.paused):
+            self.release(job)
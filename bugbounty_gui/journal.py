@@ -0,0 +1,133 @@
+# journal.py
+# Persistent job journal so long multi-target runs survive a crash or a closed window. Every job the
+# runner accepts is appended to a JSONL file when it is queued, when it starts and when it ends (with
+# exit code and artifacts). On the next start, jobs whose last event is "queued" or "running" were
+# interrupted; resume() submits them again with the same key and options, finished jobs are left alone.
+import os
+import json
+import time
+import threading
+
+from workspace import Workspace
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ABANDONED = "abandoned"
+
+# Job attributes needed to submit it again
+_OPTIONS = ("use_pty", "tool", "target", "targets", "raw", "cache_category", "batch", "delta_tool")
+
+
+class JobJournal:
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._fh = open(self.path, "a", encoding="utf-8")
+        if self._fh.tell() and not self._ends_with_newline():
+            self._fh.write("\n")  # a torn last line must not swallow the next record
+            self._fh.flush()
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    # --- runner observer ---
+
+    def job_queued(self, job):
+        if not job.resumable:
+            return
+        rec = {"cmd": job.cmd, "cwd": job.cwd}
+        for name in _OPTIONS:
+            rec[name] = getattr(job, name)
+        ws = job.workspace
+        if ws is not None:
+            rec["workspace"] = {"root": ws.root, "target": ws.target, "run_id": ws.run_id}
+        self._append(QUEUED, job, rec)
+
+    def job_started(self, job):
+        if job.resumable:
+            self._append(RUNNING, job, {"log": job.log_path})
+
+    def job_finished(self, job):
+        if job.resumable:
+            self._append(DONE, job, {"state": job.state, "returncode": job.returncode, "artifacts": job.artifacts,
+                                     "cached": job.cached})
+
+    def _append(self, event, job, fields):
+        rec = {"ev": event, "key": job.key, "t": time.time()}
+        rec.update(fields)
+        line = json.dumps(rec) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+
+    # --- recovery ---
+
+    def _replay(self):
+        # key -> (last event, queued record) in submission order
+        jobs = {}
+        try:
+            f = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return jobs
+        with f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                key = rec.get("key")
+                if rec.get("ev") == QUEUED:
+                    jobs[key] = [QUEUED, rec]
+                elif key in jobs:
+                    jobs[key][0] = rec["ev"]
+                    if rec["ev"] == DONE:
+                        jobs[key][1] = dict(jobs[key][1], **{k: rec[k] for k in ("state", "returncode", "artifacts") if k in rec})
+        return jobs
+
+    def interrupted(self):
+        # queued records of jobs that never reached a final state
+        return [rec for ev, rec in self._replay().values() if ev in (QUEUED, RUNNING)]
+
+    def completed(self):
+        return [rec for ev, rec in self._replay().values() if ev == DONE]
+
+    def resume(self, runner):
+        # submit interrupted jobs again; returns the new Job objects
+        jobs = []
+        for rec in self.interrupted():
+            options = {name: rec.get(name) for name in _OPTIONS}
+            ws = rec.get("workspace")
+            if ws:
+                options["workspace"] = Workspace(ws["root"], ws["target"], ws["run_id"])
+            if rec.get("cwd") and not os.path.isdir(rec["cwd"]):
+                os.makedirs(rec["cwd"], exist_ok=True)
+            jobs.append(runner.submit(rec["cmd"], cwd=rec.get("cwd"), key=rec["key"], **options))
+        return jobs
+
+    def abandon(self):
+        # drop interrupted jobs instead of resuming them
+        now = time.time()
+        with self._lock:
+            for rec in self.interrupted():
+                self._fh.write(json.dumps({"ev": ABANDONED, "key": rec["key"], "t": now}) + "\n")
+            self._fh.flush()
+
+    def compact(self):
+        # rewrite the journal keeping only jobs that are still open
+        with self._lock:
+            keep = [rec for ev, rec in self._replay().values() if ev in (QUEUED, RUNNING)]
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for rec in keep:
+                    f.write(json.dumps(rec) + "\n")
+            self._fh.close()
+            os.replace(tmp, self.path)
+            self._fh = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            self._fh.close()
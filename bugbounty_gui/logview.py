@@ -0,0 +1,273 @@
+# logview.py
+# Line access to job logs of any size, including logs that are still being written, without reading
+# them into memory. LogIndex keeps a sparse index (newlines before the end of every 64KB block, ~256KB
+# for a 2GB log) built by reading the file in a background pass, and serves lines from an mmap, so a
+# line costs a scan of at most one block. LogSearch runs a regex over the file in a worker thread and
+# collects matching line numbers as it goes. Lines are numbered from 0: line n follows the n-th newline.
+#
+#   python logview.py logs/nuclei_example.com_20250812_101500_j3.log "critical|high" -i
+import os
+import re
+import sys
+import mmap
+import time
+import bisect
+import argparse
+import threading
+from array import array
+
+BLOCK = 64 * 1024
+READ_CHUNK = 1024 * 1024  # multiple of BLOCK
+SEARCH_CHUNK = 4 * 1024 * 1024
+MAX_LINE_BYTES = 16 * 1024  # longer lines are cut when displayed
+SCAN_BACK_LINES = 4096  # resolve a line by scanning from the last one looked up if it is at most this far
+
+
+class LogIndex:
+    def __init__(self, path):
+        if path.endswith(".gz"):
+            raise ValueError("compressed logs can't be indexed in place; view them with zcat/zgrep")
+        self.path = path
+        self.generation = 0  # bumped when the file was rotated or truncated and the index started over
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._mm = None
+        self._fh = None
+        self._ino = None
+        self._size = 0  # bytes indexed so far
+        self._counts = array("Q")  # newlines in [0, (k + 1) * BLOCK) for every complete block k
+        self._tail = 0  # newlines in the incomplete last block
+        self._last = (0, 0)  # (line, offset) of the last line looked up
+
+    # --- indexing ---
+
+    def refresh(self):
+        # index whatever the file gained since the last call; True if there are new bytes. The first call
+        # on a big log takes a while (it reads the file once), lines() grows while it runs.
+        with self._refresh_lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return False
+            with self._lock:
+                if self._ino is not None and (st.st_ino != self._ino or st.st_size < self._size):
+                    self._close()
+                    self._reset()
+                    self.generation += 1
+                if st.st_size == self._size:
+                    return False
+                self._remap(st.st_ino, st.st_size)
+                start = len(self._counts) * BLOCK
+            with open(self.path, "rb") as f:
+                size = st.st_size
+                buf = bytearray(READ_CHUNK)
+                f.seek(start)
+                pos = start
+                total = self._counts[-1] if self._counts else 0
+                while size - pos >= BLOCK:
+                    n = f.readinto(memoryview(buf)[:min(READ_CHUNK, (size - pos) // BLOCK * BLOCK)])
+                    if not n:
+                        break
+                    counts = array("Q")
+                    for a in range(0, n - n % BLOCK, BLOCK):
+                        total += buf.count(b"\n", a, a + BLOCK)
+                        counts.append(total)
+                    with self._lock:
+                        # publish complete blocks as they are counted so a huge log shows lines right away
+                        self._counts.extend(counts)
+                        self._tail = 0
+                        self._size = len(self._counts) * BLOCK
+                    pos += len(counts) * BLOCK
+                f.seek(pos)
+                tail = f.read(size - pos)
+            with self._lock:
+                self._tail = tail.count(b"\n")
+                self._size = pos + len(tail)
+            return True
+
+    def _remap(self, ino, size):
+        # map the whole file as it is now; mmap can't grow, so a longer file gets a new map
+        if self._mm is not None and len(self._mm) >= size:
+            return
+        self._close()
+        self._fh = open(self.path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), size, access=mmap.ACCESS_READ)
+        self._ino = ino
+
+    def _close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._fh.close()
+        self._mm = self._fh = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    # --- access ---
+
+    def lines(self):
+        # lines available so far, including a last line that has no newline (yet)
+        with self._lock:
+            n = (self._counts[-1] if self._counts else 0) + self._tail
+            if self._size and self._mm is not None and self._mm[self._size - 1] != 10:
+                n += 1
+            return n
+
+    def size(self):
+        with self._lock:
+            return self._size
+
+    def line(self, n):
+        # bytes of line n without the newline, cut at MAX_LINE_BYTES
+        with self._lock:
+            if self._mm is None:
+                return b""
+            start = self._line_start(n)
+            if start is None or start > self._size:
+                return b""
+            end = self._mm.find(b"\n", start, min(self._size, start + MAX_LINE_BYTES))
+            return self._mm[start:end if end >= 0 else min(self._size, start + MAX_LINE_BYTES)]
+
+    def _line_start(self, n):
+        if n == 0:
+            return 0
+        mm = self._mm
+        last_line, last_off = self._last
+        if last_line <= n <= last_line + SCAN_BACK_LINES:
+            # rows are painted top to bottom: continue from the previous one
+            line, pos = last_line, last_off
+        else:
+            # the block holding the n-th newline, then count newlines from its start
+            k = bisect.bisect_left(self._counts, n)
+            line = self._counts[k - 1] if k else 0
+            pos = k * BLOCK
+        while line < n:
+            i = mm.find(b"\n", pos, self._size)
+            if i < 0:
+                return None
+            pos = i + 1
+            line += 1
+        self._last = (n, pos)
+        return pos
+
+    def text(self, n):
+        return self.line(n).decode("utf-8", errors="replace")
+
+
+class LogSearch:
+    # lines of a log matching a regex, found by a worker thread; poll take() for new matches. start is
+    # (offset, line) of a line start to continue an earlier search at its end (e.g. for a growing log).
+    def __init__(self, path, pattern, ignore_case=False, regex=True, start=(0, 0)):
+        if not regex:
+            pattern = re.escape(pattern)
+        self.regex = re.compile(pattern.encode("utf-8"), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        self.path = path
+        self.pattern = pattern
+        self.matches = array("Q")
+        self.start = start
+        self.end = start  # (offset, line) scanned so far, always at a line start
+        self.total = 0
+        self.done = False
+        self.error = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-search", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.done
+
+    def take(self, first=0):
+        # matches from index `first` on
+        with self._lock:
+            return self.matches[first:]
+
+    def progress(self):
+        with self._lock:
+            return self.end[0], self.total
+
+    def _run(self):
+        try:
+            self._scan()
+        except OSError as e:
+            self.error = str(e)
+        self.done = True
+
+    def _scan(self):
+        search = self.regex.search
+        with open(self.path, "rb") as f:
+            self.total = os.fstat(f.fileno()).st_size
+            offset, line = self.start
+            f.seek(offset)
+            carry = b""
+            while not self._cancel.is_set():
+                chunk = f.read(SEARCH_CHUNK)
+                data = carry + chunk if carry else chunk
+                if not data:
+                    break
+                # only whole lines; the rest waits for the next chunk (or is the last line at EOF)
+                cut = data.rfind(b"\n") + 1 if chunk else len(data)
+                if not cut:
+                    carry = data
+                    continue
+                found = array("Q")
+                pos = 0
+                counted, counted_line = 0, line
+                while pos < cut:
+                    m = search(data, pos, cut)
+                    if m is None or (chunk and m.start() == cut):
+                        break  # an empty match at the cut belongs to the first line of the next chunk
+                    ls = data.rfind(b"\n", 0, m.start()) + 1
+                    counted_line += data.count(b"\n", counted, ls)
+                    counted = ls
+                    found.append(counted_line)
+                    nl = data.find(b"\n", m.start(), cut)
+                    pos = cut if nl < 0 else nl + 1
+                if chunk:
+                    line += data.count(b"\n", 0, cut)
+                    offset += cut
+                    carry = data[cut:]
+                with self._lock:
+                    # at EOF the last line (without newline) is searched, but end stays at its start so a
+                    # continued search reads it again once it is complete
+                    self.matches.extend(found)
+                    self.end = (offset, line)
+                    self.total = max(self.total, offset)
+                if not chunk:
+                    break
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="count or grep lines of a (large) job log")
+    ap.add_argument("path")
+    ap.add_argument("pattern", nargs="?", help="regex; without one only the lines are counted")
+    ap.add_argument("-i", "--ignore-case", action="store_true")
+    ap.add_argument("-F", "--fixed", action="store_true", help="pattern is a plain string")
+    ap.add_argument("-n", "--max", type=int, default=20, help="matching lines to print")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    index = LogIndex(args.path)
+    index.refresh()
+    print(f"{index.lines()} lines, {index.size()} bytes, indexed in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    if args.pattern:
+        t0 = time.perf_counter()
+        search = LogSearch(args.path, args.pattern, ignore_case=args.ignore_case, regex=not args.fixed)
+        search.wait()
+        for n in search.matches[:args.max]:
+            print(f"{n + 1}:{index.text(n)}")
+        print(f"{len(search.matches)} matching lines in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# logwriter.py
+# Streaming log writer for job output. Chunks go straight to disk through a buffered file,
+# so memory stays flat no matter how long a tool runs. Supports size-based rotation and gzip.
+import os
+import gzip
+import time
+import zlib
+
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+DEFAULT_BUFFER = 64 * 1024
+FLUSH_INTERVAL = 1.0  # seconds; bounds how much output a crash can lose
+
+
+def safe_name(text, limit=50):
+    return "".join(c for c in (text or "") if c.isalnum() or c in "._-")[:limit]
+
+
+def log_filename(tool=None, target=None, job_id=None):
+    # e.g. "amass_active_example.com_20250812_101500_j3.log"
+    parts = [safe_name((tool or "command").replace(" ", "_"), 40)]
+    if target:
+        parts.append(safe_name(target, 60))
+    parts.append(time.strftime("%Y%m%d_%H%M%S"))
+    if job_id is not None:
+        parts.append(f"j{job_id}")
+    return "_".join(p for p in parts if p) + ".log"
+
+
+class LogWriter:
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS, compress=False, buffer_size=DEFAULT_BUFFER):
+        # path is the uncompressed name; with compress=True the file on disk gets a .gz suffix
+        self.base_path = path
+        self.max_bytes = max_bytes or 0
+        self.backups = max(0, backups)
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.bytes_written = 0  # total across all segments
+        self._segment_bytes = 0
+        self._last_flush = time.monotonic()
+        self._fh = None
+        self._open()
+
+    @property
+    def path(self):
+        return self._segment_path(0)
+
+    def _segment_path(self, n):
+        name = self.base_path if n == 0 else f"{self.base_path}.{n}"
+        return name + ".gz" if self.compress else name
+
+    def _open(self):
+        raw = open(self.path, "ab", buffering=self.buffer_size)
+        self._fh = gzip.GzipFile(fileobj=raw, mode="ab", compresslevel=6) if self.compress else raw
+        self._raw = raw
+        self._segment_bytes = 0
+
+    def _close_fh(self):
+        if self._fh is None:
+            return
+        self._fh.close()
+        if self._raw is not self._fh:
+            self._raw.close()
+        self._fh = None
+
+    def rotate(self):
+        self._close_fh()
+        if self.backups:
+            oldest = self._segment_path(self.backups)
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for n in range(self.backups - 1, -1, -1):
+                src = self._segment_path(n)
+                if os.path.exists(src):
+                    os.replace(src, self._segment_path(n + 1))
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def write(self, data):
+        if self._fh is None:
+            return
+        if isinstance(data, str):
+            data = data.encode("utf-8", errors="replace")
+        if self.max_bytes and self._segment_bytes and self._segment_bytes + len(data) > self.max_bytes:
+            self.rotate()
+        self._fh.write(data)
+        self._segment_bytes += len(data)
+        self.bytes_written += len(data)
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+            self._last_flush = now
+
+    def flush(self):
+        if self._fh is None:
+            return
+        if self.compress:
+            # sync flush keeps the stream decodable up to this point after a crash
+            self._fh.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            self._fh.flush()
+        self._raw.flush()
+
+    def segments(self):
+        # existing segments, newest first
+        out = []
+        for n in range(self.backups + 1):
+            p = self._segment_path(n)
+            if os.path.exists(p):
+                out.append(p)
+        return out
+
+    def close(self):
+        self._close_fh()
+
+    @property
+    def closed(self):
+        return self._fh is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
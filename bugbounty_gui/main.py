@@ -1,35 +1,348 @@
 # main.py
-import sys, os, json, time, shutil
+import sys, os, json, shutil, threading
+from array import array
 from PySide6 import QtCore, QtGui, QtWidgets
-from commands import COMMANDS
-from runner import CommandRunner
+from commands import COMMANDS, render_command, parse_targets
+from pipeline import PIPELINES
+from assets import KINDS
+from session import Session, load_config, CONFIG_FILE
+from daemon import DaemonClient, RemoteSession, DaemonError
+from outputbuffer import OutputHub, DEFAULT_JOB_CAP, DEFAULT_FRAME_BUDGET
+from logview import LogIndex, LogSearch
 
 APP_TITLE = "Recon to Master — Bug Bounty GUI (Upgraded)"
-CONFIG_FILE = "config.json"
+DEFAULT_SCROLLBACK = 10000  # lines kept in the output pane
+DEFAULT_OUTPUT_FPS = 30
+JOBS_REFRESH_MS = 1000
+MAX_JOB_ROWS = 5000
+LOG_VIEW_POLL_MS = 250
 
 class IconDelegate(QtWidgets.QStyledItemDelegate):
     # optional custom delegate to show icons (no-op for now)
     pass
 
+class AssetsDialog(QtWidgets.QDialog):
+    # query the asset store: e.g. live hosts of a target not yet scanned by nuclei
+    MAX_SHOWN = 50000
+
+    def __init__(self, store, parent=None, target=None):
+        super().__init__(parent)
+        self.store = store
+        self.setWindowTitle("Assets")
+        self.resize(700, 500)
+        layout = QtWidgets.QVBoxLayout(self)
+        form = QtWidgets.QHBoxLayout()
+        self.target_combo = QtWidgets.QComboBox()
+        self.target_combo.setEditable(True)
+        self.target_combo.addItems(store.targets())
+        if target:
+            self.target_combo.setCurrentText(target)
+        self.kind_combo = QtWidgets.QComboBox()
+        self.kind_combo.addItems(KINDS)
+        self.tool_input = QtWidgets.QLineEdit()
+        self.tool_input.setPlaceholderText("not yet scanned by (tool)")
+        query_btn = QtWidgets.QPushButton("Query")
+        query_btn.clicked.connect(self.refresh)
+        export_btn = QtWidgets.QPushButton("Export…")
+        export_btn.clicked.connect(self.export)
+        for w in (self.target_combo, self.kind_combo, self.tool_input, query_btn, export_btn):
+            form.addWidget(w)
+        layout.addLayout(form)
+        self.summary = QtWidgets.QLabel()
+        layout.addWidget(self.summary)
+        self.results = QtWidgets.QPlainTextEdit()
+        self.results.setReadOnly(True)
+        layout.addWidget(self.results, 1)
+        self.values = []
+        self.refresh()
+
+    def refresh(self):
+        target = self.target_combo.currentText().strip()
+        if not target:
+            return
+        kind = self.kind_combo.currentText()
+        tool = self.tool_input.text().strip()
+        self.values = self.store.unscanned(target, kind, tool) if tool else self.store.query(target, kind)
+        counts = ", ".join(f"{k}: {n}" for _, k, n in self.store.counts(target))
+        self.summary.setText(f"{len(self.values)} result(s)   [{counts}]")
+        self.results.setPlainText("\n".join(self.values[:self.MAX_SHOWN]))
+
+    def export(self):
+        fn, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export assets", f"{self.kind_combo.currentText()}.txt")
+        if fn:
+            self.store.export(fn, self.values)
+
+
+class JobsModel(QtCore.QAbstractTableModel):
+    # rows of Job.metrics() dicts; DisplayRole is formatted, UserRole is the raw value the proxy sorts on
+    COLUMNS = [("id", "Job"), ("tool", "Tool"), ("target", "Target"), ("state", "State"), ("returncode", "RC"),
+               ("wall_s", "Wall s"), ("cpu_s", "CPU s"), ("user_s", "User s"), ("sys_s", "Sys s"),
+               ("max_rss_kb", "Peak RSS MB"), ("bytes_out", "Output"), ("lines_out", "Lines"),
+               ("lines_per_s", "Lines/s"), ("ttfo_s", "First output s"), ("queued_s", "Queued s")]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self._index = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.COLUMNS[section][1]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self.COLUMNS[index.column()][0]
+        value = self.rows[index.row()].get(key)
+        if role == QtCore.Qt.UserRole:
+            return value if value is not None else -1
+        if role == QtCore.Qt.TextAlignmentRole and key not in ("tool", "target", "state"):
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        if role != QtCore.Qt.DisplayRole or value is None:
+            return None
+        if key == "max_rss_kb":
+            return f"{value / 1024:.0f}"
+        if key == "bytes_out":
+            for unit in ("B", "KB", "MB"):
+                if value < 1024:
+                    return f"{value:.0f} {unit}"
+                value /= 1024
+            return f"{value:.1f} GB"
+        if isinstance(value, float):
+            return f"{value:.2f}"
+        return str(value)
+
+    def update(self, metrics):
+        if len(self._index) + len(metrics) > MAX_JOB_ROWS * 2:
+            self.beginResetModel()
+            self.rows = []
+            self._index = {}
+            self.endResetModel()
+        new = []
+        for m in metrics:
+            row = self._index.get(m["id"])
+            if row is None:
+                new.append(m)
+            else:
+                self.rows[row] = m
+        if self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, len(self.COLUMNS) - 1))
+        if new:
+            first = len(self.rows)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(new) - 1)
+            for i, m in enumerate(new):
+                self._index[m["id"]] = first + i
+            self.rows.extend(new)
+            self.endInsertRows()
+
+
+class LogLinesModel(QtCore.QAbstractListModel):
+    # lines of a logview.LogIndex, or only the line numbers in `matches` while a filter is set; a line is
+    # read from the mapped log when the view paints its row, nothing else is kept in memory
+    def __init__(self, log, parent=None):
+        super().__init__(parent)
+        self.log = log
+        self.matches = None
+        self._count = 0
+        self.generation = log.generation
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def line_number(self, row):
+        return self.matches[row] if self.matches is not None else row
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.DisplayRole:
+            return None
+        n = self.line_number(index.row())
+        return f"{n + 1:>9}  {self.log.text(n)}"
+
+    def set_matches(self, matches):
+        self.beginResetModel()
+        self.matches = matches
+        self._count = len(matches) if matches is not None else self.log.lines()
+        self.generation = self.log.generation
+        self.endResetModel()
+
+    def add_matches(self, found):
+        # a continued search starts at the last (then incomplete) line, which may already be listed
+        if self.matches and found and found[0] == self.matches[-1]:
+            found = found[1:]
+        self.matches.extend(found)
+
+    def sync(self):
+        # show rows the log (or the running search) gained since the last call
+        if self.log.generation != self.generation:
+            self.set_matches(None if self.matches is None else array("Q"))
+            return
+        total = len(self.matches) if self.matches is not None else self.log.lines()
+        if total <= self._count:
+            return
+        if self._count and self.matches is None:
+            last = self.index(self._count - 1)
+            self.dataChanged.emit(last, last)  # was possibly a line still being written
+        self.beginInsertRows(QtCore.QModelIndex(), self._count, total - 1)
+        self._count = total
+        self.endInsertRows()
+
+
+class LogViewer(QtWidgets.QDialog):
+    # one log from disk: lines are indexed in a background thread and only visible rows are read; the
+    # filter runs as a logview.LogSearch whose matches are shown while it scans. Follow keeps up with a
+    # log that is still being written.
+    def __init__(self, path, parent=None, title=None):
+        super().__init__(parent)
+        self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        self.path = path
+        self.log = LogIndex(path)
+        self.search = None
+        self._taken = 0
+        self._filter = None
+        self._indexer = None
+        self.setWindowTitle(title or os.path.basename(path))
+        self.resize(1000, 650)
+        layout = QtWidgets.QVBoxLayout(self)
+        bar = QtWidgets.QHBoxLayout()
+        self.filter_input = QtWidgets.QLineEdit()
+        self.filter_input.setPlaceholderText("Filter lines (Enter to apply)")
+        self.filter_input.returnPressed.connect(self.apply_filter)
+        self.regex_box = QtWidgets.QCheckBox("Regex")
+        self.regex_box.setChecked(True)
+        self.case_box = QtWidgets.QCheckBox("Ignore case")
+        self.follow_box = QtWidgets.QCheckBox("Follow")
+        self.follow_box.setChecked(True)
+        for box in (self.regex_box, self.case_box):
+            box.toggled.connect(lambda _: self.apply_filter())
+        for w in (self.filter_input, self.regex_box, self.case_box, self.follow_box):
+            bar.addWidget(w)
+        layout.addLayout(bar)
+        self.model = LogLinesModel(self.log, self)
+        self.view = QtWidgets.QListView()
+        self.view.setUniformItemSizes(True)  # row heights are never measured, so millions of rows stay cheap
+        self.view.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.view.setModel(self.model)
+        layout.addWidget(self.view, 1)
+        copy = QtGui.QShortcut(QtGui.QKeySequence.Copy, self.view)
+        copy.activated.connect(self.copy_selection)
+        self.status = QtWidgets.QLabel()
+        layout.addWidget(self.status)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(LOG_VIEW_POLL_MS)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start()
+        self._start_indexer()
+
+    def _start_indexer(self):
+        if self._indexer is None or not self._indexer.is_alive():
+            self._indexer = threading.Thread(target=self.log.refresh, name="log-index", daemon=True)
+            self._indexer.start()
+
+    def apply_filter(self):
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
+        text = self.filter_input.text()
+        if not text:
+            self._filter = None
+            self.model.set_matches(None)
+            return
+        self._filter = (text, self.case_box.isChecked(), self.regex_box.isChecked())
+        try:
+            self.search = LogSearch(self.path, text, ignore_case=self._filter[1], regex=self._filter[2])
+        except Exception as e:  # re.error
+            self._filter = None
+            self.status.setText(f"invalid pattern: {e}")
+            return
+        self._taken = 0
+        self.model.set_matches(array("Q"))
+
+    def poll(self):
+        follow = self.follow_box.isChecked()
+        if follow:
+            self._start_indexer()
+        if self.log.generation != self.model.generation and self._filter is not None:
+            self.apply_filter()  # the log was rotated: search the new one from the start
+        bar = self.view.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 2
+        if self.search is not None:
+            found = self.search.take(self._taken)
+            self._taken += len(found)
+            if found:
+                self.model.add_matches(found)
+            if self.search.done and follow and self.log.size() > self.search.end[0]:
+                text, ignore_case, regex = self._filter
+                self.search = LogSearch(self.path, text, ignore_case=ignore_case, regex=regex, start=self.search.end)
+                self._taken = 0
+        self.model.sync()
+        if follow and at_bottom:
+            self.view.scrollToBottom()
+        self._show_status()
+
+    def _show_status(self):
+        parts = [f"{self.log.lines():,} lines, {self.log.size() / 1048576:.1f} MB"]
+        if self._indexer is not None and self._indexer.is_alive():
+            parts.append("indexing…")
+        if self.search is not None:
+            done, total = self.search.progress()
+            parts.append(f"{self.model.rowCount():,} matching lines")
+            if not self.search.done:
+                parts.append(f"searching {done * 100 // max(1, total)}%")
+            elif self.search.error:
+                parts.append(f"search failed: {self.search.error}")
+        self.status.setText("   ".join(parts))
+
+    def copy_selection(self):
+        rows = sorted(i.row() for i in self.view.selectionModel().selectedIndexes())
+        text = "\n".join(self.log.text(self.model.line_number(r)) for r in rows)
+        QtWidgets.QApplication.clipboard().setText(text)
+
+    def done(self, result):
+        self.timer.stop()
+        if self.search is not None:
+            self.search.cancel()
+        self.log.close()
+        super().done(result)
+
+
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle(APP_TITLE)
         self.resize(1200, 750)
         self.logs_dir = os.path.join(os.getcwd(), "logs")
-        os.makedirs(self.logs_dir, exist_ok=True)
         self.config = self.load_config()
-        self.runner = CommandRunner(on_output=self.append_output, on_finished=self.on_cmd_finished, logs_dir=self.logs_dir)
+        self.output_hub = OutputHub(job_cap=self.config.get("output_buffer_chars", DEFAULT_JOB_CAP))
+        self._last_output_job = None
+        # runner, cache, assets, journal and workspaces live in the session (session.py); with
+        # "daemon_socket" set (true for the default path) the GUI attaches to a running daemon instead
+        self.session = self._attach_daemon() or Session(self.config, on_output=self.append_output,
+                                                        on_finished=self.on_cmd_finished, logs_dir=self.logs_dir)
+        self.assets = self.session.assets
         self._build_ui()
+        QtCore.QTimer.singleShot(0, self.offer_resume)
+
+    def _attach_daemon(self):
+        sock = self.config.get("daemon_socket")
+        if not sock:
+            return None
+        client = DaemonClient(None if sock is True else sock)
+        try:
+            return RemoteSession(client, self.config, on_output=self.append_output, on_finished=self.on_cmd_finished)
+        except (DaemonError, OSError) as e:
+            print(f"[daemon] not attached ({e}); running jobs in this process", file=sys.stderr)
+            return None
 
     def load_config(self):
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, "r") as f:
-                    return json.load(f)
-            except Exception:
-                return {}
-        return {}
+        return load_config(CONFIG_FILE)
 
     def save_config(self):
         with open(CONFIG_FILE, "w") as f:
@@ -58,6 +371,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.pty_toggle.setChecked(True)
         top_row.addWidget(self.pty_toggle)
 
+        self.refresh_toggle = QtWidgets.QCheckBox("Force refresh")
+        self.refresh_toggle.setToolTip("Ignore cached results of passive sources and query them again")
+        top_row.addWidget(self.refresh_toggle)
+
+        self.delta_toggle = QtWidgets.QCheckBox("New assets only")
+        self.delta_toggle.setToolTip("Feed nuclei batch, naabu, subzy and dirsearch deep only hosts/URLs earlier runs did not give them")
+        self.delta_toggle.setChecked(bool(self.config.get("delta_mode", False)))
+        top_row.addWidget(self.delta_toggle)
+
         main_layout.addLayout(top_row)
 
         splitter = QtWidgets.QSplitter()
@@ -91,8 +413,18 @@ class MainWindow(QtWidgets.QMainWindow):
 
         form = QtWidgets.QFormLayout()
         self.target_input = QtWidgets.QLineEdit()
-        self.target_input.setPlaceholderText("example.com or comma-separated targets")
-        form.addRow("Target(s):", self.target_input)
+        self.target_input.setPlaceholderText("example.com, comma-separated targets or @/path/to/targets.txt")
+        target_row = QtWidgets.QHBoxLayout()
+        target_row.addWidget(self.target_input, 1)
+        self.load_targets_btn = QtWidgets.QPushButton("Load...")
+        self.load_targets_btn.setToolTip("Use a file with one target per line")
+        self.load_targets_btn.clicked.connect(self.load_targets)
+        target_row.addWidget(self.load_targets_btn)
+        self.batch_toggle = QtWidgets.QCheckBox("Batch")
+        self.batch_toggle.setToolTip("Run tools that accept a target list once per shard of targets instead of once per target")
+        self.batch_toggle.setChecked(True)
+        target_row.addWidget(self.batch_toggle)
+        form.addRow("Target(s):", target_row)
         self.extra_input = QtWidgets.QLineEdit()
         self.extra_input.setPlaceholderText("Extra placeholders (json) e.g. {\"cidr\":\"1.2.3.0/24\"}")
         form.addRow("Extras:", self.extra_input)
@@ -107,10 +439,29 @@ class MainWindow(QtWidgets.QMainWindow):
         self.run_btn.clicked.connect(self.run_command)
         self.copy_btn = QtWidgets.QPushButton("Copy")
         self.copy_btn.clicked.connect(self.copy_command)
-        self.stop_btn = QtWidgets.QPushButton("Stop")
+        self.stop_btn = QtWidgets.QPushButton("Stop all")
+        self.stop_btn.setToolTip("Cancel queued jobs and stop every running job with all processes it started;\n"
+                                 "single jobs can be stopped from the Jobs tab")
         self.stop_btn.clicked.connect(self.stop_command)
+        self.pipeline_combo = QtWidgets.QComboBox()
+        self.pipeline_combo.addItems(sorted(PIPELINES))
+        self.pipeline_btn = QtWidgets.QPushButton("Run pipeline")
+        self.pipeline_btn.clicked.connect(self.run_pipeline)
         btn_row.addWidget(self.run_btn)
         btn_row.addWidget(self.copy_btn)
+        btn_row.addWidget(self.pipeline_combo)
+        btn_row.addWidget(self.pipeline_btn)
+        self.new_run_btn = QtWidgets.QPushButton("New run")
+        self.new_run_btn.setToolTip("Start a new run: later commands write into fresh per-target workspaces")
+        self.new_run_btn.clicked.connect(self.new_run)
+        btn_row.addWidget(self.new_run_btn)
+        self.assets_btn = QtWidgets.QPushButton("Assets")
+        self.assets_btn.clicked.connect(self.show_assets)
+        btn_row.addWidget(self.assets_btn)
+        self.logs_btn = QtWidgets.QPushButton("Logs…")
+        self.logs_btn.setToolTip("Open a job log in a viewer that pages it from disk, with background filtering")
+        self.logs_btn.clicked.connect(lambda: self.open_log())
+        btn_row.addWidget(self.logs_btn)
         btn_row.addWidget(self.stop_btn)
         right_layout.addLayout(btn_row)
 
@@ -127,8 +478,38 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.output = QtWidgets.QPlainTextEdit()
         self.output.setReadOnly(True)
-        right_layout.addWidget(QtWidgets.QLabel("Output:"))
-        right_layout.addWidget(self.output, 1)
+        self.output.setMaximumBlockCount(int(self.config.get("scrollback_lines", DEFAULT_SCROLLBACK)))
+        self.output.setUndoRedoEnabled(False)
+        # runner output is coalesced in output_hub and drained here at a fixed frame rate
+        self.output_timer = QtCore.QTimer(self)
+        self.output_timer.setInterval(max(1, 1000 // int(self.config.get("output_fps", DEFAULT_OUTPUT_FPS))))
+        self.output_timer.timeout.connect(self._drain_output)
+        self.output_timer.start()
+        # Jobs tab: per-job telemetry (wall/CPU time, peak RSS, output volume), sortable by any column
+        self.jobs_model = JobsModel(self)
+        jobs_proxy = QtCore.QSortFilterProxyModel(self)
+        jobs_proxy.setSourceModel(self.jobs_model)
+        jobs_proxy.setSortRole(QtCore.Qt.UserRole)
+        self.jobs_view = QtWidgets.QTableView()
+        self.jobs_view.setModel(jobs_proxy)
+        self.jobs_view.setSortingEnabled(True)
+        self.jobs_view.sortByColumn(0, QtCore.Qt.DescendingOrder)
+        self.jobs_view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.jobs_view.verticalHeader().setVisible(False)
+        self.jobs_view.horizontalHeader().setStretchLastSection(True)
+        self.jobs_view.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.jobs_view.customContextMenuRequested.connect(self.jobs_menu)
+        self.jobs_view.doubleClicked.connect(
+            lambda index: self.open_job_log(self.jobs_view.model().data(index.siblingAtColumn(0), QtCore.Qt.UserRole)))
+        self.output_tabs = QtWidgets.QTabWidget()
+        self.output_tabs.addTab(self.output, "Output")
+        self.output_tabs.addTab(self.jobs_view, "Jobs")
+        self.output_tabs.currentChanged.connect(lambda i: self.refresh_jobs())
+        self.jobs_timer = QtCore.QTimer(self)
+        self.jobs_timer.setInterval(JOBS_REFRESH_MS)
+        self.jobs_timer.timeout.connect(self.refresh_jobs)
+        self.jobs_timer.start()
+        right_layout.addWidget(self.output_tabs, 1)
 
         splitter.addWidget(right_widget)
         splitter.setSizes([200, 300, 700])
@@ -199,69 +580,200 @@ class MainWindow(QtWidgets.QMainWindow):
         if not cmd_template:
             QtWidgets.QMessageBox.warning(self, "No command", "No command to run. Select a tool and target first.")
             return
-        targets = self.target_input.text().strip()
-        extras_txt = self.extra_input.text().strip()
-        extras = {}
-        if extras_txt:
-            try:
-                extras = json.loads(extras_txt)
-            except Exception as e:
-                QtWidgets.QMessageBox.warning(self, "Extras parse error", f"Extras must be JSON. Error: {e}")
-                return
+        targets = self.parse_targets()
+        extras = self.parse_extras()
+        if targets is None or extras is None:
+            return
         # simple replacement logic
-        cmd = cmd_template
-        if "{target}" in cmd and not targets:
+        if "{target}" in cmd_template and not targets:
             QtWidgets.QMessageBox.warning(self, "Missing target", "Command requires {target}. Please provide a target.")
             return
-        if targets:
-            # replace for single target only in preview; for list execution we will run per target
-            single = targets.split(",")[0].strip()
-            cmd = cmd.replace("{target}", single)
-        for k,v in extras.items():
-            cmd = cmd.replace("{" + k + "}", str(v))
+        # replace for single target only in preview; for list execution we will run per target or per shard
+        single = targets[0] if targets else None
+        mode, plan_cmd = self.session.plan(cmd_template, targets, self.batch_toggle.isChecked())
+        if mode == "batch":
+            shard = self.session.batch_size
+            shards = (len(targets) + shard - 1) // shard
+            question = f"Run the following command for {len(targets)} targets in {shards} batch(es)?\n\n{render_command(plan_cmd, None, extras)}"
+        elif mode == "each":
+            question = f"Run the following command once for each of {len(targets)} targets?\n\n{render_command(cmd_template, single, extras)}"
+        else:
+            question = f"Run the following command?\n\n{render_command(cmd_template, single, extras)}"
         # confirm
-        reply = QtWidgets.QMessageBox.question(self, "Confirm Run", f"Run the following command?\n\n{cmd}", QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
+        reply = QtWidgets.QMessageBox.question(self, "Confirm Run", question, QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
         if reply != QtWidgets.QMessageBox.Yes:
             return
-        # run per-target if comma-separated and if template contains {target}
-        run_in_terminal = self.terminal_toggle.isChecked()
-        use_pty = self.pty_toggle.isChecked()
-        if "{target}" in cmd_template and targets and "," in targets:
-            self.output.appendPlainText(f"[runner] launching for multiple targets: {targets}\\n")
-            for t in [x.strip() for x in targets.split(",") if x.strip()]:
-                c = cmd_template.replace("{target}", t)
-                for k,v in extras.items():
-                    c = c.replace("{" + k + "}", str(v))
-                self.output.appendPlainText(f"$ {c}\\n")
-                self.runner.run(c, use_pty=use_pty, run_in_terminal=run_in_terminal)
-                time.sleep(0.1)
-        else:
-            self.output.appendPlainText(f"$ {cmd}\\n")
-            self.runner.run(cmd, use_pty=use_pty, run_in_terminal=run_in_terminal)
+        try:
+            self.session.submit(cmd_template, targets, extras, use_pty=self.pty_toggle.isChecked(),
+                                run_in_terminal=self.terminal_toggle.isChecked(), tool=self.current_tool_name(),
+                                category=self.current_category_name(), refresh=self.refresh_toggle.isChecked(),
+                                batch=self.batch_toggle.isChecked(), delta=self.delta_toggle.isChecked(),
+                                note=self.output.appendPlainText)
+        except DaemonError as e:
+            QtWidgets.QMessageBox.warning(self, "Daemon", str(e))
+        self.status.showMessage(f"{self.session.active_count()} job(s) queued/running")
+
+    def parse_targets(self):
+        try:
+            return parse_targets(self.target_input.text())
+        except OSError as e:
+            QtWidgets.QMessageBox.warning(self, "Targets", f"Could not read target list: {e}")
+            return None
+
+    def load_targets(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Target list", os.getcwd(), "Text files (*.txt *.lst);;All files (*)")
+        if path:
+            self.target_input.setText("@" + path)
+
+    def show_assets(self):
+        targets = self.parse_targets() or []
+        AssetsDialog(self.assets, self, targets[0] if targets else None).exec()
+
+    def offer_resume(self):
+        pending = self.session.interrupted()
+        if pending:
+            targets = sorted({rec.get("target") or "-" for rec in pending})
+            reply = QtWidgets.QMessageBox.question(
+                self, "Resume", f"{len(pending)} job(s) from a previous session did not finish "
+                f"({', '.join(targets[:5])}{' ...' if len(targets) > 5 else ''}).\n\nQueue them again?",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
+            if reply == QtWidgets.QMessageBox.Yes:
+                jobs = self.session.resume()
+                self.output.appendPlainText(f"[journal] resumed {len(jobs)} interrupted job(s)")
+                self.status.showMessage(f"{self.session.active_count()} job(s) queued/running")
+            else:
+                self.session.abandon()
+        if isinstance(self.session, Session):
+            self.session.journal.compact()
+
+    def new_run(self):
+        run_id = self.session.new_run()
+        self.status.showMessage(f"New run {run_id}: workspaces under {self.session.workspaces_dir}")
+
+    def parse_extras(self):
+        extras_txt = self.extra_input.text().strip()
+        if not extras_txt:
+            return {}
+        try:
+            return json.loads(extras_txt)
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, "Extras parse error", f"Extras must be JSON. Error: {e}")
+            return None
+
+    def run_pipeline(self):
+        name = self.pipeline_combo.currentText()
+        targets = self.parse_targets()
+        extras = self.parse_extras()
+        if not name or targets is None or extras is None:
+            return
+        if not targets:
+            QtWidgets.QMessageBox.warning(self, "Missing target", "Pipelines need at least one target.")
+            return
+        pipeline = PIPELINES[name]
+        stages = ", ".join(st.name for st in pipeline.stages)
+        reply = QtWidgets.QMessageBox.question(self, "Confirm Pipeline", f"Run pipeline '{name}' ({stages}) for:\n\n{', '.join(targets[:10])}"
+                                               + (f" and {len(targets) - 10} more" if len(targets) > 10 else ""), QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
+        if reply != QtWidgets.QMessageBox.Yes:
+            return
+        on_event = lambda label, stage, state, msg: self.output_hub.push(0, f"[pipeline {label}] {stage}: {state} {msg}\n")
+        try:
+            self.session.start_pipeline(name, targets, extras=extras, on_event=on_event, note=self.output.appendPlainText)
+        except DaemonError as e:
+            QtWidgets.QMessageBox.warning(self, "Daemon", str(e))
 
     def copy_command(self):
         clipboard = QtWidgets.QApplication.clipboard()
         clipboard.setText(self.command_preview.toPlainText())
 
+    def current_category_name(self):
+        cat_item = self.cat_list.currentItem()
+        return cat_item.text() if cat_item else None
+
+    def current_tool_name(self):
+        tool_item = self.tool_list.currentItem()
+        return tool_item.text() if tool_item else None
+
     def stop_command(self):
-        self.runner.stop()
+        self.session.stop()
 
-    def append_output(self, data):
-        # called from runner thread; use invokeMethod to update GUI thread
-        QtCore.QMetaObject.invokeMethod(self, "_append", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, data))
+    def refresh_jobs(self):
+        if self.output_tabs.currentWidget() is self.jobs_view:
+            self.jobs_model.update(self.session.job_metrics(MAX_JOB_ROWS))
 
-    @QtCore.Slot(str)
-    def _append(self, data):
-        self.output.moveCursor(QtGui.QTextCursor.End)
-        self.output.insertPlainText(data)
-        self.output.moveCursor(QtGui.QTextCursor.End)
+    def jobs_menu(self, pos):
+        index = self.jobs_view.indexAt(pos)
+        if not index.isValid():
+            return
+        model = self.jobs_view.model()
+        rows = self.jobs_view.selectionModel().selectedRows() or [index]
+        job_ids = [model.data(r.siblingAtColumn(0), QtCore.Qt.UserRole) for r in rows]
+        menu = QtWidgets.QMenu(self)
+        stop = menu.addAction(f"Stop job {job_ids[0]}" if len(job_ids) == 1 else f"Stop {len(job_ids)} selected jobs")
+        stop_all = menu.addAction("Stop all jobs")
+        menu.addSeparator()
+        open_log = menu.addAction(f"Open log of job {job_ids[0]}")
+        chosen = menu.exec(self.jobs_view.viewport().mapToGlobal(pos))
+        if chosen is open_log:
+            self.open_job_log(job_ids[0])
+        elif chosen is stop:
+            for job_id in job_ids:
+                self.session.stop(job_id)
+        elif chosen is stop_all:
+            self.session.stop()
+
+    def open_job_log(self, job_id):
+        path = self.session.log_path(job_id)
+        if not path:
+            QtWidgets.QMessageBox.information(self, "Log", f"Job {job_id} has no log (yet).")
+            return
+        self.open_log(path, f"Job {job_id} — {os.path.basename(path)}")
 
-    def on_cmd_finished(self, code):
+    def open_log(self, path=None, title=None):
+        if path is None:
+            path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Open log", self.logs_dir, "Logs (*.log *.log.*);;All files (*)")
+            if not path:
+                return
+        try:
+            LogViewer(path, self, title).show()
+        except (ValueError, OSError) as e:
+            QtWidgets.QMessageBox.warning(self, "Log", str(e))
+
+    def append_output(self, data, job=None):
+        # called from runner threads; buffered and picked up by _drain_output on the GUI thread
+        self.output_hub.push(job.id if job else 0, data)
+
+    def _drain_output(self):
+        batches = self.output_hub.drain(int(self.config.get("output_frame_chars", DEFAULT_FRAME_BUDGET)))
+        if not batches:
+            return
+        parts = []
+        for job_id, text, dropped in batches:
+            if job_id != self._last_output_job:
+                parts.append(f"\n── job {job_id} ──\n" if job_id else "\n")
+                self._last_output_job = job_id
+            if dropped:
+                parts.append(f"[... {dropped} chars dropped, output faster than the UI; see the job log ...]\n")
+            parts.append(text)
+        self._append("".join(parts))
+
+    def _append(self, data):
+        bar = self.output.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 4
+        cursor = QtGui.QTextCursor(self.output.document())
+        cursor.movePosition(QtGui.QTextCursor.End)
+        cursor.insertText(data)
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+    def on_cmd_finished(self, code, job=None):
+        # goes through the hub so it lands after the job's remaining output
+        label = f"Job {job.id}" if job else "Process"
+        self.output_hub.push(job.id if job else 0, f"\n[{label} exited with code {code}]\n")
         QtCore.QMetaObject.invokeMethod(self, "_finished", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(int, code))
 
     @QtCore.Slot(int)
     def _finished(self, code):
-        self.output.appendPlainText(f"\\n[Process exited with code {code}]\\n")
+        self.status.showMessage(f"{self.session.active_count()} job(s) queued/running")
 
     def apply_dark_theme(self):
         palette = QtGui.QPalette()
@@ -0,0 +1,254 @@
+# merge.py
+# Streaming merge/dedupe for subdomain and URL lists. Inputs are read line by line and normalized
+# (case, trailing dots, wildcards, schemes/ports); unique keys are held in a memory-bounded set that
+# spills to sorted run files on disk, and the runs are k-way merged into one sorted output.
+# merge_into() adds new inputs to an existing merged file without re-reading the old inputs.
+#
+#   python3 merge.py --kind host -o final.txt subfinder.txt amass.txt crtsh.txt
+#   python3 merge.py --kind url --into allurls.txt --new-out new_urls.txt gau.txt katana.txt
+import os
+import sys
+import re
+import heapq
+import argparse
+import tempfile
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_MEMORY = 64 * 1024 * 1024  # approximate bytes of keys held before spilling a run
+_ITEM_OVERHEAD = 80                # rough per-entry cost of a str in a set
+
+
+def normalize_host(line):
+    # "*.Foo.Example.com." / "https://foo.example.com:443/x" -> "foo.example.com"
+    s = line.strip().lower()
+    if not s or s.startswith("#"):
+        return None
+    if "://" in s:
+        s = s.split("://", 1)[1]
+    s = s.split("/", 1)[0].split("?", 1)[0]
+    if "@" in s:
+        s = s.rsplit("@", 1)[1]
+    if s.startswith("["):
+        return None  # IPv6 literal, not a hostname
+    s = s.split(":", 1)[0]
+    while s.startswith("*."):
+        s = s[2:]
+    s = s.strip(".")
+    if not s or " " in s or "\t" in s or "*" in s or "." not in s:
+        return None
+    return s
+
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# common shape: scheme://host[:port][/rest] without userinfo or IPv6 literals
+_SIMPLE_URL = re.compile(r"([A-Za-z][A-Za-z0-9+.-]*)://([A-Za-z0-9._-]+)(?::(\d+))?([/?#].*)?\Z", re.S)
+
+
+def normalize_url(line):
+    # lowercase scheme and host, drop default ports, fragments and trailing dots on the host
+    s = line.strip()
+    if not s or " " in s:
+        return None
+    if "://" not in s:
+        s = "http://" + s
+    m = _SIMPLE_URL.match(s)
+    if m:
+        scheme, host, port, rest = m.groups()
+        scheme = scheme.lower()
+        host = host.lower().rstrip(".")
+        if not host:
+            return None
+        if port and int(port) != _DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{int(port)}"
+        rest = (rest or "").split("#", 1)[0]
+        if not rest.startswith("/"):
+            rest = "/" + rest
+        return f"{scheme}://{host}{rest}"
+    try:
+        parts = urlsplit(s)
+        host = parts.hostname
+        port = parts.port
+    except ValueError:
+        return None
+    if not host:
+        return None
+    scheme = parts.scheme.lower()
+    host = host.rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = host if port is None or port == _DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    if parts.username:
+        netloc = parts.username + (":" + parts.password if parts.password else "") + "@" + netloc
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def normalize_raw(line):
+    s = line.strip()
+    return s or None
+
+
+NORMALIZERS = {"host": normalize_host, "url": normalize_url, "raw": normalize_raw}
+
+
+def _iter_lines(paths):
+    for p in paths:
+        with open(p, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                yield line
+
+
+def _iter_file(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+class ExternalDedupe:
+    def __init__(self, memory_limit=DEFAULT_MEMORY, tmpdir=None):
+        self.memory_limit = memory_limit
+        self.tmpdir = tmpdir
+        self.runs = []
+        self._set = set()
+        self._mem = 0
+
+    def add(self, key):
+        if key in self._set:
+            return
+        self._set.add(key)
+        self._mem += len(key) + _ITEM_OVERHEAD
+        if self._mem >= self.memory_limit:
+            self._spill()
+
+    def _spill(self):
+        fd, path = tempfile.mkstemp(prefix="merge-run-", suffix=".txt", dir=self.tmpdir)
+        with os.fdopen(fd, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+            f.writelines(key + "\n" for key in sorted(self._set))
+        self.runs.append(path)
+        self._set = set()
+        self._mem = 0
+
+    def __iter__(self):
+        # sorted, unique keys across the spilled runs and what is still in memory
+        streams = [_iter_file(p) for p in self.runs] + [iter(sorted(self._set))]
+        last = None
+        for key in heapq.merge(*streams):
+            if key != last:
+                yield key
+                last = key
+
+    def close(self):
+        for p in self.runs:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+        self.runs = []
+        self._set = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _existing(paths, warn=None):
+    out = []
+    for p in paths:
+        if os.path.isfile(p):
+            out.append(p)
+        elif warn:
+            warn(f"[merge] skipping missing input {p}\n")
+    return out
+
+
+def _dedupe(inputs, normalize, memory_limit, tmpdir):
+    d = ExternalDedupe(memory_limit, tmpdir)
+    for line in _iter_lines(inputs):
+        key = normalize(line)
+        if key is not None:
+            d.add(key)
+    return d
+
+
+def _write_atomic(path, keys):
+    n = 0
+    fd, tmp = tempfile.mkstemp(prefix=".merge-", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+            for key in keys:
+                f.write(key)
+                f.write("\n")
+                n += 1
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return n
+
+
+def merge_files(inputs, output, kind="host", memory_limit=DEFAULT_MEMORY, tmpdir=None, warn=None):
+    # merge+dedupe inputs into a sorted output; returns the number of unique entries
+    normalize = NORMALIZERS[kind]
+    inputs = _existing(inputs, warn)
+    with _dedupe(inputs, normalize, memory_limit, tmpdir) as d:
+        return _write_atomic(output, iter(d))
+
+
+def merge_into(existing, inputs, kind="host", new_out=None, memory_limit=DEFAULT_MEMORY, tmpdir=None, warn=None):
+    # fold inputs into `existing` (a sorted, deduped file from an earlier merge). Only the new inputs
+    # are normalized and sorted; the old set is streamed once. Entries not already present are also
+    # written to new_out if given. Returns (total, added).
+    normalize = NORMALIZERS[kind]
+    inputs = _existing(inputs, warn)
+    added = [0]
+    new_fh = open(new_out, "w", encoding="utf-8") if new_out else None
+
+    def merged(fresh):
+        old = _iter_file(existing) if os.path.exists(existing) else iter(())
+        tagged_old = ((k, 0) for k in old)
+        tagged_new = ((k, 1) for k in fresh)
+        last = None
+        for key, src in heapq.merge(tagged_old, tagged_new):
+            if key == last:
+                continue
+            last = key
+            if src == 1:
+                added[0] += 1
+                if new_fh:
+                    new_fh.write(key + "\n")
+            yield key
+
+    try:
+        with _dedupe(inputs, normalize, memory_limit, tmpdir) as d:
+            total = _write_atomic(existing, merged(iter(d)))
+    finally:
+        if new_fh:
+            new_fh.close()
+    return total, added[0]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="merge and dedupe host/URL lists in bounded memory")
+    ap.add_argument("inputs", nargs="+")
+    ap.add_argument("--kind", choices=sorted(NORMALIZERS), default="host")
+    ap.add_argument("-o", "--output", help="write the merged set here")
+    ap.add_argument("--into", help="add inputs to this existing merged file instead")
+    ap.add_argument("--new-out", help="with --into: also write entries that were not there before")
+    ap.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY // (1024 * 1024))
+    args = ap.parse_args(argv)
+    if bool(args.output) == bool(args.into):
+        ap.error("give exactly one of -o/--output or --into")
+    warn = sys.stderr.write
+    inputs = [p for p in args.inputs if os.path.abspath(p) != os.path.abspath(args.output or args.into)]
+    mem = args.memory_mb * 1024 * 1024
+    if args.output:
+        n = merge_files(inputs, args.output, args.kind, mem, warn=warn)
+        print(f"[merge] {n} unique entries -> {args.output}")
+    else:
+        total, added = merge_into(args.into, inputs, args.kind, args.new_out, mem, warn=warn)
+        print(f"[merge] {added} new, {total} total -> {args.into}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# metrics.py
+# Job telemetry on disk. Every finished job appends its Job.metrics() (wall time, user/sys CPU and
+# peak RSS from os.wait4, output bytes/lines, lines/s, time to first output) as one JSON line, and a
+# Prometheus text file with per-tool totals is rewritten (at most once a second) for node_exporter's
+# textfile collector or any scraper that can read a file.
+import os
+import json
+import threading
+import time
+
+PROM_WRITE_INTERVAL = 1.0
+
+_PROM = [
+    # (metric, type, help)
+    ("bbg_jobs_total", "counter", "Jobs finished, by tool and final state."),
+    ("bbg_job_wall_seconds_total", "counter", "Wall-clock seconds spent running jobs."),
+    ("bbg_job_cpu_seconds_total", "counter", "CPU seconds used by jobs and their waited-for children."),
+    ("bbg_job_max_rss_bytes", "gauge", "Largest peak RSS of a single job."),
+    ("bbg_job_output_bytes_total", "counter", "Bytes of output produced by jobs."),
+    ("bbg_job_output_lines_total", "counter", "Lines of output produced by jobs."),
+    ("bbg_job_time_to_first_output_seconds", "summary", "Seconds from start to the first output."),
+]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRecorder:
+    # runner observer (see CommandRunner.add_observer)
+    def __init__(self, path, prom_path=None):
+        self.path = path
+        self.prom_path = prom_path or os.path.splitext(path)[0] + ".prom"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._totals = {}  # tool -> running sums
+        self._written = 0.0
+        self._timer = None
+
+    def job_finished(self, job):
+        m = job.metrics()
+        m["finished"] = job.finished
+        with self._lock:
+            self._f.write(json.dumps(m, separators=(",", ":")) + "\n")
+            self._f.flush()
+            self._add(m)
+            self._schedule()
+
+    def _add(self, m):
+        t = self._totals.setdefault(m["tool"], {"states": {}, "wall": 0.0, "user": 0.0, "system": 0.0, "rss": 0,
+                                                "bytes": 0, "lines": 0, "ttfo_sum": 0.0, "ttfo_count": 0})
+        t["states"][m["state"]] = t["states"].get(m["state"], 0) + 1
+        t["wall"] += m["wall_s"] or 0
+        t["user"] += m["user_s"] or 0
+        t["system"] += m["sys_s"] or 0
+        t["rss"] = max(t["rss"], (m["max_rss_kb"] or 0) * 1024)
+        t["bytes"] += m["bytes_out"]
+        t["lines"] += m["lines_out"]
+        if m["ttfo_s"] is not None:
+            t["ttfo_sum"] += m["ttfo_s"]
+            t["ttfo_count"] += 1
+
+    def _schedule(self):
+        # rewrite now if the last write is old enough, otherwise once the interval has passed
+        if self._timer is not None:
+            return
+        delay = self._written + PROM_WRITE_INTERVAL - time.monotonic()
+        if delay <= 0:
+            self._write_prom()
+            return
+        self._timer = threading.Timer(delay, self._flush_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_timer(self):
+        with self._lock:
+            self._timer = None
+            self._write_prom()
+
+    def prometheus_text(self):
+        lines = []
+        for name, kind, help_text in _PROM:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for tool, t in sorted(self._totals.items()):
+                tl = f'tool="{_label(tool)}"'
+                if name == "bbg_jobs_total":
+                    lines.extend(f'{name}{{{tl},state="{state}"}} {n}' for state, n in sorted(t["states"].items()))
+                elif name == "bbg_job_wall_seconds_total":
+                    lines.append(f"{name}{{{tl}}} {t['wall']:.3f}")
+                elif name == "bbg_job_cpu_seconds_total":
+                    lines.append(f'{name}{{{tl},mode="user"}} {t["user"]:.3f}')
+                    lines.append(f'{name}{{{tl},mode="system"}} {t["system"]:.3f}')
+                elif name == "bbg_job_max_rss_bytes":
+                    lines.append(f"{name}{{{tl}}} {t['rss']}")
+                elif name == "bbg_job_output_bytes_total":
+                    lines.append(f"{name}{{{tl}}} {t['bytes']}")
+                elif name == "bbg_job_output_lines_total":
+                    lines.append(f"{name}{{{tl}}} {t['lines']}")
+                else:
+                    lines.append(f"{name}_sum{{{tl}}} {t['ttfo_sum']:.3f}")
+                    lines.append(f"{name}_count{{{tl}}} {t['ttfo_count']}")
+        return "\n".join(lines) + "\n"
+
+    def _write_prom(self):
+        # written to a temp file and renamed, so a scraper never sees half a file
+        tmp = self.prom_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, self.prom_path)
+        except OSError:
+            pass
+        self._written = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._totals:
+                self._write_prom()
+            self._f.close()
+
+
+def load(path):
+    # records from a metrics JSONL file, skipping a torn last line
+    out = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return out
+
+
+def summarize(records, key="tool"):
+    # per-tool (or per-target) totals, heaviest wall time first
+    groups = {}
+    for m in records:
+        g = groups.setdefault(m.get(key) or "-", {key: m.get(key) or "-", "jobs": 0, "failed": 0, "wall_s": 0.0,
+                                                   "cpu_s": 0.0, "max_rss_kb": 0, "bytes_out": 0, "lines_out": 0})
+        g["jobs"] += 1
+        g["failed"] += m.get("state") == "failed"
+        g["wall_s"] += m.get("wall_s") or 0
+        g["cpu_s"] += m.get("cpu_s") or 0
+        g["max_rss_kb"] = max(g["max_rss_kb"], m.get("max_rss_kb") or 0)
+        g["bytes_out"] += m.get("bytes_out") or 0
+        g["lines_out"] += m.get("lines_out") or 0
+    return sorted(groups.values(), key=lambda g: -g["wall_s"])
@@ -0,0 +1,80 @@
+# outputbuffer.py
+# Per-job output ring buffers. Runner threads push chunks; the GUI drains them in batches
+# on a timer instead of getting one queued call per read. When a job produces output faster
+# than the UI consumes it, the oldest pending chunks are dropped and counted.
+import threading
+from collections import deque, OrderedDict
+
+DEFAULT_JOB_CAP = 256 * 1024        # pending chars kept per job
+DEFAULT_FRAME_BUDGET = 64 * 1024    # chars handed to the UI per drain
+
+
+class JobOutputBuffer:
+    def __init__(self, cap=DEFAULT_JOB_CAP):
+        self.cap = cap
+        self.chunks = deque()
+        self.size = 0
+        self.dropped = 0  # chars dropped since the last drain
+
+    def push(self, data):
+        self.chunks.append(data)
+        self.size += len(data)
+        while self.size > self.cap and len(self.chunks) > 1:
+            old = self.chunks.popleft()
+            self.size -= len(old)
+            self.dropped += len(old)
+
+    def take(self, budget):
+        # pop up to `budget` chars; a chunk larger than the budget is split
+        parts = []
+        while self.chunks and budget > 0:
+            chunk = self.chunks[0]
+            if len(chunk) <= budget:
+                self.chunks.popleft()
+            else:
+                self.chunks[0] = chunk[budget:]
+                chunk = chunk[:budget]
+            parts.append(chunk)
+            self.size -= len(chunk)
+            budget -= len(chunk)
+        dropped, self.dropped = self.dropped, 0
+        return "".join(parts), dropped
+
+
+class OutputHub:
+    def __init__(self, job_cap=DEFAULT_JOB_CAP):
+        self.job_cap = job_cap
+        self._buffers = OrderedDict()  # job_id -> JobOutputBuffer
+        self._lock = threading.Lock()
+
+    def push(self, job_id, data):
+        if not data:
+            return
+        with self._lock:
+            buf = self._buffers.get(job_id)
+            if buf is None:
+                buf = self._buffers[job_id] = JobOutputBuffer(self.job_cap)
+            buf.push(data)
+
+    def pending(self):
+        with self._lock:
+            return sum(b.size for b in self._buffers.values())
+
+    def drain(self, budget=DEFAULT_FRAME_BUDGET):
+        # -> [(job_id, text, dropped_chars)], sharing the budget fairly between jobs
+        out = []
+        with self._lock:
+            active = [(jid, b) for jid, b in self._buffers.items() if b.size or b.dropped]
+            if not active:
+                return out
+            share = max(1024, budget // len(active))
+            for jid, buf in active:
+                text, dropped = buf.take(share)
+                if text or dropped:
+                    out.append((jid, text, dropped))
+                if not buf.size and not buf.dropped:
+                    del self._buffers[jid]
+                else:
+                    # rotate so the next frame starts with a different job
+                    self._buffers.move_to_end(jid)
+        return out
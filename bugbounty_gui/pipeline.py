@@ -0,0 +1,359 @@
+# pipeline.py
+# Declarative recon pipelines on top of commands.py. Each stage declares the files it reads and
+# writes; a stage starts as soon as the stages producing its inputs are done, so independent
+# stages (all the subdomain sources) run in parallel through the runner's scheduler.
+# A stage is skipped when its rendered command and input file hashes match the last successful run.
+# Streaming stages (stream=True) start as soon as their producers are running and read their inputs,
+# deduped, through a FIFO while those are still being written (see stream.py).
+import os
+import json
+import hashlib
+import threading
+
+from commands import COMMANDS, render_command
+from stream import StreamFeed
+
+STATE_FILE = ".pipeline_state.json"
+STREAM_DIR = ".stream"
+
+# stage states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+BLOCKED = "blocked"  # an upstream stage failed
+
+_FINAL = (DONE, SKIPPED, FAILED, BLOCKED)
+
+
+class Stage:
+    def __init__(self, name, command=None, inputs=(), outputs=(), func=None, use_pty=False, optional=False, cache_category=None,
+                 stream=False, stream_kind="host", tee=None):
+        # command: template with {target}, {input}/{inputs} and {output}/{outputs} placeholders
+        # func: in-process alternative, called as func(input_paths, output_paths, target)
+        # optional: a failure doesn't block downstream stages; they run with the inputs that exist
+        # cache_category: serve the stage from the runner's result cache under this category's TTL
+        # stream: {input} is a FIFO carrying the inputs' lines, deduped as stream_kind (merge.py), while
+        # their producers still run; tee: also write that deduped list to this file (an output of the stage)
+        if (command is None) == (func is None):
+            raise ValueError(f"stage {name!r} needs exactly one of command or func")
+        if stream and (func is not None or "{input}" not in command):
+            raise ValueError(f"streaming stage {name!r} needs a command that reads {{input}}")
+        if tee and not stream:
+            raise ValueError(f"stage {name!r}: tee is only for streaming stages")
+        self.name = name
+        self.command = command
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.use_pty = use_pty
+        self.optional = optional
+        self.cache_category = cache_category
+        self.stream = stream
+        self.stream_kind = stream_kind
+        self.tee = tee
+
+    @property
+    def produces(self):
+        return self.outputs + ([self.tee] if self.tee else [])
+
+    def present_inputs(self, cwd):
+        return [i for i in self.inputs if os.path.exists(os.path.join(cwd, i))]
+
+    def render(self, target, cwd, extras=None, stream=None):
+        # stream: path of the FIFO a streaming stage reads instead of its input files
+        if self.command is None:
+            return f"<builtin {self.func.__name__}>"
+        inputs = [stream] if stream else self.present_inputs(cwd)
+        return render_command(
+            self.command, target, extras,
+            input=inputs[0] if inputs else "",
+            inputs=" ".join(inputs),
+            output=self.outputs[0] if self.outputs else "",
+            outputs=" ".join(self.outputs),
+        )
+
+    def __repr__(self):
+        return f"<Stage {self.name} {self.inputs} -> {self.outputs}>"
+
+
+class Pipeline:
+    def __init__(self, name, stages):
+        self.name = name
+        self.stages = list(stages)
+        self.by_name = {}
+        producers = {}
+        for st in self.stages:
+            if st.name in self.by_name:
+                raise ValueError(f"duplicate stage name {st.name!r}")
+            self.by_name[st.name] = st
+            for out in st.produces:
+                if out in producers:
+                    raise ValueError(f"{out!r} is written by both {producers[out]!r} and {st.name!r}")
+                producers[out] = st.name
+        self.producers = producers
+        # stage -> names of stages it waits for
+        self.deps = {st.name: sorted({producers[i] for i in st.inputs if i in producers}) for st in self.stages}
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        seen, stack = set(), set()
+
+        def visit(name):
+            if name in stack:
+                raise ValueError(f"pipeline {self.name!r} has a cycle through {name!r}")
+            if name in seen:
+                return
+            stack.add(name)
+            for d in self.deps[name]:
+                visit(d)
+            stack.discard(name)
+            seen.add(name)
+
+        for st in self.stages:
+            visit(st.name)
+
+    def external_inputs(self):
+        # files the pipeline needs that no stage produces
+        return sorted({i for st in self.stages for i in st.inputs if i not in self.producers})
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PipelineRun:
+    def __init__(self, pipeline, runner, target, cwd=None, extras=None, force=False, on_event=None, workspace=None):
+        # on_event(stage_name, state, message) is called from runner threads
+        # workspace: workspace.Workspace to run in (cwd, placeholders, artifact manifest)
+        self.pipeline = pipeline
+        self.runner = runner
+        self.target = target
+        self.workspace = workspace.create() if workspace is not None else None
+        self.cwd = self.workspace.path if self.workspace is not None else (cwd or os.getcwd())
+        self.extras = extras or {}
+        self.force = force
+        self.on_event = on_event
+        self.states = {st.name: PENDING for st in pipeline.stages}
+        self.jobs = {}
+        self.feeds = {}
+        self._lock = threading.RLock()
+        self._done = threading.Event()
+        self._state_path = os.path.join(self.cwd, STATE_FILE)
+        self._saved = self._load_state()
+
+    # --- persisted fingerprints ---
+
+    def _load_state(self):
+        try:
+            with open(self._state_path) as f:
+                return json.load(f).get(self.pipeline.name, {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        try:
+            with open(self._state_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data[self.pipeline.name] = self._saved
+        tmp = self._state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self._state_path)
+
+    def _path(self, name):
+        return os.path.join(self.cwd, name)
+
+    def _fingerprint(self, stage):
+        inputs = {}
+        for name in stage.present_inputs(self.cwd):
+            inputs[name] = file_digest(self._path(name))
+        return {"target": self.target, "command": stage.render(self.target, self.cwd, self.extras), "inputs": inputs}
+
+    def _up_to_date(self, stage, fp):
+        if self.force or not stage.outputs:
+            return False
+        if self._saved.get(stage.name) != fp:
+            return False
+        return all(os.path.exists(self._path(o)) for o in stage.produces)
+
+    # --- scheduling ---
+
+    def _event(self, stage, state, message=""):
+        self.states[stage.name] = state
+        if self.on_event:
+            self.on_event(stage.name, state, message)
+
+    def start(self):
+        os.makedirs(self.cwd, exist_ok=True)
+        missing = [i for i in self.pipeline.external_inputs() if not os.path.exists(self._path(i))]
+        if missing:
+            raise FileNotFoundError(f"pipeline {self.pipeline.name!r} needs {', '.join(missing)} in {self.cwd}")
+        self._advance()
+        return self
+
+    def _advance(self):
+        with self._lock:
+            progressed = True
+            while progressed:
+                progressed = False
+                for st in self.pipeline.stages:
+                    if self.states[st.name] != PENDING:
+                        continue
+                    deps = [self.pipeline.by_name[d] for d in self.pipeline.deps[st.name]]
+                    if any(self.states[d.name] in (FAILED, BLOCKED) and not d.optional for d in deps):
+                        self._event(st, BLOCKED, "upstream stage failed")
+                        progressed = True
+                    elif all(self.states[d.name] in _FINAL for d in deps):
+                        self._launch(st)
+                        progressed = progressed or self.states[st.name] in _FINAL
+                    elif st.stream and all(self.states[d.name] != PENDING for d in deps):
+                        self._launch_stream(st)
+                        progressed = True
+            for name, feed in self.feeds.items():
+                if all(self.states[d] in _FINAL for d in self.pipeline.deps[name]):
+                    feed.upstream_done()
+            if all(s in _FINAL for s in self.states.values()):
+                self._done.set()
+
+    def _launch(self, stage):
+        if stage.inputs and not stage.present_inputs(self.cwd):
+            self._event(stage, FAILED, "none of its inputs exist")
+            return
+        fp = self._fingerprint(stage)
+        if self._up_to_date(stage, fp):
+            self._event(stage, SKIPPED, "inputs and command unchanged")
+            return
+        if stage.stream:
+            self._launch_stream(stage)  # producers are done, so the feed just drains their files
+            return
+        self._event(stage, RUNNING, fp["command"])
+        if stage.func is not None:
+            t = threading.Thread(target=self._run_func, args=(stage, fp), name=f"stage-{stage.name}", daemon=True)
+            t.start()
+            return
+        job = self.runner.submit(fp["command"], use_pty=stage.use_pty, cwd=self.cwd, workspace=self.workspace,
+                                 cache_category=stage.cache_category, refresh=self.force,
+                                 tool=f"{self.pipeline.name}-{stage.name}", target=self.target, outputs=stage.produces,
+                                 resumable=False)  # re-running the pipeline resumes it, see .pipeline_state.json
+        self.jobs[stage.name] = job
+        job.add_done_callback(lambda j, st=stage, fp=fp: self._completed(st, fp, j.returncode == 0 and not j._stop_requested,
+                                                                         f"exit code {j.returncode}"))
+
+    def _launch_stream(self, stage):
+        # start the consumer on a FIFO fed from its inputs; it completes when both the job and the feed are done
+        fifo = os.path.join(STREAM_DIR, f"{stage.name}.fifo")
+        feed = StreamFeed([self._path(i) for i in stage.inputs], self._path(fifo), kind=stage.stream_kind,
+                          tee=self._path(stage.tee) if stage.tee else None)
+        self.feeds[stage.name] = feed
+        cmd = stage.render(self.target, self.cwd, self.extras, stream=fifo)
+        self._event(stage, RUNNING, f"{cmd}  (streaming from {', '.join(stage.inputs)})")
+        feed.start()
+        job = self.runner.submit(cmd, use_pty=stage.use_pty, cwd=self.cwd, workspace=self.workspace,
+                                 tool=f"{self.pipeline.name}-{stage.name}", target=self.target, outputs=stage.produces,
+                                 resumable=False)
+        self.jobs[stage.name] = job
+
+        def job_done(j):
+            feed.reader_gone()
+            feed.add_done_callback(lambda f: self._stream_done(stage, j, f))
+
+        job.add_done_callback(job_done)
+
+    def _stream_done(self, stage, job, feed):
+        with self._lock:
+            self.feeds.pop(stage.name, None)
+            upstream_failed = any(self.states[d] in (FAILED, BLOCKED) and not self.pipeline.by_name[d].optional
+                                  for d in self.pipeline.deps[stage.name])
+        if feed.error:
+            ok, message = False, f"stream failed: {feed.error}"
+        elif upstream_failed:
+            ok, message = False, "upstream stage failed"
+        elif stage.inputs and not stage.present_inputs(self.cwd):
+            ok, message = False, "none of its inputs exist"
+        else:
+            ok = job.returncode == 0 and not job._stop_requested
+            message = f"exit code {job.returncode}, {feed.lines_out} line(s) streamed"
+        # fingerprint the finished inputs, so an unchanged re-run skips the stage like any other
+        self._completed(stage, self._fingerprint(stage) if ok else None, ok, message)
+
+    def _run_func(self, stage, fp):
+        before = self.workspace.snapshot() if self.workspace is not None else None
+        try:
+            stage.func([self._path(i) for i in stage.present_inputs(self.cwd)], [self._path(o) for o in stage.outputs], self.target)
+        except Exception as e:
+            self._completed(stage, fp, False, f"{type(e).__name__}: {e}")
+            return
+        if before is not None:
+            self.workspace.record(before, tool=f"{self.pipeline.name}-{stage.name}", outputs=stage.produces)
+        self._completed(stage, fp, True, "ok")
+
+    def _completed(self, stage, fp, ok, message):
+        with self._lock:
+            if ok:
+                missing = [o for o in stage.produces if not os.path.exists(self._path(o))]
+                if missing:
+                    ok, message = False, f"did not produce {', '.join(missing)}"
+            if ok:
+                self._saved[stage.name] = fp
+                self._save_state()
+            else:
+                self._saved.pop(stage.name, None)
+            self._event(stage, DONE if ok else FAILED, message)
+        self._advance()
+
+    def cancel(self):
+        with self._lock:
+            for st in self.pipeline.stages:
+                if self.states[st.name] == PENDING:
+                    self._event(st, BLOCKED, "cancelled")
+            jobs = list(self.jobs.values())
+            for feed in self.feeds.values():
+                feed.stop()
+        for job in jobs:
+            self.runner.stop_job(job.id)
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    @property
+    def ok(self):
+        return all(s in (DONE, SKIPPED) or self.pipeline.by_name[n].optional for n, s in self.states.items())
+
+
+def _catalog(category, tool):
+    return COMMANDS[category][tool]
+
+
+SUBDOMAIN_SOURCES = ["subfinder.txt", "assetfinder.txt", "findomain.txt", "amass.txt", "crtsh.txt", "wayback.txt",
+                     "otx.txt", "urlscan.txt"]
+
+RECON_PIPELINE = Pipeline("recon", [
+    Stage("subfinder", _catalog("Recon - Subdomain Enumeration", "subfinder (all recursive)"), outputs=["subfinder.txt"], optional=True),
+    Stage("assetfinder", _catalog("Recon - Subdomain Enumeration", "assetfinder"), outputs=["assetfinder.txt"], optional=True),
+    Stage("findomain", "findomain -t {target} -q > {output}", outputs=["findomain.txt"], optional=True),
+    Stage("amass", _catalog("Recon - Subdomain Enumeration", "amass passive"), outputs=["amass.txt"], optional=True),
+    Stage("crtsh", "builtin:crtsh {target} -o {output}", outputs=["crtsh.txt"], optional=True,
+          cache_category="Recon - Public Sources"),
+    Stage("wayback", "builtin:wayback {target} -o {output}", outputs=["wayback.txt"], optional=True,
+          cache_category="Recon - Public Sources"),
+    Stage("otx", "builtin:otx {target} -o {output}", outputs=["otx.txt"], optional=True,
+          cache_category="Recon - Public Sources"),
+    Stage("urlscan", "builtin:urlscan {target} -o {output}", outputs=["urlscan.txt"], optional=True,
+          cache_category="Recon - Public Sources"),
+    # probing starts with the first subdomain found; the merged, deduped list is teed to subdomain.txt
+    Stage("httpx", "cat {input} | httpx-toolkit -ports 80,443,8080,8000,8888 -threads 200 > {output}",
+          inputs=SUBDOMAIN_SOURCES, outputs=["subdomains_alive.txt"], stream=True, tee="subdomain.txt"),
+    Stage("katana", "katana -list {input} -d 2 -o {output}", inputs=["subdomains_alive.txt"], outputs=["urls.txt"],
+          stream=True, stream_kind="url"),
+    Stage("nuclei", "nuclei -l {input} -bs 50 -c 30 -o {output}", inputs=["subdomains_alive.txt"], outputs=["nuclei.txt"]),
+])
+
+PIPELINES = {p.name: p for p in [RECON_PIPELINE]}
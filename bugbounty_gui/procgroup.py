@@ -0,0 +1,139 @@
+# procgroup.py
+# Every job is started in its own session (Popen(start_new_session=True)), so the shell, every stage
+# of a pipeline like `echo | gau | httpx | dalfox` and whatever those start share one process group
+# whose id is the shell's pid. Stopping a job signals the whole group: SIGTERM first, SIGKILL for
+# whatever is still there after a grace period, then /proc is checked until nothing of the job is left.
+import os
+import signal
+import threading
+import time
+
+DEFAULT_KILL_GRACE = 5.0
+VERIFY_TIMEOUT = 2.0
+POLL_INTERVAL = 0.05
+
+
+def signal_group(pgid, sig):
+    # True if the group still had a process to signal
+    try:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+
+def session_table():
+    # pid -> (process group, session) of every live (non-zombie) process, or None without /proc
+    if not os.path.isdir("/proc/self"):
+        return None
+    table = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        rest = data[data.rindex(b")") + 2:].split()
+        if rest[:1] == [b"Z"]:
+            continue  # exited, only waiting for its parent to reap it
+        try:
+            table[int(name)] = (int(rest[2]), int(rest[3]))
+        except (IndexError, ValueError):
+            continue
+    return table
+
+
+def members(pgid, table=None):
+    # live processes of a job: its group, plus groups it created inside its session (e.g. bash job control)
+    table = session_table() if table is None else table
+    if table is None:
+        return [pgid] if signal_group(pgid, 0) else []
+    return [pid for pid, (pgrp, sid) in table.items() if pgrp == pgid or sid == pgid]
+
+
+class GroupKiller:
+    # escalates stop requests for all jobs of a runner from one thread: SIGTERM, wait up to `grace`
+    # seconds, SIGKILL, wait up to VERIFY_TIMEOUT, then report(text, job) anything that survived
+    def __init__(self, grace=DEFAULT_KILL_GRACE, report=None):
+        self.grace = DEFAULT_KILL_GRACE if grace is None else float(grace)
+        self.report = report
+        self._pending = {}  # pgid -> [job, deadline, killed]
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def terminate(self, job, pgid):
+        # a SIGSTOPped process only acts on SIGTERM once continued
+        signal_group(pgid, signal.SIGTERM)
+        signal_group(pgid, signal.SIGCONT)
+        with self._cond:
+            if pgid not in self._pending:
+                self._pending[pgid] = [job, time.monotonic() + self.grace, False]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="runner-killer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def stopping(self, pgid):
+        # True while the group's escalation is still under way
+        with self._cond:
+            return pgid in self._pending
+
+    def wait(self, timeout=None):
+        # True once every stopped job's processes are gone (or reported as survivors)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _say(self, text, job):
+        if self.report is not None:
+            self.report(text, job)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if not self._pending:
+                    self._thread = None
+                    self._cond.notify_all()
+                    return
+                items = list(self._pending.items())
+            table = session_table()
+            now = time.monotonic()
+            finished = []
+            for pgid, entry in items:
+                job, deadline, killed = entry
+                left = members(pgid, table)
+                if not left:
+                    finished.append(pgid)
+                    if killed:
+                        self._say("[runner] all processes of the job are gone\n", job)
+                elif now < deadline:
+                    continue
+                elif not killed:
+                    self._say(f"[runner] {len(left)} process(es) still running {self.grace:g}s after SIGTERM, sending SIGKILL\n", job)
+                    signal_group(pgid, signal.SIGKILL)
+                    for pid in left:  # members in their own groups inside the job's session
+                        try:
+                            os.kill(pid, signal.SIGKILL)
+                        except OSError:
+                            pass
+                    entry[1] = now + VERIFY_TIMEOUT
+                    entry[2] = True
+                else:
+                    self._say(f"[runner] processes survived SIGKILL: {' '.join(map(str, sorted(left)))}\n", job)
+                    finished.append(pgid)
+            with self._cond:
+                for pgid in finished:
+                    self._pending.pop(pgid, None)
+                self._cond.notify_all()
+            time.sleep(POLL_INTERVAL)
@@ -1,5 +1,6 @@
 # runner.py
 # Executes shell commands. Supports PTY mode for interactive commands and option to run in system terminal.
+# Jobs go through a small scheduler: a bounded worker pool plus per-tool concurrency caps.
 import os
 import subprocess
 import threading
@@ -7,27 +8,352 @@ import time
 import shlex
 import pty
 import select
+import itertools
+import codecs
+import uuid
+from collections import deque
+from logwriter import LogWriter, log_filename
+from cache import CacheWriter
+from procgroup import GroupKiller, VERIFY_TIMEOUT
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+DEFAULT_MAX_WORKERS = 4
+# targets per process when a list-capable tool is run over many targets, see submit_batch()
+DEFAULT_SHARD_SIZE = 500
+# Max concurrent jobs using a given tool binary. Tools not listed only share the worker pool.
+DEFAULT_CATEGORY_LIMITS = {
+    "masscan": 1,
+    "naabu": 1,
+    "nmap": 2,
+    "amass": 2,
+    "ffuf": 2,
+    "dirsearch": 2,
+    "subfinder": 10,
+}
+
+_SHELL_SEPARATORS = {"|", "||", "&&", ";", "&", "|&"}
+_REDIRECTS = {">", ">>", "&>", "&>>", ">|"}
+# flags after which tools take the file they write (-o urls.txt, -output, nmap -oN/-oG/-oX)
+_OUTPUT_FLAGS = {"-o", "-output", "--output", "-oN", "-oG", "-oX", "-json-export", "--output-file"}
+
+# read sizes for job output; grows while the producer keeps the buffer full, shrinks when it idles
+STOP_POLL = 0.1  # seconds between checks whether a stopped pipe job can give up on its output pipe
+MIN_READ = 4 * 1024
+MAX_READ = 1024 * 1024
+
+# "builtin:<name> args..." runs a registered Python tool (see sources.py) in the job thread instead of a shell
+BUILTIN_PREFIX = "builtin:"
+BUILTINS = {}
+
+
+def register_builtin(name, fn):
+    # fn(argv, write, should_stop, cwd) -> returncode; write(text) may be called from several threads
+    BUILTINS[name] = fn
+
+
+def is_builtin(cmd):
+    return cmd.lstrip().startswith(BUILTIN_PREFIX)
+
+
+def command_binaries(cmd):
+    # Names of the programs a shell command line starts, e.g. "cat a | httpx -x" -> {"cat", "httpx"}
+    return set(command_programs(cmd))
+
+
+def command_programs(cmd):
+    # Same as command_binaries but ordered as they appear, e.g. ["cat", "httpx"]
+    tokens = _shell_tokens(cmd)
+    names = []
+    expect = True
+    for tok in tokens:
+        if tok in _SHELL_SEPARATORS:
+            expect = True
+            continue
+        if expect:
+            if "=" in tok and not tok.startswith("="):
+                # env assignment prefix, e.g. FOO=1 tool
+                continue
+            names.append(os.path.basename(tok))
+            expect = False
+    return names
+
+
+def _shell_tokens(cmd):
+    try:
+        lexer = shlex.shlex(cmd, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        return list(lexer)
+    except ValueError:
+        return cmd.split()
+
+
+def command_outputs(cmd):
+    # Files a command line declares it writes: redirections, tee arguments and -o style flags,
+    # e.g. "katana -list a.txt -o urls.txt | tee -a log.txt > /dev/null" -> ["urls.txt", "log.txt"]
+    outputs = []
+    tokens = _shell_tokens(cmd)
+    program = None
+    for i, tok in enumerate(tokens):
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+        if tok in _SHELL_SEPARATORS:
+            program = None
+            continue
+        if program is None and not ("=" in tok and not tok.startswith("=")):
+            program = os.path.basename(tok)
+            continue
+        if tok in _REDIRECTS or tok in _OUTPUT_FLAGS:
+            path = nxt
+        elif program == "tee" and not tok.startswith("-") and tokens[i - 1] not in _REDIRECTS:
+            path = tok
+        else:
+            continue
+        if path and path not in _SHELL_SEPARATORS and path not in _REDIRECTS and not path.startswith("/dev/"):
+            outputs.append(path)
+    return list(dict.fromkeys(outputs))
+
+
+class AdaptiveReader:
+    # Reads an fd into one reused buffer. The read size doubles while reads come back full and
+    # halves when they come back mostly empty, so a fast producer costs few syscalls and a slow one
+    # little latency. read() returns a memoryview that is only valid until the next read().
+    def __init__(self, fd, min_size=MIN_READ, max_size=MAX_READ):
+        self.fd = fd
+        self.min_size = min_size
+        self.max_size = max_size
+        self.size = min_size * 4
+        self._view = memoryview(bytearray(self.size))
+
+    def read(self):
+        if self.size > len(self._view):
+            # buffer only grows for jobs that actually produce this much; swapped here, not after a
+            # read, because the view handed out last time must keep its bytes until this call
+            self._view = memoryview(bytearray(self.size))
+        n = os.readv(self.fd, [self._view[:self.size]])
+        if n == self.size and self.size < self.max_size:
+            self.size = min(self.size * 2, self.max_size)
+        elif n < self.size // 4:
+            self.size = max(self.size // 2, self.min_size)
+        return self._view[:n]
+
+
+def reap(job, options=0):
+    # collect job.process with os.wait4 so the job keeps the child's rusage (CPU times, peak RSS);
+    # True once it has exited. Nothing else may wait for these children (no Popen.poll/wait).
+    proc = job.process
+    if proc.returncode is not None:
+        return True
+    try:
+        pid, status, rusage = os.wait4(proc.pid, options)
+    except ChildProcessError:
+        proc.returncode = proc.wait()
+        return True
+    if pid == 0:
+        return False
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    job.rusage = rusage
+    return True
+
+
+def new_decoder():
+    # incremental decoder keeps partial multibyte sequences across reads
+    return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+class Job:
+    def __init__(self, job_id, cmd, use_pty=True, cwd=None, tool=None, target=None, raw=False, workspace=None,
+                 cache_category=None, refresh=False, key=None, resumable=True, targets=None, outputs=None, batch=False,
+                 delta_tool=None):
+        self.id = job_id
+        # key: stable identity across restarts (see journal.py); resumable: journal it so it can be resumed
+        self.key = key or uuid.uuid4().hex
+        self.resumable = resumable
+        self.cmd = cmd
+        self.use_pty = use_pty
+        self.workspace = workspace
+        if workspace is not None:
+            self.cmd = cmd = workspace.render(cmd)
+            cwd = cwd or workspace.path
+            target = target or workspace.target
+        # raw: output only goes to the log, undecoded; on_output is not called per chunk
+        self.raw = raw
+        self.cwd = cwd
+        self.tool = tool
+        self.target = target
+        # every target the job works on: the shard of a batch job (which has no single target)
+        self.targets = list(targets) if targets else ([target] if target else [])
+        # batch: a submit_batch shard; delta_tool: the DELTA_TOOLS snapshot it updates once it succeeds.
+        # Both are journaled so a resumed job gets the same follow-up work (see session.Session.resume)
+        self.batch = batch
+        self.delta_tool = delta_tool
+        self.categories = command_binaries(cmd)
+        # files the job writes, credited to it in the workspace manifest (default: its -o/> files)
+        self.outputs = list(outputs) if outputs is not None else command_outputs(cmd)
+        # cache_category: catalog category, selects the result cache TTL; refresh: bypass cached results
+        self.cache_category = cache_category
+        self.refresh = refresh
+        self.cached = False
+        # set by governor.ResourceGovernor: command with scaled thread/rate flags, SIGSTOPped, last sample
+        self.run_cmd = None
+        self.paused = False
+        self.usage = None
+        self.state = QUEUED
+        self.returncode = None
+        self.process = None
+        # process group of the job's shell and everything it starts (see procgroup.py)
+        self.pgid = None
+        # telemetry, see metrics(): os.wait4 rusage of the process, output volume, first output time
+        self.rusage = None
+        self.bytes_out = 0
+        self.lines_out = 0
+        self.first_output = None
+        self.error = None
+        self.log_path = None
+        self.artifacts = []
+        self._ws_before = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._stop_requested = False
+        self._done = threading.Event()
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.state in (FINISHED, FAILED, CANCELLED)
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, fn):
+        # fn(job) runs on the runner thread once the job reaches a final state (immediately if it already has)
+        with self._callbacks_lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def metrics(self):
+        # timings, CPU, peak RSS and output volume as a flat dict; final once the job is done.
+        # While it runs, CPU and RSS come from the resource governor's samples (if any).
+        end = self.finished or time.time()
+        wall = end - self.started if self.started else 0.0
+        m = {"id": self.id, "key": self.key, "tool": self.tool or (sorted(self.categories) or ["command"])[0],
+             "target": self.target, "state": self.state, "returncode": self.returncode, "cached": self.cached,
+             "queued_s": round((self.started or end) - self.created, 3), "wall_s": round(wall, 3),
+             "user_s": None, "sys_s": None, "cpu_s": None, "max_rss_kb": None,
+             "bytes_out": self.bytes_out, "lines_out": self.lines_out,
+             "lines_per_s": round(self.lines_out / wall, 1) if wall > 0 else 0.0,
+             "ttfo_s": round(self.first_output - self.started, 3) if self.first_output and self.started else None}
+        if self.rusage is not None:
+            ru = self.rusage
+            m.update(user_s=round(ru.ru_utime, 3), sys_s=round(ru.ru_stime, 3),
+                     cpu_s=round(ru.ru_utime + ru.ru_stime, 3), max_rss_kb=ru.ru_maxrss)
+        elif self.usage:
+            m.update(cpu_s=self.usage.get("cpu_s"), max_rss_kb=self.usage.get("peak_rss", 0) // 1024)
+        return m
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.state} rc={self.returncode} {self.cmd[:40]!r}>"
+
 
 class CommandRunner:
-    def __init__(self, on_output=None, on_finished=None, logs_dir=None):
-        # on_output(line: str)
+    def __init__(self, on_output=None, on_finished=None, logs_dir=None, max_workers=None, category_limits=None,
+                 log_max_bytes=None, log_backups=None, log_compress=False, cache=None, kill_grace=None):
+        # on_output(data: str, job), on_finished(returncode: int, job)
         self.on_output = on_output
         self.on_finished = on_finished
-        self.process = None
-        self._stop_requested = False
         self.logs_dir = logs_dir or os.path.join(os.getcwd(), "logs")
         os.makedirs(self.logs_dir, exist_ok=True)
+        self.max_workers = max(1, int(max_workers or DEFAULT_MAX_WORKERS))
+        self.category_limits = dict(DEFAULT_CATEGORY_LIMITS)
+        if category_limits:
+            self.category_limits.update(category_limits)
+        # streaming log options, see logwriter.LogWriter
+        self.log_options = {"compress": bool(log_compress)}
+        if log_max_bytes is not None:
+            self.log_options["max_bytes"] = int(log_max_bytes)
+        if log_backups is not None:
+            self.log_options["backups"] = int(log_backups)
+        self.cache = cache  # cache.ResultCache or None
+        # observers get job_output(job, text) and job_finished(job), see add_observer()
+        self.observers = []
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._queue = deque()
+        self._active = {}  # category -> running job count
+        self._running = 0
+        # governor.ResourceGovernor sets itself here; it can hold queued jobs and pause running ones
+        self.governor = None
+        # stopped jobs get SIGTERM, then SIGKILL after kill_grace seconds, for their whole process group
+        self.killer = GroupKiller(kill_grace, report=self._emit)
+        self._cond = threading.Condition()
+        self._workers = []
+
+    def _open_log(self, job):
+        path = os.path.join(self.logs_dir, log_filename(job.tool or self._default_tool(job), job.target, job.id))
+        log = LogWriter(path, **self.log_options)
+        job.log_path = log.path
+        return log
+
+    def _default_tool(self, job):
+        names = sorted(job.categories)
+        return names[0] if names else "command"
+
+    def add_observer(self, observer):
+        # observer may define job_queued(job), job_started(job), job_output(job, text) and job_finished(job);
+        # they run on the submitting thread (job_queued) or on runner threads
+        self.observers.append(observer)
+
+    def _notify(self, event, job):
+        for obs in self.observers:
+            fn = getattr(obs, event, None)
+            if fn:
+                try:
+                    fn(job)
+                except Exception as e:
+                    self._emit(f"[runner] observer {type(obs).__name__} failed: {e}\n", job)
+
+    def _emit(self, data, job):
+        if self.on_output:
+            self.on_output(data, job)
+        if job is None:
+            return
+        for obs in self.observers:
+            fn = getattr(obs, "job_output", None)
+            if fn:
+                try:
+                    fn(job, data)
+                except Exception:
+                    pass  # an observer must never break the job's read loop
 
-    def _save_log(self, name, content):
-        ts = time.strftime("%Y%m%d_%H%M%S")
-        safe = "".join(c for c in name if c.isalnum() or c in "._-")[:50]
-        fn = os.path.join(self.logs_dir, f"{safe}_{ts}.log")
-        with open(fn, "w", encoding="utf-8") as f:
-            f.write(content)
-        return fn
+    def _deliver(self, job, log, decoder, data, final=False):
+        # data is bytes straight from the fd: the log gets them as-is, listeners get decoded text
+        if data:
+            log.write(data)
+            if job.first_output is None:
+                job.first_output = time.time()
+            job.bytes_out += len(data)
+        if decoder is None:
+            if data:
+                job.lines_out += bytes(data).count(b"\n")
+            return
+        text = decoder.decode(data, final)
+        if text:
+            job.lines_out += text.count("\n")
+            self._emit(text, job)
 
-    def run(self, cmd, use_pty=True, cwd=None, run_in_terminal=False, terminal_cmd=None):
+    def run(self, cmd, use_pty=True, cwd=None, run_in_terminal=False, terminal_cmd=None, **options):
         # If run_in_terminal is True, open an external terminal and run command there (linux-specific)
+        # options are passed on to Job (tool, target, raw, workspace, cache_category, refresh, key, resumable, outputs,
+        # delta_tool)
+        workspace = options.get("workspace")
         if run_in_terminal:
             # Try common terminal emulators
             terminals = [
@@ -38,109 +364,375 @@ class CommandRunner:
                 ["alacritty", "-e"],
                 ["tilix", "-e"],
             ]
+            if terminal_cmd:
+                terminals.insert(0, list(terminal_cmd))
+            if workspace is not None:
+                cmd = workspace.create().render(cmd)
+                cwd = cwd or workspace.path
             for term in terminals:
                 try:
                     full = term + ["/bin/bash", "-lc", cmd]
-                    subprocess.Popen(full)
+                    subprocess.Popen(full, cwd=cwd)
                     if self.on_output:
-                        self.on_output(f"[runner] opened external terminal: {' '.join(term)}\n")
+                        self.on_output(f"[runner] opened external terminal: {' '.join(term)}\n", None)
                     if self.on_finished:
-                        self.on_finished(0)
+                        self.on_finished(0, None)
                     return None
                 except Exception:
                     continue
             # fallback to running normally
-        if not use_pty:
-            return self._run_simple(cmd, cwd)
-        else:
-            return self._run_pty(cmd, cwd)
+        return self.submit(cmd, use_pty=use_pty, cwd=cwd, **options)
 
-    def _run_simple(self, cmd, cwd):
-        # simple subprocess capture (not interactive)
-        def target():
+    # --- scheduler ---
+
+    def _new_job(self, cmd, **kwargs):
+        ws = kwargs.get("workspace")
+        if ws is not None:
+            ws.create()
+        job = Job(next(self._ids), cmd, **kwargs)
+        self._notify("job_queued", job)
+        return job
+
+    def _job_starting(self, job):
+        if job.workspace is not None:
+            job.workspace.claim(job.id, job.outputs)
+            job._ws_before = job.workspace.snapshot()
+        if self.governor is not None:
+            self.governor.job_starting(job)
+        self._notify("job_started", job)
+
+    def _job_ended(self, job):
+        if job.workspace is not None and job._ws_before is not None:
             try:
-                self.process = subprocess.Popen(cmd, cwd=cwd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1, executable='/bin/bash')
-                out = []
-                for line in self.process.stdout:
-                    out.append(line)
-                    if self.on_output:
-                        self.on_output(line)
-                self.process.wait()
-                if self.on_finished:
-                    self.on_finished(self.process.returncode)
-                self._save_log("command", "".join(out))
-            except Exception as e:
-                if self.on_output:
-                    self.on_output(f"[runner error] {e}\\n")
-                if self.on_finished:
-                    self.on_finished(-1)
-        t = threading.Thread(target=target, daemon=True)
-        t.start()
-        return t
-
-    def _run_pty(self, cmd, cwd):
-        # Run command with a PTY so interactive programs can be used.
-        def target():
+                job.artifacts = job.workspace.record(job._ws_before, tool=job.tool, job_id=job.id, returncode=job.returncode,
+                                                     outputs=job.outputs)
+            except OSError as e:
+                self._emit(f"[runner] could not update workspace manifest: {e}\n", job)
+            finally:
+                job.workspace.release(job.id)
+
+    def submit(self, cmd, **options):
+        job = self._new_job(cmd, **options)
+        with self._cond:
+            self.jobs[job.id] = job
+            self._queue.append(job)
+            if len(self._workers) < self.max_workers:
+                t = threading.Thread(target=self._worker, name=f"runner-worker-{len(self._workers) + 1}", daemon=True)
+                self._workers.append(t)
+                t.start()
+            self._cond.notify_all()
+        return job
+
+    def submit_batch(self, cmd, targets, batch_dir, shard_size=None, **options):
+        # cmd takes a list file ({targets_file}). Targets are written shard_size at a time to
+        # batch_dir/NNNN/targets.txt and each shard runs as one job with that directory as its cwd.
+        shard_size = max(1, int(shard_size or DEFAULT_SHARD_SIZE))
+        it = iter(targets)
+        jobs = []
+        for n in itertools.count(1):
+            shard = list(itertools.islice(it, shard_size))
+            if not shard:
+                break
+            d = os.path.join(batch_dir, f"{n:04d}")
+            os.makedirs(d, exist_ok=True)
+            path = os.path.join(d, "targets.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(t + "\n" for t in shard)
+            jobs.append(self.submit(cmd.replace("{targets_file}", shlex.quote(path)), cwd=d, targets=shard, batch=True, **options))
+        return jobs
+
+    def _admissible(self, job):
+        for cat in job.categories:
+            limit = self.category_limits.get(cat)
+            if limit is not None and self._active.get(cat, 0) >= limit:
+                return False
+        return True
+
+    def _next_job(self):
+        # first queued job whose tools are under their caps; keeps FIFO order otherwise
+        if self._queue and self.governor is not None and not self.governor.admit(self._running):
+            return None
+        for job in self._queue:
+            if self._admissible(job):
+                self._queue.remove(job)
+                return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+                self._running += 1
+                for cat in job.categories:
+                    self._active[cat] = self._active.get(cat, 0) + 1
+                job.state = RUNNING
+                job.started = time.time()
+            try:
+                self._execute(job)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    for cat in job.categories:
+                        self._active[cat] -= 1
+                    self._cond.notify_all()
+
+    def reschedule(self):
+        # look at the queue again, e.g. after the governor found room in the budget
+        with self._cond:
+            self._cond.notify_all()
+
+    def _execute(self, job):
+        log = None
+        try:
+            log = self._open_log(job)
+            self._job_starting(job)
+            if not self._cache_replay(job, log):
+                log = self._cache_wrap(job, log)
+                if is_builtin(job.cmd):
+                    self._run_builtin(job, log)
+                elif job.use_pty:
+                    self._run_pty(job, log)
+                else:
+                    self._run_simple(job, log)
+        except Exception as e:
+            job.error = str(e)
+            label = "pty runner error" if job.use_pty else "runner error"
+            self._emit(f"[{label}] {e}\n", job)
+            job.returncode = -1
+        finally:
+            if log is not None:
+                log.close()
+        self._job_ended(job)
+        self._cache_store(job, log)
+        self._finish(job)
+
+    # --- result cache ---
+
+    def _cache_replay(self, job, log):
+        # serve the job from the result cache; True on a hit
+        if self.cache is None or not job.cache_category or job.refresh:
+            return False
+        entry = self.cache.get(job.cmd, job.target, job.cache_category)
+        if entry is None:
+            return False
+        self._emit("[cache] replaying cached result (use refresh to re-run)\n", job)
+        decoder = None if job.raw else new_decoder()
+        for block in entry.iter_output():
+            self._deliver(job, log, decoder, block)
+        self._deliver(job, log, decoder, b"", final=True)
+        if job.cwd:
+            entry.restore_files(job.cwd)
+        job.returncode = entry.returncode
+        job.cached = True
+        return True
+
+    def _cache_wrap(self, job, log):
+        if self.cache is None or not self.cache.enabled_for(job.cache_category):
+            return log
+        return self.cache.writer(log, job.cmd, job.target)
+
+    def _cache_store(self, job, log):
+        if not isinstance(log, CacheWriter):
+            return
+        try:
+            if job.returncode == 0 and not job._stop_requested:
+                log.commit(job.cache_category, job.cmd, job.target, job.returncode, job.cwd, job.artifacts)
+            else:
+                log.discard()
+        except OSError as e:
+            self._emit(f"[cache] could not store result: {e}\n", job)
+
+    def _finish(self, job):
+        job.finished = time.time()
+        if job._stop_requested:
+            job.state = CANCELLED
+        elif job.returncode == 0:
+            job.state = FINISHED
+        else:
+            job.state = FAILED
+        if job.returncode is None:
+            job.returncode = -1
+        self._notify("job_finished", job)
+        if self.on_finished:
+            self.on_finished(job.returncode, job)
+        with job._callbacks_lock:
+            job._done.set()
+            callbacks, job._callbacks = job._callbacks, []
+        for fn in callbacks:
             try:
-                master_fd, slave_fd = pty.openpty()
-                # Start process attached to slave fd
-                self.process = subprocess.Popen(cmd, cwd=cwd, shell=True, stdin=slave_fd, stdout=slave_fd, stderr=slave_fd, universal_newlines=True, bufsize=0, executable='/bin/bash')
-                os.close(slave_fd)
-                output_buf = []
-                while True:
-                    r, _, _ = select.select([master_fd], [], [], 0.1)
-                    if master_fd in r:
-                        try:
-                            data = os.read(master_fd, 1024)
+                fn(job)
+            except Exception as e:
+                self._emit(f"[runner] job callback failed: {e}\n", job)
+
+    def _run_builtin(self, job, log):
+        argv = shlex.split(job.cmd.lstrip()[len(BUILTIN_PREFIX):])
+        name = argv.pop(0) if argv else ""
+        if name not in BUILTINS:
+            import sources  # noqa: F401  registers the passive-source tools
+            import classify  # noqa: F401  registers builtin:classify
+        fn = BUILTINS.get(name)
+        if fn is None:
+            raise ValueError(f"unknown builtin tool {name!r}")
+        lock = threading.Lock()
+
+        def write(text):
+            with lock:
+                log.write(text)
+                if job.first_output is None:
+                    job.first_output = time.time()
+                job.bytes_out += len(text.encode("utf-8", errors="replace")) if isinstance(text, str) else len(text)
+                job.lines_out += text.count("\n" if isinstance(text, str) else b"\n")
+                if not job.raw:
+                    self._emit(text, job)
+
+        job.returncode = fn(argv, write, lambda: job._stop_requested, job.cwd)
+
+    def _run_simple(self, job, log):
+        # simple subprocess capture (not interactive)
+        job.process = subprocess.Popen(job.run_cmd or job.cmd, cwd=job.cwd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0, executable='/bin/bash', start_new_session=True)
+        self._spawned(job)
+        fd = job.process.stdout.fileno()
+        reader = AdaptiveReader(fd)
+        decoder = None if job.raw else new_decoder()
+        try:
+            while True:
+                r, _, _ = select.select([fd], [], [], STOP_POLL)
+                if fd in r:
+                    data = reader.read()
+                    if not data:
+                        break
+                    self._deliver(job, log, decoder, data)
+                elif self._stopped_for_good(job):
+                    # a descendant that left the job's session still holds the pipe: take what is
+                    # buffered and stop waiting for an EOF that may never come
+                    os.set_blocking(fd, False)
+                    try:
+                        while True:
+                            data = reader.read()
                             if not data:
                                 break
-                            text = data.decode(errors='ignore')
-                            output_buf.append(text)
-                            if self.on_output:
-                                self.on_output(text)
-                        except OSError:
-                            break
-                    if self.process.poll() is not None:
+                            self._deliver(job, log, decoder, data)
+                    except BlockingIOError:
+                        self._emit("[runner] output pipe held open by a process outside the job, no longer reading it\n", job)
+                    break
+        finally:
+            job.process.stdout.close()
+        self._deliver(job, log, decoder, b"", final=True)
+        reap(job)
+        job.returncode = job.process.returncode
+
+    def _run_pty(self, job, log):
+        # Run command with a PTY so interactive programs can be used.
+        master_fd, slave_fd = pty.openpty()
+        try:
+            # Start process attached to slave fd
+            job.process = subprocess.Popen(job.run_cmd or job.cmd, cwd=job.cwd, shell=True, stdin=slave_fd, stdout=slave_fd, stderr=slave_fd, bufsize=0, executable='/bin/bash', start_new_session=True)
+        finally:
+            os.close(slave_fd)
+        self._spawned(job)
+        reader = AdaptiveReader(master_fd)
+        decoder = None if job.raw else new_decoder()
+        try:
+            while True:
+                r, _, _ = select.select([master_fd], [], [], 0.1)
+                if master_fd in r:
+                    try:
+                        data = reader.read()
+                    except OSError:
                         break
-                    if self._stop_requested:
-                        try:
-                            self.process.terminate()
-                        except Exception:
-                            pass
+                    if not data:
                         break
-                # read remaining
+                    self._deliver(job, log, decoder, data)
+                if reap(job, os.WNOHANG):
+                    break
+                if job._stop_requested:
+                    break
+            # read remaining without blocking; a background grandchild may still hold the tty open
+            os.set_blocking(master_fd, False)
+            while True:
                 try:
-                    while True:
-                        data = os.read(master_fd, 1024)
-                        if not data:
-                            break
-                        text = data.decode(errors='ignore')
-                        output_buf.append(text)
-                        if self.on_output:
-                            self.on_output(text)
-                except Exception:
-                    pass
-                if self.process:
-                    rc = self.process.poll()
-                else:
-                    rc = -1
-                if self.on_finished:
-                    self.on_finished(rc)
-                self._save_log("command", "".join(output_buf))
-            except Exception as e:
-                if self.on_output:
-                    self.on_output(f"[pty runner error] {e}\\n")
-                if self.on_finished:
-                    self.on_finished(-1)
-        self._stop_requested = False
-        t = threading.Thread(target=target, daemon=True)
-        t.start()
-        return t
+                    data = reader.read()
+                except OSError:
+                    break
+                if not data:
+                    break
+                self._deliver(job, log, decoder, data)
+            self._deliver(job, log, decoder, b"", final=True)
+        finally:
+            os.close(master_fd)
+        reap(job)
+        job.returncode = job.process.returncode
+
+    # --- control ---
+
+    def _stopped_for_good(self, job):
+        # stop requested, the shell is gone and SIGTERM/SIGKILL escalation for its group is over
+        return job._stop_requested and reap(job, os.WNOHANG) and not self.killer.stopping(job.pgid)
+
+    def _spawned(self, job):
+        # the shell leads a new session, so its pid is the group id of the whole job
+        job.pgid = job.process.pid
+        if job._stop_requested:
+            self._terminate(job)  # stop_job() came before there was a process to signal
+
+    def _terminate(self, job):
+        if self.governor is not None:
+            self.governor.release(job)
+        if job.pgid is not None:
+            self.killer.terminate(job, job.pgid)
+
+    def stop_job(self, job_id):
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            job._stop_requested = True
+            dequeued = job.state == QUEUED
+            if dequeued:
+                self._queue.remove(job)
+        if dequeued:
+            self._finish(job)
+            return True
+        self._terminate(job)
+        return True
 
     def stop(self):
-        self._stop_requested = True
-        if self.process and self.process.poll() is None:
-            try:
-                self.process.terminate()
-            except Exception:
-                pass
+        # stop everything: drop the queue first so no queued job starts meanwhile, then terminate running jobs
+        with self._cond:
+            queued = list(self._queue)
+            self._queue.clear()
+            for job in queued:
+                job._stop_requested = True
+        for job in queued:
+            self._finish(job)
+        for job_id in list(self.jobs):
+            self.stop_job(job_id)
+
+    def wait_stopped(self, timeout=None):
+        # True once no process of any stopped job is left (see procgroup.GroupKiller) and those jobs have
+        # finished; stopped jobs still running after that are reported
+        start = time.monotonic()
+        clean = self.killer.wait(timeout)
+        # a job notices the end of the escalation within STOP_POLL, so give it a few of those at least
+        deadline = max(start + (VERIFY_TIMEOUT if timeout is None else timeout), time.monotonic() + 5 * STOP_POLL)
+        stuck = []
+        for job in [j for j in self.jobs.values() if j._stop_requested and not j.done]:
+            if not job.wait(max(0, deadline - time.monotonic())):
+                stuck.append(job)
+        for job in stuck:
+            self._emit(f"[runner] job {job.id} is still running after being stopped\n", job)
+        return clean and not stuck
+
+    def active_jobs(self):
+        return [j for j in self.jobs.values() if not j.done]
+
+    def wait_all(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        for job in list(self.jobs.values()):
+            remaining = None if deadline is None else max(0, deadline - time.time())
+            if not job.wait(remaining):
+                return False
+        return True
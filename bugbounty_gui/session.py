@@ -0,0 +1,283 @@
+# session.py
+# Everything a recon session needs except the GUI: config, runner engine, result cache, asset store,
+# job journal and per-target workspaces, plus submitting catalog commands and pipelines for a list
+# of targets. main.py, the CLI and the daemon all sit on top of this, so nothing here imports Qt.
+import os
+import json
+
+from commands import COMMANDS, DELTA_TOOLS, render_command, list_command, delta_command
+from runner import CommandRunner, DEFAULT_SHARD_SIZE
+from async_runner import AsyncCommandRunner
+from logwriter import safe_name
+from cache import ResultCache
+from pipeline import PIPELINES, PipelineRun
+from workspace import Workspace, new_run_id
+from assets import AssetStore, AssetRecorder, SHARD_TARGETS, owner_target
+from journal import JobJournal
+from governor import ResourceGovernor
+from metrics import MetricsRecorder
+from procgroup import VERIFY_TIMEOUT
+import delta as delta_store
+import sources  # noqa: F401  registers the builtin:<source> passive tools
+import classify  # noqa: F401  registers builtin:classify
+
+CONFIG_FILE = "config.json"
+SPLIT_BUFFER = 4 * 1024 * 1024  # bytes of shard output held per file before writing it out to target workspaces
+
+
+def load_config(path=CONFIG_FILE):
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+
+def find_command(category, tool):
+    try:
+        return COMMANDS[category][tool]
+    except KeyError:
+        raise KeyError(f"no command {tool!r} in category {category!r}") from None
+
+
+def plan(template, targets, batch=True):
+    # ("batch", list form) for one job per shard, ("each", template) for one job per target, or ("single", template)
+    list_cmd = list_command(template) if batch and len(targets) > 1 else None
+    if list_cmd:
+        return "batch", list_cmd
+    if "{target}" in template and len(targets) > 1:
+        return "each", template
+    return "single", template
+
+
+class Session:
+    def __init__(self, config=None, on_output=None, on_finished=None, logs_dir=None):
+        # on_output(data, job) / on_finished(returncode, job) as for runner.CommandRunner
+        self.config = config if config is not None else load_config()
+        self.logs_dir = logs_dir or os.path.join(os.getcwd(), "logs")
+        os.makedirs(self.logs_dir, exist_ok=True)
+        # every target gets workspaces_dir/<target>/<run_id>; new_run() starts a fresh set
+        self.workspaces_dir = self.config.get("workspaces_dir") or os.path.join(os.getcwd(), "workspaces")
+        self.run_id = new_run_id()
+        self.cache = ResultCache(self.config.get("cache_dir") or os.path.join(self.workspaces_dir, ".cache"),
+                                 ttls=self.config.get("cache_ttls"), max_bytes=self.config.get("cache_max_bytes") or 512 * 1024 * 1024)
+        runner_cls = AsyncCommandRunner if self.config.get("engine") == "asyncio" else CommandRunner
+        self.runner = runner_cls(on_output=on_output, on_finished=on_finished, logs_dir=self.logs_dir,
+                                 max_workers=self.config.get("max_workers"), category_limits=self.config.get("category_limits"),
+                                 log_max_bytes=self.config.get("log_max_bytes"), log_backups=self.config.get("log_backups"),
+                                 log_compress=self.config.get("log_compress", False), cache=self.cache,
+                                 kill_grace=self.config.get("kill_grace"))
+        # everything tools report is indexed here as it streams (see assets.py)
+        self.assets = AssetStore(self.config.get("assets_db") or os.path.join(self.workspaces_dir, "assets.db"))
+        self.asset_recorder = AssetRecorder(self.assets)
+        self.runner.add_observer(self.asset_recorder)
+        # queued/running/finished jobs are journaled so an interrupted session can be resumed
+        self.journal = JobJournal(self.config.get("journal_path") or os.path.join(self.workspaces_dir, "journal.jsonl"))
+        self.runner.add_observer(self.journal)
+        # per-job telemetry: metrics.jsonl plus per-tool Prometheus totals in metrics.prom
+        self.metrics = MetricsRecorder(self.config.get("metrics_path") or os.path.join(self.workspaces_dir, "metrics.jsonl"))
+        self.runner.add_observer(self.metrics)
+        # hold/pause jobs to stay inside a CPU, memory and fd budget; "resource_budget": false turns it off
+        budget = self.config.get("resource_budget", {})
+        self.governor = None
+        if budget is not False:
+            budget = budget or {}
+            self.governor = ResourceGovernor(self.runner, cpu=budget.get("cpu"), rss_mb=budget.get("rss_mb"), fds=budget.get("fds"),
+                                             min_free_mb=budget.get("min_free_mb"), interval=budget.get("interval"),
+                                             scale_flags=budget.get("scale_flags", False))
+
+    @property
+    def batch_size(self):
+        return int(self.config.get("batch_size", DEFAULT_SHARD_SIZE))
+
+    def workspace_for(self, target):
+        return Workspace(self.workspaces_dir, target, self.run_id)
+
+    def new_run(self):
+        self.run_id = new_run_id()
+        return self.run_id
+
+    plan = staticmethod(plan)
+
+    @property
+    def delta_mode(self):
+        return bool(self.config.get("delta_mode", False))
+
+    def delta_snapshot(self, target, tool):
+        return delta_store.snapshot_path(self.workspaces_dir, target, tool)
+
+    def _delta_targets(self, tool, targets, note):
+        # per-target DELTA_TOOLS: drop targets the tool already ran against
+        fresh = [t for t in targets if not delta_store.known(self.delta_snapshot(t, tool), t, "raw")]
+        if len(fresh) < len(targets):
+            note(f"[delta] {tool}: skipping {len(targets) - len(fresh)} target(s) it already ran against")
+        return fresh
+
+    def _delta_remember(self, job):
+        # once the job succeeded, its targets count as seen by job.delta_tool
+        if job.returncode != 0 or job._stop_requested:
+            return
+        for t in job.targets:
+            snap = self.delta_snapshot(t, job.delta_tool)
+            delta_store.diff_lines([t], snap, kind="raw")
+            delta_store.commit(snap)
+
+    def _follow_up(self, job):
+        # work done once the job ends: split a batch shard into the targets' workspaces, update delta snapshots
+        if job.batch:
+            job.add_done_callback(self._split_shard)
+        if job.delta_tool:
+            job.add_done_callback(self._delta_remember)
+
+    def _split_shard(self, job):
+        # copy a finished batch shard's output files into the workspaces of the targets each line belongs to
+        if not job.cwd or not os.path.isdir(job.cwd):
+            return
+        names = sorted(n for n in os.listdir(job.cwd) if n != SHARD_TARGETS and os.path.isfile(os.path.join(job.cwd, n)))
+        workspaces = {t: self.workspace_for(t).create() for t in job.targets}
+        before = {t: ws.snapshot() for t, ws in workspaces.items()}
+        for name in names:
+            pending, size, written = {}, 0, set()
+
+            def flush():
+                for t, lines in pending.items():
+                    with open(workspaces[t].file(name), "a" if t in written else "w", encoding="utf-8") as out:
+                        out.writelines(lines)
+                    written.add(t)
+                pending.clear()
+
+            with open(os.path.join(job.cwd, name), encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    t = owner_target(line, job.targets)
+                    if t:
+                        pending.setdefault(t, []).append(line if line.endswith("\n") else line + "\n")
+                        size += len(line)
+                        if size >= SPLIT_BUFFER:
+                            flush()
+                            size = 0
+            flush()
+        for t, ws in workspaces.items():
+            ws.record(before[t], tool=job.tool, job_id=job.id, returncode=job.returncode)
+
+    def _delta_wrap(self, cmd, tool, target, note):
+        if not target:
+            note(f"[delta] {tool}: snapshots are kept per target, give one to run in delta mode")
+            return cmd
+        wrapped = delta_command(cmd, tool, self.delta_snapshot(target, tool))
+        if wrapped is None:
+            note(f"[delta] {tool}: command doesn't read {DELTA_TOOLS[tool][0]}, running it on everything")
+            return cmd
+        return wrapped
+
+    def submit(self, template, targets, extras=None, use_pty=True, run_in_terminal=False, tool=None, category=None,
+               refresh=False, batch=True, note=None, delta=None):
+        # run a command template for targets; returns the submitted jobs. note(text) gets progress lines.
+        # delta (default: "delta_mode" in config) feeds DELTA_TOOLS only assets earlier runs did not give them
+        note = note or (lambda text: None)
+        delta = (self.delta_mode if delta is None else delta) and tool in DELTA_TOOLS
+        per_target = delta and DELTA_TOOLS[tool] is None
+        if per_target:
+            targets = self._delta_targets(tool, targets, note)
+            if not targets:
+                return []
+        mode, cmd = self.plan(template, targets, batch)
+        delta_tool = tool if per_target else None
+        jobs = []
+        if mode == "batch":
+            # one process per shard of targets, each in its own directory under the run's batch folder
+            tool = tool or "command"
+            batch_dir = os.path.join(self.workspaces_dir, "_batches", self.run_id, f"{safe_name(tool, 40)}_{new_run_id()}")
+            jobs = self.runner.submit_batch(render_command(cmd, None, extras), targets, batch_dir, self.batch_size,
+                                            use_pty=use_pty, tool=tool, delta_tool=delta_tool)
+            for job in jobs:
+                self._follow_up(job)
+            note(f"[runner] {len(targets)} targets in {len(jobs)} batch job(s) under {batch_dir}")
+        elif mode == "each":
+            note(f"[runner] launching for {len(targets)} targets")
+            for t in targets:
+                c = render_command(cmd, t, extras)
+                if delta and not per_target:
+                    c = self._delta_wrap(c, tool, t, note)
+                ws = self.workspace_for(t)
+                job = self.runner.run(c, use_pty=use_pty, run_in_terminal=run_in_terminal, tool=tool, target=t, workspace=ws,
+                                      cache_category=category, refresh=refresh, delta_tool=delta_tool)
+                if job:
+                    self._follow_up(job)
+                note(f"$ {c}  (in {ws.path})" + (f"  [job {job.id} queued]" if job else ""))
+                if job:
+                    jobs.append(job)
+        else:
+            single = targets[0] if targets else None
+            c = render_command(cmd, single, extras)
+            if delta and not per_target:
+                c = self._delta_wrap(c, tool, single, note)
+            ws = self.workspace_for(single) if single else None
+            job = self.runner.run(c, use_pty=use_pty, run_in_terminal=run_in_terminal, tool=tool, target=single, workspace=ws,
+                                  cache_category=category, refresh=refresh, delta_tool=delta_tool)
+            if job:
+                self._follow_up(job)
+            where = f"  (in {ws.path})" if ws else ""
+            note(f"$ {c}{where}" + (f"  [job {job.id} queued]" if job else ""))
+            if job:
+                jobs.append(job)
+        return jobs
+
+    def start_pipeline(self, name, targets, extras=None, force=False, on_event=None, note=None):
+        # start pipeline `name` for each target; on_event(label, stage, state, message). Returns the runs.
+        note = note or (lambda text: None)
+        pipeline = PIPELINES[name]
+        runs = []
+        for t in targets:
+            label = f"{name}/{t}"
+            cb = (lambda stage, state, msg, label=label: on_event(label, stage, state, msg)) if on_event else None
+            try:
+                runs.append(PipelineRun(pipeline, self.runner, t, extras=extras, force=force, on_event=cb,
+                                        workspace=self.workspace_for(t)).start())
+            except Exception as e:
+                note(f"[pipeline {label}] could not start: {e}")
+        return runs
+
+    def active_count(self):
+        return len(self.runner.active_jobs())
+
+    def job_metrics(self, limit=500):
+        # Job.metrics() of every unfinished job and of the `limit` most recent finished ones
+        jobs = list(self.runner.jobs.values())
+        done = [j for j in jobs if j.done][-limit:]
+        return [j.metrics() for j in jobs if not j.done] + [j.metrics() for j in done]
+
+    def log_path(self, job_id):
+        job = self.runner.jobs.get(job_id)
+        return job.log_path if job else None
+
+    def stop(self, job_id=None):
+        if job_id is None:
+            self.runner.stop()
+            return True
+        return self.runner.stop_job(job_id)
+
+    def interrupted(self):
+        return self.journal.interrupted()
+
+    def resume(self):
+        jobs = self.journal.resume(self.runner)
+        for job in jobs:
+            self._follow_up(job)
+        return jobs
+
+    def abandon(self):
+        self.journal.abandon()
+
+    def close(self):
+        if self.governor is not None:
+            self.governor.close()
+        self.runner.stop()
+        # don't leave processes of stopped jobs behind when the session goes away
+        self.runner.wait_stopped(self.runner.killer.grace + VERIFY_TIMEOUT)
+        if hasattr(self.runner, "close"):
+            self.runner.close()
+        self.asset_recorder.close(timeout=30)
+        self.journal.close()
+        self.metrics.close()
@@ -0,0 +1,423 @@
+# sources.py
+# Native passive-source fetchers (crt.sh, Wayback CDX, AlienVault OTX, urlscan.io, VirusTotal) that
+# replace the curl | jq | grep | sed | sort chains in the catalog. They share a keep-alive connection
+# pool, parse large JSON/CDX responses incrementally, fetch paginated results concurrently and emit
+# deduplicated hosts and IPs as they arrive. Registered with the runner as builtin tools:
+#
+#   builtin:crtsh example.com -o crtsh.txt
+#   builtin:otx example.com --ips
+#
+# Every source takes --base-url so it can be pointed at a local mock server.
+import os
+import re
+import json
+import time
+import codecs
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit, quote
+from concurrent.futures import ThreadPoolExecutor
+
+from runner import register_builtin
+from merge import normalize_host
+
+USER_AGENT = "Mozilla/5.0 (recon-to-master)"
+DEFAULT_TIMEOUT = 60
+READ_CHUNK = 64 * 1024
+
+_IPV4 = re.compile(r"^(?:25[0-5]|2[0-4]\d|1?\d?\d)(?:\.(?:25[0-5]|2[0-4]\d|1?\d?\d)){3}$")
+
+
+class SourceError(Exception):
+    pass
+
+
+# --- pooled HTTP ---
+
+class PooledResponse:
+    def __init__(self, pool, key, conn, resp):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self.status = resp.status
+
+    def read(self, n=None):
+        return self._resp.read(n)
+
+    def readline(self):
+        return self._resp.readline()
+
+    def __iter__(self):
+        return iter(self._resp.readline, b"")
+
+    def close(self):
+        if self._conn is None:
+            return
+        # the connection can be reused only if the body was consumed and the server keeps it open
+        if self._resp.isclosed() and not self._resp.will_close:
+            self._pool._release(self._key, self._conn)
+        else:
+            self._conn.close()
+        self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HTTPPool:
+    def __init__(self, max_idle_per_host=8, timeout=DEFAULT_TIMEOUT):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, key):
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def get(self, url, headers=None):
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        hdrs = {"User-Agent": USER_AGENT, "Accept": "*/*", "Connection": "keep-alive"}
+        hdrs.update(headers or {})
+        for attempt in range(2):
+            conn, reused = self._acquire(key)
+            try:
+                conn.request("GET", path, headers=hdrs)
+                resp = conn.getresponse()
+            except (http.client.HTTPException, ConnectionError, OSError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue  # stale keep-alive connection, retry on a fresh one
+                raise
+            pr = PooledResponse(self, key, conn, resp)
+            if resp.status >= 400:
+                body = resp.read(512)
+                pr.close()
+                raise SourceError(f"GET {url} -> HTTP {resp.status}: {body[:200]!r}")
+            return pr
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for c in conns:
+                    c.close()
+            self._idle = {}
+
+
+POOL = HTTPPool()
+
+
+# --- incremental parsing ---
+
+_SKIP = re.compile(r"[\s,]*")
+
+
+def iter_json_array(resp, key=None, chunk=READ_CHUNK):
+    # Yield the elements of a JSON array as they are read: the top-level array, or with key="x" the
+    # first array found under "x". Elements are decoded one at a time, so a response of any size is
+    # handled in memory proportional to one element.
+    dec = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    start = re.compile(r"\[" if key is None else r'"%s"\s*:\s*(\[|null)' % re.escape(key))
+    buf = ""
+    pos = 0
+
+    def fill():
+        nonlocal buf, pos
+        data = resp.read(chunk)
+        if not data:
+            return False
+        buf = buf[pos:] + text_decoder.decode(data)
+        pos = 0
+        return True
+
+    while True:
+        m = start.search(buf, pos)
+        if m:
+            if key is not None and m.group(1) == "null":
+                return
+            pos = m.end()
+            break
+        # keep a tail in case the marker straddles two reads
+        pos = max(pos, len(buf) - (len(key or "") + 64))
+        if not fill():
+            return
+    while True:
+        pos = _SKIP.match(buf, pos).end()
+        if pos >= len(buf):
+            if not fill():
+                return
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            obj, end = dec.raw_decode(buf, pos)
+        except ValueError:
+            if not fill():
+                return
+            continue
+        # a number/literal at the very end of the buffer may be cut short
+        if end == len(buf) and not isinstance(obj, (dict, list, str)):
+            if fill():
+                continue
+        pos = end
+        yield obj
+
+
+def iter_lines(resp):
+    for raw in resp:
+        line = raw.decode("utf-8", "replace").strip()
+        if line:
+            yield line
+
+
+# --- emission ---
+
+class Emitter:
+    # dedupes and scopes values, then writes them as lines; safe to call from several fetch threads
+    def __init__(self, target, write, kinds=("host",), output=None):
+        self.target = target.lower().strip(".")
+        self.write = write
+        self.kinds = set(kinds)
+        self.output = output
+        self.count = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def host(self, value):
+        if "host" not in self.kinds or not value:
+            return
+        for part in str(value).split():
+            h = normalize_host(part)
+            if h and (h == self.target or h.endswith("." + self.target)):
+                self._emit(h)
+
+    def ip(self, value):
+        if "ip" in self.kinds and value and _IPV4.match(str(value)):
+            self._emit(str(value))
+
+    def _emit(self, value):
+        with self._lock:
+            if value in self._seen:
+                return
+            self._seen.add(value)
+            self.count += 1
+            line = value + "\n"
+            if self.output:
+                self.output.write(line)
+            self.write(line)
+
+
+# --- sources ---
+
+def _paged(fetch_page, workers, should_stop, first=0, limit=None):
+    # fetch pages first, first+1, ... `workers` at a time. fetch_page(n) returns (items, has_next);
+    # paging stops at a page that is empty, shorter than `limit` or says there is no next one
+    page = first
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        while not should_stop():
+            batch = list(range(page, page + workers))
+            results = list(ex.map(fetch_page, batch))
+            page += workers
+            if any(items == 0 or has_next is False or (limit and items < limit) for items, has_next in results):
+                return
+
+
+class _Recorder:
+    # file-like view of a response that keeps its first and last bytes, so scalar fields around a
+    # streamed array (OTX "has_next") can still be read once the array has been consumed
+    def __init__(self, resp, keep=4096):
+        self.resp = resp
+        self.keep = keep
+        self.head = b""
+        self.tail = b""
+
+    def read(self, n=-1):
+        data = self.resp.read(n)
+        if len(self.head) < self.keep:
+            self.head += data[:self.keep - len(self.head)]
+        self.tail = (self.tail + data)[-self.keep:]
+        return data
+
+    def field(self, name):
+        # JSON literal `name` (true/false/null/number) from the recorded bytes, reading the rest of the body first
+        while self.read(READ_CHUNK):
+            pass
+        m = re.search(rb'"%s"\s*:\s*(true|false|null|-?\d+)' % re.escape(name.encode()), self.head + b"\n" + self.tail)
+        return json.loads(m.group(1)) if m else None
+
+
+def fetch_crtsh(args, em, should_stop):
+    base = args.base_url or "https://crt.sh"
+    url = f"{base}/?q={quote('%.' + args.target)}&output=json"
+    with POOL.get(url) as resp:
+        for item in iter_json_array(resp):
+            if should_stop():
+                return
+            if isinstance(item, dict):
+                em.host(item.get("name_value"))
+                em.host(item.get("common_name"))
+
+
+def fetch_wayback(args, em, should_stop):
+    base = args.base_url or "http://web.archive.org"
+    query = f"{base}/cdx/search/cdx?url=*.{quote(args.target)}/*&output=text&fl=original&collapse=urlkey"
+    try:
+        with POOL.get(query + "&showNumPages=true") as resp:
+            pages = int(resp.read().strip() or b"1")
+    except (SourceError, ValueError):
+        pages = 1
+
+    def page(n):
+        if should_stop():
+            return 0
+        lines = 0
+        with POOL.get(f"{query}&page={n}") as resp:
+            for line in iter_lines(resp):
+                em.host(line)
+                lines += 1
+        return lines
+
+    with ThreadPoolExecutor(max_workers=args.workers) as ex:
+        list(ex.map(page, range(pages)))
+
+
+def fetch_otx(args, em, should_stop):
+    base = args.base_url or "https://otx.alienvault.com"
+    headers = {"X-OTX-API-KEY": args.api_key} if args.api_key else None
+    limit = 500
+
+    def page(n):
+        if should_stop():
+            return 0, False
+        url = f"{base}/api/v1/indicators/domain/{quote(args.target)}/url_list?limit={limit}&page={n}"
+        items = 0
+        with POOL.get(url, headers) as resp:
+            body = _Recorder(resp)
+            for item in iter_json_array(body, "url_list"):
+                items += 1
+                if isinstance(item, dict):
+                    em.host(item.get("hostname"))
+                    em.host(item.get("url"))
+                    worker = (item.get("result") or {}).get("urlworker") or {}
+                    em.ip(worker.get("ip"))
+            return items, body.field("has_next")
+
+    _paged(page, args.workers, should_stop, first=1, limit=limit)
+
+
+def fetch_urlscan(args, em, should_stop):
+    base = args.base_url or "https://urlscan.io"
+    headers = {"API-Key": args.api_key} if args.api_key else None
+    after = None
+    while not should_stop():
+        url = f"{base}/api/v1/search/?q=domain:{quote(args.target)}&size=1000"
+        if after:
+            url += "&search_after=" + quote(",".join(str(x) for x in after))
+        n = 0
+        with POOL.get(url, headers) as resp:
+            for item in iter_json_array(resp, "results"):
+                n += 1
+                page = item.get("page") or {}
+                em.host(page.get("domain"))
+                em.ip(page.get("ip"))
+                after = item.get("sort") or after
+        if n < 1000 or not after:
+            return
+
+
+def fetch_virustotal(args, em, should_stop):
+    base = args.base_url or "https://www.virustotal.com"
+    key = args.api_key or os.environ.get("VT_API_KEY")
+    if not key:
+        raise SourceError("virustotal needs --api-key or VT_API_KEY")
+    url = f"{base}/vtapi/v2/domain/report?apikey={quote(key)}&domain={quote(args.target)}"
+    with POOL.get(url) as resp:
+        data = json.load(resp)
+    for h in data.get("subdomains") or []:
+        em.host(h)
+    for h in data.get("domain_siblings") or []:
+        em.host(h)
+    for r in data.get("resolutions") or []:
+        em.ip(r.get("ip_address"))
+
+
+SOURCES = {
+    "crtsh": fetch_crtsh,
+    "wayback": fetch_wayback,
+    "otx": fetch_otx,
+    "urlscan": fetch_urlscan,
+    "virustotal": fetch_virustotal,
+}
+
+
+def _parser(name):
+    ap = argparse.ArgumentParser(prog=f"builtin:{name}", add_help=False)
+    ap.add_argument("target")
+    ap.add_argument("-o", "--output")
+    ap.add_argument("--ips", action="store_true", help="emit IP addresses")
+    ap.add_argument("--hosts", action="store_true", help="emit hostnames (default unless --ips)")
+    ap.add_argument("--api-key")
+    ap.add_argument("--base-url")
+    ap.add_argument("--workers", type=int, default=4)
+    return ap
+
+
+def _make_builtin(name, fetch):
+    def run(argv, write, should_stop, cwd=None):
+        try:
+            args = _parser(name).parse_args(argv)
+        except SystemExit:
+            write(f"[{name}] usage: {_parser(name).format_usage()}")
+            return 2
+        kinds = []
+        if args.hosts or not args.ips:
+            kinds.append("host")
+        if args.ips:
+            kinds.append("ip")
+        out = None
+        if args.output:
+            path = args.output if os.path.isabs(args.output) or not cwd else os.path.join(cwd, args.output)
+            out = open(path, "w", encoding="utf-8")
+        t0 = time.monotonic()
+        em = Emitter(args.target, write, kinds, out)
+        try:
+            fetch(args, em, should_stop)
+        except (SourceError, OSError, http.client.HTTPException, ValueError) as e:
+            write(f"[{name}] error: {e}\n")
+            return 1
+        finally:
+            if out:
+                out.close()
+        write(f"[{name}] {em.count} unique result(s) in {time.monotonic() - t0:.1f}s\n")
+        return 0
+    return run
+
+
+for _name, _fetch in SOURCES.items():
+    register_builtin(_name, _make_builtin(_name, _fetch))
@@ -0,0 +1,229 @@
+# stream.py
+# Streaming edges between jobs. A StreamFeed follows the files upstream jobs are still writing,
+# dedupes complete lines on the fly (merge.py normalizers) and writes them in chunks to a FIFO that
+# the downstream tool reads as its list file or stdin, so httpx probes the first subdomains while the
+# enumerators are still running. Writes block while the reader is busy; upstream output then simply
+# waits in its files, so a slow consumer costs no memory. Every line also goes to an optional tee
+# file (the stage's artifact), which is sorted like a merge.py output once the stream has ended.
+# Keys are deduped exactly up to SEEN_LIMIT of them; past that a fixed-size Bloom filter takes over
+# (under 0.2% of later unique keys never reach the FIFO while it holds fewer than 20M keys). Keys it
+# drops still go to the tee, whose final merge dedupes exactly, so the artifact stays complete.
+import os
+import errno
+import hashlib
+import threading
+
+import merge
+
+POLL_INTERVAL = 0.2       # seconds between looks at upstream files that had nothing new
+READ_SIZE = 1024 * 1024   # per file and poll
+CHUNK = 64 * 1024         # bytes per write to the FIFO, one pipe buffer
+SEEN_LIMIT = 1000000      # keys deduped exactly before switching to the Bloom filter
+BLOOM_BITS = 1 << 28      # 32MB
+BLOOM_HASHES = 7
+
+
+class Bloom:
+    def __init__(self, bits=BLOOM_BITS, hashes=BLOOM_HASHES):
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray(bits // 8)
+
+    def add(self, key):
+        # False if key was (probably) added before
+        d = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        new = False
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.bits
+            mask = 1 << (bit & 7)
+            if not self.array[bit >> 3] & mask:
+                self.array[bit >> 3] |= mask
+                new = True
+        return new
+
+
+class StreamFeed:
+    def __init__(self, paths, fifo, kind="host", tee=None, poll=POLL_INTERVAL):
+        # paths: upstream files (they may not exist yet); fifo: created here, read by the consumer
+        self.paths = list(paths)
+        self.fifo = fifo
+        self.kind = kind
+        self.normalize = merge.NORMALIZERS[kind]
+        self.tee = tee
+        self.poll = poll
+        self.seen = set()
+        self.bloom = None
+        self._tee_only = []  # keys the Bloom filter held back, written to the tee with the next send
+        self.lines_out = 0
+        self.error = None
+        self._offsets = dict.fromkeys(self.paths, 0)
+        self._partial = dict.fromkeys(self.paths, b"")
+        self._fd = None
+        self._upstream_done = threading.Event()
+        self._reader_gone = threading.Event()
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.fifo)), exist_ok=True)
+        if os.path.lexists(self.fifo):
+            os.remove(self.fifo)
+        os.mkfifo(self.fifo)
+        threading.Thread(target=self._run, name=f"stream-{os.path.basename(self.fifo)}", daemon=True).start()
+        return self
+
+    # --- control, from any thread ---
+
+    def upstream_done(self):
+        # every producer has finished: drain what is left, then close the FIFO so the reader sees EOF
+        self._upstream_done.set()
+
+    def reader_gone(self):
+        # the consumer exited; keep following upstream for the tee but stop writing to the FIFO
+        self._reader_gone.set()
+
+    def stop(self):
+        # cancel: stop at once, leaving the tee as far as it got
+        self._stop.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, fn):
+        # fn(feed) runs on the feed thread once it has finished (immediately if it already has)
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    # --- feed thread ---
+
+    def _run(self):
+        tee = None
+        try:
+            tee = open(self.tee, "w", encoding="utf-8") if self.tee else None
+            while not self._stop.is_set():
+                final = self._upstream_done.is_set()  # checked before reading, so nothing written earlier is missed
+                lines, more = self._read(final)
+                if lines or self._tee_only:
+                    self._send(lines, tee)
+                elif not more:
+                    if final:
+                        break
+                    self._stop.wait(self.poll)
+            if not self._stop.is_set() and self._fd is None:
+                self._open_writer()  # nothing came through: still let a waiting reader see EOF
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            if self._fd is not None:
+                os.close(self._fd)
+            try:
+                os.remove(self.fifo)
+            except OSError:
+                pass
+            if tee is not None:
+                tee.close()
+                if not self._stop.is_set() and self.error is None:
+                    merge.merge_files([self.tee], self.tee, kind=self.kind)
+            with self._lock:
+                self._done.set()
+                callbacks, self._callbacks = self._callbacks, []
+            for fn in callbacks:
+                fn(self)
+
+    def _read(self, final):
+        # new unique keys from the upstream files; more: some file had more than READ_SIZE waiting
+        out, more = [], False
+        for path in self.paths:
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                if os.fstat(f.fileno()).st_size < self._offsets[path]:
+                    # rewritten from scratch (a "> file" redirect re-run); keys already sent stay deduped
+                    self._offsets[path], self._partial[path] = 0, b""
+                f.seek(self._offsets[path])
+                data = f.read(READ_SIZE)
+            self._offsets[path] += len(data)
+            full = len(data) == READ_SIZE
+            more = more or full
+            buf = self._partial[path] + data
+            if final and not full:
+                cut = len(buf)
+            else:
+                cut = buf.rfind(b"\n") + 1
+            self._partial[path] = buf[cut:]
+            for raw in buf[:cut].split(b"\n"):
+                key = self.normalize(raw.decode("utf-8", errors="replace"))
+                if key is None:
+                    continue
+                if self._first(key):
+                    out.append(key)
+                elif self.bloom is not None and self.tee:
+                    self._tee_only.append(key)
+        return out, more
+
+    def _first(self, key):
+        if self.bloom is not None:
+            return self.bloom.add(key)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        if len(self.seen) >= SEEN_LIMIT:
+            self.bloom = Bloom()
+            for k in self.seen:
+                self.bloom.add(k)
+            self.seen = set()
+        return True
+
+    def _send(self, lines, tee):
+        data = "".join(key + "\n" for key in lines)
+        if tee is not None:
+            tee.write(data + "".join(key + "\n" for key in self._tee_only))
+            tee.flush()
+        self._tee_only = []
+        if not lines:
+            return
+        self.lines_out += len(lines)
+        if self._fd is None and not self._open_writer():
+            return
+        view = memoryview(data.encode("utf-8"))
+        try:
+            while view and self._fd is not None:
+                n = os.write(self._fd, view[:CHUNK])  # blocks while the pipe is full: backpressure
+                view = view[n:]
+        except BrokenPipeError:
+            self._close_writer()
+
+    def _open_writer(self):
+        # open the FIFO for writing once a reader has it open; False if the reader is gone
+        while self._fd is None:
+            if self._reader_gone.is_set() or self._stop.is_set():
+                return False
+            try:
+                fd = os.open(self.fifo, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as e:
+                if e.errno != errno.ENXIO:  # ENXIO: no reader yet
+                    raise
+                self._stop.wait(self.poll)
+                continue
+            os.set_blocking(fd, True)
+            self._fd = fd
+        return True
+
+    def _close_writer(self):
+        self._reader_gone.set()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,5 @@
+# the app's modules import each other by plain name (python3 main.py runs from bugbounty_gui/)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,73 @@
+from assets import AssetStore, AssetRecorder, owner_target, scanned_inputs
+
+
+class FakeJob:
+    def __init__(self, job_id, cmd, target, cwd=None, tool=None, returncode=0, targets=None):
+        self.id = job_id
+        self.cmd = cmd
+        self.run_cmd = None
+        self.target = target
+        self.targets = targets or ([target] if target else [])
+        self.cwd = cwd
+        self.tool = tool
+        self.returncode = returncode
+        self._stop_requested = False
+        self.workspace = None
+        self.artifacts = []
+
+
+def test_scanned_inputs(tmp_path):
+    (tmp_path / "live.txt").write_text("https://a.ex.com [200]\nhttps://b.ex.com\n")
+    assert scanned_inputs("nuclei -l live.txt -c 30", str(tmp_path)) == ("nuclei", ["https://a.ex.com", "https://b.ex.com"])
+    assert scanned_inputs("cat live.txt | nuclei -t x/", str(tmp_path))[1] == ["https://a.ex.com", "https://b.ex.com"]
+    assert scanned_inputs("nuclei -u https://c.ex.com -bs 50") == ("nuclei", ["https://c.ex.com"])
+    assert scanned_inputs("subfinder -d ex.com") == (None, [])
+
+
+def test_recorder_ingests_in_background_and_records_scans(tmp_path):
+    store = AssetStore(str(tmp_path / "assets.db"))
+    rec = AssetRecorder(store)
+    job = FakeJob(1, "subfinder -d ex.com", "ex.com", tool="subfinder")
+    rec.job_output(job, "a.ex.com\nb.ex.com\n")
+    rec.job_output(job, "c.ex.com\nnot-in-scope.org\n")
+    rec.job_finished(job)
+    (tmp_path / "subs.txt").write_text("a.ex.com\nb.ex.com\n")
+    scan = FakeJob(2, "nuclei -l subs.txt", "ex.com", cwd=str(tmp_path), tool="nuclei")
+    rec.job_finished(scan)
+    failed = FakeJob(3, "nuclei -u c.ex.com", "ex.com", tool="nuclei", returncode=1)
+    rec.job_finished(failed)
+    assert rec.wait_idle(10)
+    assert store.query("ex.com", "subdomain") == ["a.ex.com", "b.ex.com", "c.ex.com"]
+    assert store.unscanned("ex.com", "subdomain", "nuclei") == ["c.ex.com"]
+    rec.close()
+    store.close()
+
+
+def test_owner_target():
+    targets = ["ex.com", "api.ex.com", "other.org", "10.0.0.1"]
+    assert owner_target("a.ex.com", targets) == "ex.com"
+    assert owner_target("https://v1.api.ex.com/x?y=1", targets) == "api.ex.com"
+    assert owner_target("[cve-1] [http] [high] https://other.org/admin", targets) == "other.org"
+    assert owner_target("10.0.0.1:8080", targets) == "10.0.0.1"
+    assert owner_target("unrelated.net", targets) is None
+
+
+def test_recorder_attributes_shard_output_to_its_targets(tmp_path):
+    store = AssetStore(str(tmp_path / "assets.db"))
+    rec = AssetRecorder(store)
+    shard = tmp_path / "0001"
+    shard.mkdir()
+    (shard / "targets.txt").write_text("ex.com\nother.org\n")
+    (shard / "subs.txt").write_text("d.ex.com\nb.other.org\n")
+    job = FakeJob(1, "subfinder -dL targets.txt", None, cwd=str(shard), tool="subfinder", targets=["ex.com", "other.org"])
+    rec.job_output(job, "a.ex.com\na.other.org\nstray.net\n")
+    rec.job_finished(job)
+    scan = FakeJob(2, "nuclei -l subs.txt", None, cwd=str(shard), tool="nuclei", targets=["ex.com", "other.org"])
+    rec.job_finished(scan)
+    assert rec.wait_idle(10)
+    assert store.query("ex.com", "subdomain") == ["a.ex.com", "d.ex.com"]
+    assert store.query("other.org", "subdomain") == ["a.other.org", "b.other.org"]
+    assert store.unscanned("ex.com", "subdomain", "nuclei") == ["a.ex.com"]
+    assert store.unscanned("other.org", "subdomain", "nuclei") == ["a.other.org"]
+    rec.close()
+    store.close()
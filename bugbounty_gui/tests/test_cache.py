@@ -0,0 +1,68 @@
+import io
+
+import cache
+from cache import ResultCache
+
+CATEGORY = "Recon - Public Sources"
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def store(c, cmd, data, files_root=None, files=()):
+    w = c.writer(io.BytesIO(), cmd, "ex.com")
+    w.write(data)
+    w.commit(CATEGORY, cmd, "ex.com", 0, files_root, files)
+
+
+def test_entries_expire_after_their_category_ttl(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    c = ResultCache(str(tmp_path), ttls={CATEGORY: 60})
+    (tmp_path / "subs.txt").write_text("a.ex.com\n")
+    store(c, "crtsh ex.com", b"a.ex.com\n", str(tmp_path), ["subs.txt"])
+    assert c.get("crtsh ex.com", "ex.com", "Uncached Category") is None
+    clock.now += 59
+    entry = c.get("crtsh ex.com", "ex.com", CATEGORY)
+    assert b"".join(entry.iter_output()) == b"a.ex.com\n"
+    dest = tmp_path / "restore"
+    assert entry.restore_files(str(dest)) == ["subs.txt"]
+    assert (dest / "subs.txt").read_text() == "a.ex.com\n"
+    clock.now += 2  # reads don't extend the ttl
+    assert c.get("crtsh ex.com", "ex.com", CATEGORY) is None
+    assert c.stats()["entries"] == 0
+    assert not (tmp_path / "objects" / entry.key[:2] / entry.key).exists()
+
+
+def test_purge_expired(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    c = ResultCache(str(tmp_path), ttls={CATEGORY: 60})
+    store(c, "old", b"x")
+    clock.now += 30
+    store(c, "new", b"y")
+    clock.now += 40
+    c.purge_expired()
+    assert c.stats()["entries"] == 1
+    assert c.get("new", "ex.com", CATEGORY) is not None
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    c = ResultCache(str(tmp_path), ttls={CATEGORY: 3600}, max_bytes=250)
+    for cmd in ("a", "b"):
+        store(c, cmd, b"x" * 100)
+        clock.now += 1
+    assert c.get("a", "ex.com", CATEGORY) is not None  # a is now more recent than b
+    clock.now += 1
+    store(c, "c", b"x" * 100)
+    assert c.get("b", "ex.com", CATEGORY) is None
+    assert c.get("a", "ex.com", CATEGORY) is not None
+    assert c.get("c", "ex.com", CATEGORY) is not None
+    assert c.stats() == {"entries": 2, "bytes": 200, "max_bytes": 250}
@@ -0,0 +1,44 @@
+import os
+
+import classify
+from classify import Classifier, classify_file
+
+
+def families_of(url):
+    clf = Classifier()
+    data = url.encode() + b"\n"
+    hits = []
+    clf.scan(data, 0, len(data), lambda mask, line: hits.append(mask))
+    return {f for i, f in enumerate(clf.families) if hits and hits[0] & (1 << i)}
+
+
+def test_secret_keywords_in_parameter_names():
+    assert "secrets" in families_of("https://a.com/x?token=abc")
+    assert "secrets" in families_of("https://a.com/login?password=1")
+    assert "secrets" in families_of("https://a.com/x?q=1&apikey=2")
+    assert "secrets" in families_of("https://a.com/.env")
+
+
+def test_parameter_and_extension_families():
+    assert families_of("https://a.com/r?redirect_uri=x") >= {"redirect"}
+    assert families_of("https://a.com/item.php?id=1") >= {"sqli", "endpoints"}
+    assert families_of("https://a.com/backup.sql") >= {"sensitive"}
+    assert families_of("https://a.com/app.js") == {"js"}
+    assert families_of("https://a.com/plain") == set()
+
+
+def test_parallel_scan_matches_single_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(classify, "MIN_PARALLEL_BYTES", 1024)
+    urls = ["https://a.com/x?token=abc", "https://b.com/a.js", "https://c.com/p?id=1&apikey=2", "https://d.com/plain"]
+    src = tmp_path / "urls.txt"
+    src.write_text("".join(f"{urls[i % 4]}&n={i}\n" for i in range(20000)))
+    lines1, counts1 = classify_file(str(src), str(tmp_path / "one"), workers=1)
+    lines4, counts4 = classify_file(str(src), str(tmp_path / "four"), workers=4)
+    assert lines1 == lines4 == 20000
+    assert counts1 == counts4
+    assert counts1["secrets"] == 10000
+    for family in counts1:
+        name = classify.output_name(family)
+        with open(tmp_path / "one" / name, "rb") as a, open(tmp_path / "four" / name, "rb") as b:
+            assert a.read() == b.read()
+    assert sorted(os.listdir(tmp_path / "four")) == sorted(os.listdir(tmp_path / "one"))
@@ -0,0 +1,29 @@
+import subprocess
+
+import delta
+from commands import delta_command
+
+
+def _run(cmd, cwd):
+    return subprocess.run(["bash", "-c", cmd], cwd=cwd, capture_output=True, text=True, check=True).stdout
+
+
+def test_delta_command_rescans_hosts_whose_state_changed(tmp_path):
+    snap = str(tmp_path / ".delta" / "nuclei_batch.txt")
+    cmd = delta_command("cat live_domains.txt > scanned.txt", "nuclei batch", snap)
+    assert "--changes" in cmd
+    live = tmp_path / "live_domains.txt"
+    live.write_text("https://a.ex.com [200] [Home]\nhttps://b.ex.com [403] [Forbidden]\n")
+    _run(cmd, tmp_path)
+    assert (tmp_path / "scanned.txt").read_text() == "https://a.ex.com\nhttps://b.ex.com\n"
+    assert "nothing new" in _run(cmd, tmp_path)
+    live.write_text("https://a.ex.com [200] [Home]\nhttps://b.ex.com [200] [Admin]\nhttps://c.ex.com [200] [New]\n")
+    _run(cmd, tmp_path)
+    assert (tmp_path / "scanned.txt").read_text() == "https://b.ex.com\nhttps://c.ex.com\n"
+    assert delta.known(snap, "https://b.ex.com", "raw")
+
+
+def test_host_lists_are_diffed_on_the_asset_only(tmp_path):
+    cmd = delta_command("subzy run --targets subdomains.txt", "subzy", str(tmp_path / "snap.txt"))
+    assert "--changes" not in cmd
+    assert "subdomains.delta.txt" in cmd
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import signal
+import subprocess
+import threading
+
+import pytest
+
+from distributed import Api, Coordinator, DistError, Worker, FINISHED, LEASED, _Active, serve_coordinator
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _until(cond, timeout, what):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, f"timed out waiting for {what}"
+        time.sleep(0.1)
+
+
+def test_jobs_of_a_killed_worker_are_rescheduled(tmp_path):
+    coord = Coordinator(str(tmp_path / "coord"), lease_ttl=2)
+    server = serve_coordinator(coord, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    workers = {}
+    try:
+        for name in ("w1", "w2"):
+            workers[name] = subprocess.Popen(
+                [sys.executable, os.path.join(APP_DIR, "__main__.py"), "worker", "--coordinator", url, "--name", name,
+                 "--capacity", "2", "--root", str(tmp_path / name)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        _until(lambda: set(coord.workers) == {"w1", "w2"}, 20, "both workers to poll")
+        ids = coord.submit_command("sleep 2; echo done {target}", ["t1", "t2", "t3", "t4"])
+        _until(lambda: all(coord.jobs[j].state == LEASED for j in ids), 10, "all jobs to be leased")
+        on_w1 = [j for j in ids if coord.jobs[j].worker == "w1"]
+        assert on_w1
+        workers["w1"].send_signal(signal.SIGKILL)
+        workers["w1"].wait()
+        _until(lambda: all(coord.jobs[j].state == FINISHED for j in ids), 30, "all jobs to finish")
+        for j in ids:
+            job = coord.jobs[j]
+            assert job.worker == "w2"
+            assert job.attempts == (2 if j in on_w1 else 1)
+            state, attempt, data = coord.read_output(j)
+            assert f"done {job.target}" in data.decode()
+    finally:
+        for p in workers.values():
+            if p.poll() is None:
+                p.terminate()
+                p.wait(10)
+        server.shutdown()
+        server.server_close()
+        coord.close()
+
+
+def test_worker_keeps_a_job_whose_completion_report_failed(tmp_path):
+    worker = Worker("http://127.0.0.1:1", name="w", root=str(tmp_path))
+    logged = []
+    worker.log = logged.append
+    a = _Active({"id": 7}, str(tmp_path / "7"))
+    a.returncode = 0
+    worker.active[7] = a
+
+    def fail(*args, **kw):
+        raise DistError("POST /jobs/7/done -> HTTP 500")
+
+    worker.api.json = fail
+    worker._upload = lambda a: None
+    worker._complete(a)
+    assert 7 in worker.active
+    assert any("HTTP 500" in line for line in logged)
+
+
+def test_coordinator_needs_a_token_off_loopback(tmp_path):
+    open_coord = Coordinator(str(tmp_path / "open"))
+    with pytest.raises(DistError):
+        serve_coordinator(open_coord, "0.0.0.0", 0)
+    open_coord.close()
+    coord = Coordinator(str(tmp_path / "coord"), token="s3cret")
+    try:
+        server = serve_coordinator(coord, "0.0.0.0", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with pytest.raises(DistError, match="403"):
+                Api(url, "wrong").json("GET", "/jobs")
+            with pytest.raises(DistError, match="403"):
+                Api(url).json("GET", "/jobs")
+            assert Api(url, "s3cret").json("GET", "/jobs") is not None
+        finally:
+            server.shutdown()
+            server.server_close()
+    finally:
+        coord.close()
@@ -0,0 +1,42 @@
+import pytest
+
+import governor
+from governor import ResourceGovernor
+
+
+class FakeRunner:
+    def __init__(self):
+        self.jobs = {}
+        self.governor = None
+
+    def _emit(self, text, job):
+        pass
+
+
+@pytest.fixture
+def gov():
+    if not governor.proc_available():
+        pytest.skip("needs /proc")
+    g = ResourceGovernor(FakeRunner(), cpu=4, rss_mb=1000, fds=1000, interval=3600)
+    yield g
+    g.close()
+
+
+def test_idle_box_admits_more_than_one_sample_worth(gov):
+    # nothing sampled yet and no load: short jobs must not be held to one admission per sample
+    assert all(gov.admit(running=n) for n in range(1, 20))
+
+
+def test_slow_start_when_budget_is_filling(gov, monkeypatch):
+    monkeypatch.setattr(governor, "ADMIT_AT", 2.0)  # only the slow-start cap decides here
+    gov.usage = {"cpu": 2.4, "rss": 0, "fds": 0}  # 60% of the cpu budget, measured over 2 jobs
+    gov._sampled = 2
+    assert gov.admit(running=2)
+    assert gov.admit(running=3)
+    assert not gov.admit(running=4)
+
+
+def test_holds_jobs_near_the_budget(gov):
+    gov.usage = {"cpu": 3.6, "rss": 0, "fds": 0}
+    gov._sampled = 4
+    assert not gov.admit(running=4)
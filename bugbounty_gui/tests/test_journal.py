@@ -0,0 +1,72 @@
+import time
+
+from journal import JobJournal
+from runner import CommandRunner, Job, FINISHED
+from workspace import Workspace
+
+
+def _job(tmp_path, job_id, cmd):
+    ws = Workspace(str(tmp_path / "ws"), "ex.com", "run1").create()
+    return Job(job_id, cmd, use_pty=False, tool="t", target="ex.com", workspace=ws)
+
+
+def _write_crashed_journal(tmp_path):
+    # one finished job, one that was running and one still queued when the process died mid-write
+    path = str(tmp_path / "journal.jsonl")
+    journal = JobJournal(path)
+    done, running, queued = (_job(tmp_path, i, f"echo {name} > {name}.txt")
+                             for i, name in ((1, "done"), (2, "running"), (3, "queued")))
+    for job in (done, running, queued):
+        journal.job_queued(job)
+    journal.job_started(done)
+    journal.job_started(running)
+    done.state, done.returncode, done.artifacts = FINISHED, 0, ["done.txt"]
+    journal.job_finished(done)
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"ev": "done", "key": "%s", "sta' % running.key)  # torn last line
+    return path, done, running, queued
+
+
+def test_interrupted_jobs_are_resumed_with_their_key_and_done_ones_skipped(tmp_path):
+    path, done, running, queued = _write_crashed_journal(tmp_path)
+    journal = JobJournal(path)
+    assert [rec["key"] for rec in journal.interrupted()] == [running.key, queued.key]
+    assert [(rec["key"], rec["artifacts"]) for rec in journal.completed()] == [(done.key, ["done.txt"])]
+    later = _job(tmp_path, 4, "echo later")
+    journal.job_queued(later)  # the first record after the torn line is not lost
+    journal.job_finished(later)
+    assert len(journal.completed()) == 2
+    runner = CommandRunner(logs_dir=str(tmp_path / "logs"), max_workers=2)
+    runner.add_observer(journal)
+    try:
+        jobs = journal.resume(runner)
+        assert [(j.key, j.cmd, j.target) for j in jobs] == [(running.key, running.cmd, "ex.com"), (queued.key, queued.cmd, "ex.com")]
+        for job in jobs:
+            assert job.wait(10) and job.state == FINISHED
+            assert job.cwd == running.cwd
+        time.sleep(0.1)  # observers run just after wait() returns
+        assert journal.interrupted() == []
+        assert {rec["key"] for rec in journal.completed()} == {done.key, running.key, queued.key, later.key}
+    finally:
+        journal.close()
+
+
+def test_abandon_and_compact(tmp_path):
+    path, done, running, queued = _write_crashed_journal(tmp_path)
+    journal = JobJournal(path)
+    try:
+        journal.compact()
+        assert [rec["key"] for rec in journal.interrupted()] == [running.key, queued.key]
+        assert journal.completed() == []
+        with open(path) as f:
+            assert len(f.readlines()) == 2  # only the queued records of open jobs are kept
+        journal.abandon()
+        assert journal.interrupted() == []
+        journal.compact()
+        with open(path) as f:
+            assert f.read() == ""
+        journal.job_queued(_job(tmp_path, 4, "true"))  # still appends after compacting
+        assert len(journal.interrupted()) == 1
+    finally:
+        journal.close()
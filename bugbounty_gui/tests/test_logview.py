@@ -0,0 +1,90 @@
+import os
+import random
+
+import pytest
+
+import logview
+from logview import BLOCK, LogIndex, LogSearch
+
+
+def _lines(n, seed=1):
+    # varied lengths, some longer than a block, so lines start and end on both sides of block boundaries
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        size = rnd.choice((0, 5, 60, 700, 3000, BLOCK + 100)) if i % 97 else BLOCK * 2
+        out.append(f"{i:06d} " + ("hit " if i % 13 == 0 else "") + "x" * size)
+    return out
+
+
+def _check(index, lines):
+    assert index.lines() == len(lines)
+    order = list(range(len(lines)))
+    random.Random(2).shuffle(order)  # jumps defeat the scan-on from the previous lookup
+    for n in order + list(range(len(lines))):
+        assert index.text(n) == lines[n][:logview.MAX_LINE_BYTES]
+
+
+@pytest.fixture
+def log(tmp_path):
+    return tmp_path / "job.log"
+
+
+def test_lines_across_block_boundaries_and_a_last_line_without_newline(log):
+    lines = _lines(600)
+    log.write_text("\n".join(lines))  # no newline after the last line
+    assert log.stat().st_size > 20 * BLOCK
+    index = LogIndex(str(log))
+    try:
+        assert index.refresh()
+        assert not index.refresh()
+        _check(index, lines)
+        assert index.text(len(lines)) == ""
+    finally:
+        index.close()
+
+
+def test_index_follows_growth_and_rotation(log):
+    lines = _lines(300)
+    log.write_text("\n".join(lines[:200]) + "\n" + lines[200][:10])
+    index = LogIndex(str(log))
+    try:
+        index.refresh()
+        assert index.lines() == 201
+        assert index.text(200) == lines[200][:10]
+        with open(log, "a") as f:
+            f.write(lines[200][10:] + "\n" + "\n".join(lines[201:]) + "\n")
+        assert index.refresh()
+        _check(index, lines)
+        assert index.generation == 0
+
+        rotated = _lines(50, seed=3)
+        tmp = log.with_suffix(".new")
+        tmp.write_text("\n".join(rotated) + "\n")
+        os.replace(tmp, log)  # a new file under the same name
+        assert index.refresh()
+        assert index.generation == 1
+        _check(index, rotated)
+
+        log.write_text("short\n")  # truncated in place
+        index.refresh()
+        assert index.generation == 2
+        _check(index, ["short"])
+    finally:
+        index.close()
+
+
+def test_search_continues_from_its_end_on_a_growing_log(log, monkeypatch):
+    monkeypatch.setattr(logview, "SEARCH_CHUNK", 5000)  # matches and lines straddle chunks
+    lines = _lines(400)
+    log.write_text("\n".join(lines[:300]) + "\n" + lines[300][:3])
+    search = LogSearch(str(log), r"^\d+ hit")
+    assert search.wait(20) and search.error is None
+    assert list(search.take()) == [n for n in range(300) if n % 13 == 0]
+    assert search.end[1] == 300  # stopped at the start of the unfinished last line
+    with open(log, "a") as f:
+        f.write(lines[300][3:] + "\n" + "\n".join(lines[301:]) + "\n")
+    more = LogSearch(str(log), "hit", regex=False, start=search.end)
+    assert more.wait(20) and more.error is None
+    assert list(more.take()) == [n for n in range(300, 400) if n % 13 == 0]
+    assert more.end == (log.stat().st_size, 400)
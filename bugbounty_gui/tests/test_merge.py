@@ -0,0 +1,72 @@
+import os
+import random
+
+import pytest
+
+from merge import ExternalDedupe, merge_files, merge_into, normalize_host, normalize_url
+
+
+def test_external_dedupe_spills_and_merges_runs_sorted_and_unique(tmp_path):
+    keys = [f"h{i:05d}.example.com" for i in range(3000)]
+    shuffled = keys + keys[::3]
+    random.Random(7).shuffle(shuffled)
+    with ExternalDedupe(memory_limit=4096, tmpdir=str(tmp_path)) as d:
+        for key in shuffled:
+            d.add(key)
+        assert len(d.runs) > 5  # a key spilled in one run can come back in a later one
+        assert list(d) == keys
+        runs = list(d.runs)
+    assert not any(os.path.exists(p) for p in runs)
+
+
+@pytest.mark.parametrize("line, key", [
+    ("*.Foo.Example.com.", "foo.example.com"),
+    ("*.*.foo.example.com", "foo.example.com"),
+    ("https://user@Foo.example.com:443/x?y=1", "foo.example.com"),
+    ("foo.example.com:8080", "foo.example.com"),
+    ("  # comment", None),
+    ("[::1]:80", None),
+    ("localhost", None),
+    ("bad host.example.com", None),
+])
+def test_normalize_host(line, key):
+    assert normalize_host(line) == key
+
+
+@pytest.mark.parametrize("line, key", [
+    ("HTTPS://Foo.Example.com.:443/a?b=1#frag", "https://foo.example.com/a?b=1"),
+    ("http://foo.example.com:8080", "http://foo.example.com:8080/"),
+    ("foo.example.com/x", "http://foo.example.com/x"),
+    ("https://foo.example.com?q=1", "https://foo.example.com/?q=1"),
+    ("http://user:pw@[::1]:80/p", "http://user:pw@[::1]/p"),
+    ("http://foo.example.com/a b", None),
+    ("", None),
+])
+def test_normalize_url(line, key):
+    assert normalize_url(line) == key
+
+
+def test_merge_files_normalizes_and_sorts(tmp_path):
+    (tmp_path / "a.txt").write_text("B.example.com\n*.a.example.com\n")
+    (tmp_path / "b.txt").write_text("a.example.com.\nhttps://c.example.com/x\n\n")
+    warnings = []
+    n = merge_files([str(tmp_path / "a.txt"), str(tmp_path / "b.txt"), str(tmp_path / "missing.txt")],
+                    str(tmp_path / "final.txt"), memory_limit=100, tmpdir=str(tmp_path), warn=warnings.append)
+    assert n == 3
+    assert (tmp_path / "final.txt").read_text() == "a.example.com\nb.example.com\nc.example.com\n"
+    assert len(warnings) == 1 and "missing.txt" in warnings[0]
+
+
+def test_merge_into_adds_a_new_input_to_an_existing_set(tmp_path):
+    final = tmp_path / "final.txt"
+    (tmp_path / "old.txt").write_text("b.example.com\nd.example.com\n")
+    merge_files([str(tmp_path / "old.txt")], str(final))
+    (tmp_path / "new.txt").write_text("D.example.com\na.example.com\ne.example.com\na.example.com\n")
+    total, added = merge_into(str(final), [str(tmp_path / "new.txt")], new_out=str(tmp_path / "added.txt"),
+                              memory_limit=100, tmpdir=str(tmp_path))
+    assert (total, added) == (4, 2)
+    assert final.read_text() == "a.example.com\nb.example.com\nd.example.com\ne.example.com\n"
+    assert (tmp_path / "added.txt").read_text() == "a.example.com\ne.example.com\n"
+    # into a set that doesn't exist yet: everything is new
+    total, added = merge_into(str(tmp_path / "fresh.txt"), [str(tmp_path / "new.txt")])
+    assert (total, added) == (3, 3)
@@ -0,0 +1,29 @@
+import sys
+
+import metrics
+from metrics import MetricsRecorder
+from runner import CommandRunner
+
+
+def test_recorder_writes_job_metrics_and_prometheus_totals(tmp_path):
+    recorder = MetricsRecorder(str(tmp_path / "metrics.jsonl"))
+    runner = CommandRunner(logs_dir=str(tmp_path / "logs"), max_workers=1)
+    runner.add_observer(recorder)
+    # a little memory, three lines of output, the last after a pause
+    script = "import time; b = bytearray(32 * 1024 * 1024); print('a'); print('b', flush=True); time.sleep(0.3); print('c')"
+    job = runner.run(f"{sys.executable} -c \"{script}\"", use_pty=False, tool="probe")
+    assert job.wait(20) and job.returncode == 0
+    recorder.close()
+
+    [m] = metrics.load(str(tmp_path / "metrics.jsonl"))
+    assert m["tool"] == "probe" and m["state"] == "finished"
+    assert m["wall_s"] >= 0.3
+    assert m["lines_out"] == 3
+    assert 0 <= m["ttfo_s"] < m["wall_s"]
+    assert m["max_rss_kb"] > 32 * 1024
+
+    prom = (tmp_path / "metrics.prom").read_text().splitlines()
+    assert 'bbg_jobs_total{tool="probe",state="finished"} 1' in prom
+    assert f'bbg_job_time_to_first_output_seconds_sum{{tool="probe"}} {m["ttfo_s"]:.3f}' in prom
+    assert 'bbg_job_time_to_first_output_seconds_count{tool="probe"} 1' in prom
+    assert 'bbg_job_output_lines_total{tool="probe"} 3' in prom
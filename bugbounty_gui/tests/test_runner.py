@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import signal
+
+import pytest
+
+from runner import AdaptiveReader, CommandRunner, CANCELLED, command_outputs
+from workspace import Workspace
+from async_runner import AsyncCommandRunner
+
+
+def test_adaptive_reader_keeps_bytes_when_buffer_grows():
+    r, w = os.pipe()
+    payload = bytes(range(256)) * (3 * 4096)  # enough full reads to grow the buffer several times
+    os.set_blocking(w, False)
+    reader = AdaptiveReader(r, min_size=1024, max_size=64 * 1024)
+    got = bytearray()
+    sent = 0
+    try:
+        while len(got) < len(payload):
+            if sent < len(payload):
+                try:
+                    sent += os.write(w, payload[sent:sent + 256 * 1024])
+                except BlockingIOError:
+                    pass
+            got += reader.read()
+    finally:
+        os.close(r)
+        os.close(w)
+    assert reader.size > 1024 * 4
+    assert bytes(got) == payload
+
+
+def test_pipe_job_log_matches_output(tmp_path):
+    script = tmp_path / "emit.py"
+    script.write_text("import sys\nsys.stdout.write(''.join(f'line {i:07d} ' + 'x' * 40 + '\\n' for i in range(60000)))\n")
+    runner = CommandRunner(logs_dir=str(tmp_path / "logs"), max_workers=1, log_max_bytes=0)
+    job = runner.run(f"{sys.executable} {script}", use_pty=False, tool="test")
+    assert job.wait(30)
+    with open(job.log_path, "rb") as f:
+        data = f.read()
+    assert b"\0" not in data
+    assert data.count(b"\n") == 60000
+    assert job.lines_out == 60000
+
+
+@pytest.mark.parametrize("runner_cls", [CommandRunner, AsyncCommandRunner])
+def test_stopped_job_ends_while_an_escaped_descendant_holds_its_pipe(tmp_path, runner_cls):
+    pidfile = tmp_path / "escaped.pid"
+    notes = []
+    runner = runner_cls(on_output=lambda data, job: notes.append(data), logs_dir=str(tmp_path / "logs"), max_workers=1,
+                        kill_grace=0.5)
+    cmd = f"setsid sh -c 'echo $$ > {pidfile}; exec sleep 60' & echo started; sleep 60"
+    job = runner.run(cmd, use_pty=False, tool="test")
+    try:
+        deadline = time.monotonic() + 10
+        while not (pidfile.exists() and pidfile.read_text().strip()):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        runner.stop_job(job.id)
+        assert runner.wait_stopped(5)
+        assert job.state == CANCELLED
+    finally:
+        os.kill(int(pidfile.read_text()), signal.SIGKILL)
+        if runner_cls is AsyncCommandRunner:
+            runner.close()
+    assert "started\n" in notes
+    assert any("no longer reading" in n for n in notes)
+
+
+def test_wait_stopped_reports_a_stuck_job(tmp_path):
+    runner = CommandRunner(logs_dir=str(tmp_path / "logs"), max_workers=1)
+    job = runner.run("sleep 60", use_pty=False, tool="test")
+    deadline = time.monotonic() + 10
+    while job.pgid is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    job._stop_requested = True  # as if stopped, but nothing ever signals it
+    notes = []
+    runner._emit = lambda text, j=None: notes.append(text)
+    assert not runner.wait_stopped(0.2)
+    assert any(f"job {job.id} is still running" in n for n in notes)
+    os.killpg(job.pgid, signal.SIGKILL)
+    assert job.wait(10)
+
+
+def test_command_outputs():
+    assert command_outputs("katana -list a.txt -o urls.txt | tee -a log.txt > /dev/null") == ["urls.txt", "log.txt"]
+    assert command_outputs("cat *.txt 2>/dev/null | sort -u >> final.txt") == ["final.txt"]
+    assert command_outputs("subfinder -d x -silent | tee subfinder.txt") == ["subfinder.txt"]
+    assert command_outputs("httpx -l hosts.txt -silent") == []
+
+
+def test_concurrent_jobs_in_one_workspace_keep_their_own_artifacts(tmp_path):
+    runner = CommandRunner(logs_dir=str(tmp_path / "logs"), max_workers=3)
+    ws = Workspace(str(tmp_path / "ws"), "example.com").create()
+    slow = runner.run("echo a > a.txt; sleep 1", use_pty=False, workspace=ws)
+    fast = runner.run("sleep 0.3; echo b > b.txt", use_pty=False, workspace=ws)
+    # declares nothing, so it falls back to the snapshot diff, minus what the others declared
+    loose = runner.run("sh -c 'echo c > c.txt'; sleep 0.6", use_pty=False, workspace=ws)
+    for job in (slow, fast, loose):
+        assert job.wait(10)
+    assert slow.artifacts == ["a.txt"]
+    assert fast.artifacts == ["b.txt"]
+    assert loose.artifacts == ["c.txt"]
+    arts = ws.artifacts()
+    assert {rel: arts[rel]["job"] for rel in arts} == {"a.txt": slow.id, "b.txt": fast.id, "c.txt": loose.id}
+
+
+def test_done_callbacks_registered_while_the_job_finishes_run_once(tmp_path):
+    runner = CommandRunner(logs_dir=str(tmp_path / "logs"), max_workers=4)
+    calls = []
+    jobs = [runner.run("true", use_pty=False) for _ in range(40)]
+    for job in jobs:
+        # races with _finish on the runner threads; each callback must run exactly once either way
+        job.add_done_callback(lambda j: calls.append(j.id))
+    for job in jobs:
+        assert job.wait(10)
+    deadline = time.monotonic() + 10
+    while len(calls) < len(jobs):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    time.sleep(0.1)
+    assert sorted(calls) == sorted(j.id for j in jobs)
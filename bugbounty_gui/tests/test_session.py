@@ -0,0 +1,59 @@
+import time
+
+from session import Session
+
+
+def test_batch_shard_output_is_split_into_target_workspaces(tmp_path):
+    config = {"workspaces_dir": str(tmp_path / "ws"), "batch_size": 2}
+    s = Session(config, logs_dir=str(tmp_path / "logs"))
+    s.plan = lambda template, targets, batch=True: ("batch", template)  # any shell command as the list form
+    try:
+        jobs = s.submit("sed 's/^/x./' {targets_file} > subs.txt", ["ex.com", "other.org", "third.net"],
+                        tool="subfinder", use_pty=False)
+        assert len(jobs) == 2
+        for job in jobs:
+            assert job.wait(30)
+        deadline = time.monotonic() + 10  # done callbacks run just after wait() returns
+        while not all("subs.txt" in s.workspace_for(t).artifacts() for t in ("ex.com", "other.org", "third.net")):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        for t in ("ex.com", "other.org", "third.net"):
+            ws = s.workspace_for(t)
+            with open(ws.file("subs.txt")) as f:
+                assert f.read() == f"x.{t}\n"
+            assert ws.artifacts()["subs.txt"]["tool"] == "subfinder"
+        assert s.asset_recorder.wait_idle(10)
+        assert s.assets.query("other.org", "subdomain") == ["x.other.org"]
+    finally:
+        s.close()
+
+
+def test_resumed_batch_shard_is_still_split_into_target_workspaces(tmp_path):
+    config = {"workspaces_dir": str(tmp_path / "ws"), "batch_size": 2, "max_workers": 1}
+    cmd = "sed 's/^/x./' {targets_file} > subs.txt"
+    crashed = Session(config, logs_dir=str(tmp_path / "logs"))
+    crashed.plan = lambda template, targets, batch=True: ("batch", template)
+    try:
+        blocker = crashed.runner.submit("sleep 30", use_pty=False, resumable=False)
+        jobs = crashed.submit(cmd, ["ex.com", "other.org"], tool="subfinder", use_pty=False)
+        assert [j.batch for j in jobs] == [True]
+    finally:
+        # the journal stops hearing about the shard as if the process died while it was queued
+        crashed.runner.observers.remove(crashed.journal)
+        crashed.runner.stop_job(blocker.id)
+        crashed.close()
+
+    s = Session(config, logs_dir=str(tmp_path / "logs"))
+    try:
+        assert [rec["batch"] for rec in s.interrupted()] == [True]
+        resumed = s.resume()
+        assert [j.key for j in resumed] == [jobs[0].key]
+        assert resumed[0].wait(30)
+        deadline = time.monotonic() + 10
+        while not all("subs.txt" in s.workspace_for(t).artifacts() for t in ("ex.com", "other.org")):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        with open(s.workspace_for("other.org").file("subs.txt")) as f:
+            assert f.read() == "x.other.org\n"
+    finally:
+        s.close()
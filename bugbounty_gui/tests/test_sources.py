@@ -0,0 +1,142 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+import pytest
+
+import sources
+from sources import HTTPPool, SourceError, iter_json_array
+
+
+class Server:
+    # local http.server: path (without query) -> (status, body), or a function of the query string returning
+    # them; remembers the client port and query of each request
+    def __init__(self, routes):
+        self.routes = routes
+        self.ports = []
+        self.queries = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.ports.append(self.client_address[1])
+                path, _, query = self.path.partition("?")
+                server.queries.append(query)
+                route = server.routes.get(path, (404, b"not found"))
+                status, body = route(query) if callable(route) else route
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    s = Server({})
+    yield s
+    s.close()
+
+
+def test_pool_reuses_keep_alive_connections(server):
+    server.routes["/a"] = (200, b"one")
+    server.routes["/b"] = (200, b"two")
+    pool = HTTPPool()
+    try:
+        for path, body in (("/a", b"one"), ("/b", b"two"), ("/a", b"one")):
+            with pool.get(server.url + path) as resp:
+                assert resp.read() == body
+        assert len(set(server.ports)) == 1
+        with pytest.raises(SourceError, match="HTTP 404"):
+            pool.get(server.url + "/missing")
+    finally:
+        pool.close()
+
+
+def test_iter_json_array_decodes_elements_across_reads(server):
+    items = [{"name_value": f"h{i}.ex.com\nwww.h{i}.ex.com", "id": i, "note": "ü" * (i % 5)} for i in range(300)]
+    items += [12345, "tail", None, [1, 2]]
+    server.routes["/top"] = (200, json.dumps(items).encode())
+    server.routes["/keyed"] = (200, json.dumps({"meta": {"url_list": "no"}, "url_list": items, "has_next": False}).encode())
+    server.routes["/null"] = (200, b'{"url_list": null}')
+    server.routes["/empty"] = (200, b'{"count": 0}')
+    pool = HTTPPool()
+    try:
+        for chunk in (7, 4096):
+            with pool.get(server.url + "/top") as resp:
+                assert list(iter_json_array(resp, chunk=chunk)) == items
+            with pool.get(server.url + "/keyed") as resp:
+                assert list(iter_json_array(resp, "url_list", chunk=chunk)) == items
+        with pool.get(server.url + "/null") as resp:
+            assert list(iter_json_array(resp, "url_list")) == []
+        with pool.get(server.url + "/empty") as resp:
+            assert list(iter_json_array(resp, "url_list")) == []
+    finally:
+        pool.close()
+
+
+def test_crtsh_builtin_against_local_server(server, tmp_path):
+    rows = [{"name_value": "a.ex.com\n*.b.ex.com", "common_name": "ex.com"},
+            {"name_value": "A.EX.COM", "common_name": "other.org"}]
+    server.routes["/"] = (200, json.dumps(rows).encode())
+    out = []
+    run = sources._make_builtin("crtsh", sources.fetch_crtsh)
+    rc = run(["ex.com", "--base-url", server.url, "-o", "crtsh.txt"], out.append, lambda: False, str(tmp_path))
+    assert rc == 0
+    assert (tmp_path / "crtsh.txt").read_text().split() == ["a.ex.com", "b.ex.com", "ex.com"]
+    server.routes["/"] = (503, b"busy")
+    assert run(["ex.com", "--base-url", server.url], out.append, lambda: False) == 1
+    assert "HTTP 503" in out[-1]
+
+
+OTX_PATH = "/api/v1/indicators/domain/ex.com/url_list"
+
+
+def _otx_pages(server):
+    return sorted(int(parse_qs(q)["page"][0]) for q in server.queries)
+
+
+def _otx_page(items, **fields):
+    return 200, json.dumps(dict({"url_list": items, "page_num": 1, "limit": 500}, **fields)).encode()
+
+
+def test_otx_stops_paging_when_has_next_is_false(server, tmp_path):
+    def route(query):
+        n = int(parse_qs(query)["page"][0])
+        # full pages with has_next to 2, then pages that would go on forever if has_next were ignored
+        items = [{"hostname": f"h{n}-{i}.ex.com", "url": "https://other.org/x"} for i in range(500 if n <= 2 else 1)]
+        return _otx_page(items, has_next=n < 2)
+
+    server.routes[OTX_PATH] = route
+    run = sources._make_builtin("otx", sources.fetch_otx)
+    rc = run(["ex.com", "--base-url", server.url, "--workers", "1", "-o", "otx.txt"], lambda text: None, lambda: False,
+             str(tmp_path))
+    assert rc == 0
+    assert _otx_pages(server) == [1, 2]
+    hosts = (tmp_path / "otx.txt").read_text().split()
+    assert len(hosts) == 1000 and "h2-499.ex.com" in hosts
+
+
+def test_otx_stops_paging_on_a_short_page(server, tmp_path):
+    # no has_next at all and one item per page: a short page is the last one
+    server.routes[OTX_PATH] = lambda query: _otx_page([{"hostname": "a.ex.com"}])
+    run = sources._make_builtin("otx", sources.fetch_otx)
+    rc = run(["ex.com", "--base-url", server.url, "--workers", "2", "-o", "otx.txt"], lambda text: None, lambda: False,
+             str(tmp_path))
+    assert rc == 0
+    assert _otx_pages(server) == [1, 2]
+    assert (tmp_path / "otx.txt").read_text().split() == ["a.ex.com"]
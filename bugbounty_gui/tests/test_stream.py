@@ -0,0 +1,132 @@
+import os
+import threading
+
+import stream
+from runner import CommandRunner
+from stream import StreamFeed
+from pipeline import Pipeline, PipelineRun, Stage, DONE, RUNNING
+
+
+def _reader(fifo, got, lines=None):
+    # consumer: reads the FIFO to EOF, or closes it after `lines` lines
+    def run():
+        with open(fifo, encoding="utf-8") as f:
+            for line in f:
+                got.append(line.rstrip("\n"))
+                if lines is not None and len(got) >= lines:
+                    return
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    return t
+
+
+def _append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_feed_dedupes_across_files_and_ends_with_eof(tmp_path):
+    a, b, fifo, tee = tmp_path / "a.txt", tmp_path / "b.txt", tmp_path / "s" / "feed.fifo", tmp_path / "tee.txt"
+    a.write_text("x.example.com\nY.example.com\n")
+    feed = StreamFeed([str(a), str(b)], str(fifo), tee=str(tee), poll=0.05).start()
+    got = []
+    reader = _reader(str(fifo), got)
+    _append(b, "y.example.com\nz.exa")
+    _append(b, "mple.com\nw.example.com")  # the last line is only complete once upstream is done
+    feed.upstream_done()
+    reader.join(10)
+    assert not reader.is_alive()
+    assert feed.wait(10) and feed.error is None
+    assert sorted(got) == ["w.example.com", "x.example.com", "y.example.com", "z.example.com"]
+    assert feed.lines_out == 4
+    assert tee.read_text().splitlines() == sorted(got)
+    assert not os.path.exists(fifo)
+
+
+def test_feed_keeps_the_tee_going_after_the_reader_left(tmp_path):
+    src, fifo, tee = tmp_path / "a.txt", tmp_path / "feed.fifo", tmp_path / "tee.txt"
+    src.write_text("a.example.com\nb.example.com\n")
+    feed = StreamFeed([str(src)], str(fifo), tee=str(tee), poll=0.05).start()
+    got = []
+    reader = _reader(str(fifo), got, lines=1)
+    reader.join(10)
+    feed.reader_gone()
+    _append(src, "c.example.com\n")
+    feed.upstream_done()
+    assert feed.wait(10) and feed.error is None
+    assert got == ["a.example.com"]
+    assert tee.read_text().splitlines() == ["a.example.com", "b.example.com", "c.example.com"]
+
+
+def test_cancelled_feed_without_a_reader_ends(tmp_path):
+    src, fifo = tmp_path / "a.txt", tmp_path / "feed.fifo"
+    src.write_text("a.example.com\n")
+    feed = StreamFeed([str(src)], str(fifo), poll=0.05).start()
+    done = []
+    feed.add_done_callback(done.append)
+    feed.stop()
+    assert feed.wait(5)
+    assert done == [feed]
+    assert not os.path.exists(fifo)
+
+
+def test_feed_switches_to_the_bloom_filter_and_the_tee_stays_exact(tmp_path, monkeypatch):
+    monkeypatch.setattr(stream, "SEEN_LIMIT", 3)
+    src, fifo, tee = tmp_path / "a.txt", tmp_path / "feed.fifo", tmp_path / "tee.txt"
+    hosts = [f"h{i}.example.com" for i in range(10)]
+    src.write_text("".join(h + "\n" for h in hosts + hosts[::2]))
+    feed = StreamFeed([str(src)], str(fifo), tee=str(tee), poll=0.05).start()
+    got = []
+    reader = _reader(str(fifo), got)
+    feed.upstream_done()
+    reader.join(10)
+    assert feed.wait(10) and feed.error is None
+    assert feed.bloom is not None and not feed.seen
+    assert sorted(got) == sorted(hosts)
+    assert tee.read_text().splitlines() == sorted(hosts)
+
+
+def _run(tmp_path, stages):
+    events = []
+    runner = CommandRunner(logs_dir=str(tmp_path / "logs"), max_workers=4)
+    run = PipelineRun(Pipeline("t", stages), runner, "example.com", cwd=str(tmp_path / "work"),
+                      on_event=lambda stage, state, msg: events.append((stage, state)))
+    return run.start(), events
+
+
+def test_streaming_stage_reads_its_producer_while_it_runs(tmp_path):
+    run, events = _run(tmp_path, [
+        Stage("src", "for i in 1 2 3; do echo h$i.example.com; sleep 0.3; done > {output}", outputs=["src.txt"]),
+        Stage("probe", "cat {input} > {output}", inputs=["src.txt"], outputs=["probed.txt"], stream=True, tee="seen.txt"),
+    ])
+    assert run.wait(30)
+    assert run.ok, run.states
+    assert events.index(("probe", RUNNING)) < events.index(("src", DONE))
+    expected = ["h1.example.com", "h2.example.com", "h3.example.com"]
+    assert (tmp_path / "work" / "probed.txt").read_text().splitlines() == expected
+    assert (tmp_path / "work" / "seen.txt").read_text().splitlines() == expected
+
+
+def test_streaming_stage_whose_reader_exits_early_completes(tmp_path):
+    run, _ = _run(tmp_path, [
+        Stage("src", "for i in 1 2 3; do echo h$i.example.com; sleep 0.3; done > {output}", outputs=["src.txt"]),
+        Stage("probe", "head -n 1 {input} > {output}", inputs=["src.txt"], outputs=["probed.txt"], stream=True,
+              tee="seen.txt"),
+    ])
+    assert run.wait(30)
+    assert run.ok, run.states
+    assert (tmp_path / "work" / "probed.txt").read_text() == "h1.example.com\n"
+    assert len((tmp_path / "work" / "seen.txt").read_text().splitlines()) == 3
+
+
+def test_cancelled_streaming_pipeline_ends(tmp_path):
+    run, _ = _run(tmp_path, [
+        Stage("src", "echo a.example.com > {output}; sleep 30", outputs=["src.txt"]),
+        Stage("probe", "cat {input} > {output}", inputs=["src.txt"], outputs=["probed.txt"], stream=True),
+    ])
+    while "probe" not in run.feeds:
+        assert not run.wait(0.05)
+    run.cancel()
+    assert run.wait(20)
+    assert not run.ok
+    assert not os.listdir(tmp_path / "work" / ".stream")
@@ -0,0 +1,164 @@
+# workspace.py
+# Per-target, per-run working directories. Catalog commands write fixed relative names
+# (subfinder.txt, urls.txt, final.txt ...), so every job runs with its cwd set to the workspace
+# of its target and run: two targets never share files and "cat *.txt" only sees one target.
+# Each workspace keeps manifest.json listing the artifacts jobs produced there. Jobs of one target run
+# concurrently in the same workspace, so a job is credited with the files it declares (its -o/> files
+# or a stage's outputs); only jobs that declare nothing fall back to every file that changed while they
+# ran, minus the files other running jobs declared or another job already recorded.
+import os
+import json
+import time
+import uuid
+import threading
+
+from logwriter import safe_name
+
+MANIFEST = "manifest.json"
+_IGNORED = {MANIFEST, MANIFEST + ".tmp"}
+
+
+def new_run_id():
+    return time.strftime("%Y%m%d_%H%M%S") + "_" + uuid.uuid4().hex[:6]
+
+
+def _declared(rel, outputs):
+    # rel is one of the declared outputs, or a file inside a declared output directory
+    return any(rel == o or rel.startswith(o + os.sep) for o in outputs)
+
+
+class Workspace:
+    _locks = {}
+    _locks_guard = threading.Lock()
+    # workspace path -> {job id: declared outputs} of the jobs running there
+    _claims = {}
+
+    def __init__(self, root, target, run_id=None):
+        self.root = os.path.abspath(root)
+        self.target = target
+        self.run_id = run_id or new_run_id()
+        self.path = os.path.join(self.root, safe_name(target, 80) or "_", self.run_id)
+        self.manifest_path = os.path.join(self.path, MANIFEST)
+        with Workspace._locks_guard:
+            self._lock = Workspace._locks.setdefault(self.path, threading.Lock())
+
+    @classmethod
+    def runs(cls, root, target):
+        # run ids for a target, oldest first
+        d = os.path.join(os.path.abspath(root), safe_name(target, 80) or "_")
+        if not os.path.isdir(d):
+            return []
+        return sorted(n for n in os.listdir(d) if os.path.isfile(os.path.join(d, n, MANIFEST)))
+
+    @classmethod
+    def latest(cls, root, target):
+        runs = cls.runs(root, target)
+        return cls(root, target, runs[-1]).create() if runs else None
+
+    def create(self):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            if not os.path.exists(self.manifest_path):
+                self._write({"target": self.target, "run_id": self.run_id, "created": time.time(), "artifacts": {}})
+        return self
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def render(self, cmd):
+        # workspace placeholders; {target} is normally filled in already by render_command
+        return (cmd.replace("{workspace}", self.path)
+                   .replace("{run_id}", self.run_id)
+                   .replace("{target}", self.target))
+
+    # --- manifest ---
+
+    def manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"target": self.target, "run_id": self.run_id, "artifacts": {}}
+
+    def _write(self, data):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def snapshot(self):
+        # relpath -> (size, mtime_ns) for every regular file in the workspace
+        out = {}
+        for dirpath, _, files in os.walk(self.path):
+            for name in files:
+                full = os.path.join(dirpath, name)
+                rel = os.path.relpath(full, self.path)
+                if rel in _IGNORED:
+                    continue
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                out[rel] = (st.st_size, st.st_mtime_ns)
+        return out
+
+    def _relative(self, outputs):
+        rels = []
+        for o in outputs or ():
+            full = os.path.normpath(os.path.join(self.path, o))
+            rel = os.path.relpath(full, self.path)
+            if rel != "." and not rel.startswith(os.pardir):
+                rels.append(rel)
+        return rels
+
+    def claim(self, job_id, outputs):
+        # a job starts here and will write `outputs`; they are not credited to other jobs meanwhile
+        with Workspace._locks_guard:
+            Workspace._claims.setdefault(self.path, {})[job_id] = self._relative(outputs)
+
+    def release(self, job_id):
+        with Workspace._locks_guard:
+            claims = Workspace._claims.get(self.path, {})
+            claims.pop(job_id, None)
+            if not claims:
+                Workspace._claims.pop(self.path, None)
+
+    def record(self, before, tool=None, job_id=None, returncode=None, outputs=None):
+        # add files created or modified since `before` (a snapshot()) to the manifest; with `outputs`
+        # only those files (or files inside those directories) are credited to the job
+        after = self.snapshot()
+        changed = [rel for rel, sig in after.items() if before.get(rel) != sig]
+        declared = self._relative(outputs)
+        if declared:
+            changed = [rel for rel in changed if _declared(rel, declared)]
+        elif changed:
+            with Workspace._locks_guard:
+                others = [o for j, outs in Workspace._claims.get(self.path, {}).items() if j != job_id for o in outs]
+            changed = [rel for rel in changed if not _declared(rel, others)]
+        if not changed:
+            return []
+        with self._lock:
+            data = self.manifest()
+            arts = data.setdefault("artifacts", {})
+            if not declared:
+                # leave files another job wrote during our run, and already recorded, to that job
+                changed = [rel for rel in changed if not self._recorded_by_other(arts.get(rel), after[rel], job_id)]
+            for rel in changed:
+                size, mtime_ns = after[rel]
+                arts[rel] = {"size": size, "mtime": mtime_ns / 1e9, "tool": tool, "job": job_id, "returncode": returncode}
+            if changed:
+                self._write(data)
+        return changed
+
+    @staticmethod
+    def _recorded_by_other(entry, sig, job_id):
+        if not entry or entry.get("job") == job_id:
+            return False
+        size, mtime_ns = sig
+        return entry.get("size") == size and abs(entry.get("mtime", 0) - mtime_ns / 1e9) < 1e-6
+
+    def artifacts(self):
+        return self.manifest().get("artifacts", {})
+
+    def __repr__(self):
+        return f"<Workspace {self.target} {self.run_id}>"